@@ -14,8 +14,7 @@ I/O Hook which creates folders on disk.
 """
 
 from tank import Hook
-import os
-import shutil
+from tank.folder import execute_folder_plan
 
 class ProcessFolderCreation(Hook):
     
@@ -68,60 +67,20 @@ class ProcessFolderCreation(Hook):
                       on which this object exists.
         * "content": file content
         * "target_path": target location to where the file should be copied.
- 
-        """
         
-        # set the umask so that we get true permissions
-        old_umask = os.umask(0)
-        folders = []
-        try:
+        Items are ordered so that parents always come before their children and
+        each path only appears once. The default implementation processes independent
+        items concurrently using tank.folder.execute_folder_plan(). Custom hooks can
+        use tank.folder.execute_folder_item() to carry out the default operation 
+        for individual items.
 
-            # loop through our list of items
-            for i in items:
-                
-                action = i.get("action")
-                
-                if action == "entity_folder" or action == "folder":
-                    # folder creation
-                    path = i.get("path")    
-                    if not os.path.exists(path):
-                        if not preview_mode:
-                            # create the folder using open permissions
-                            os.makedirs(path, 0777)
-                        folders.append(path)
-                
-                elif action == "copy":
-                    # a file copy
-                    source_path = i.get("source_path")
-                    target_path = i.get("target_path")
-                    if not os.path.exists(target_path):
-                        if not preview_mode:
-                            # do a standard file copy
-                            shutil.copy(source_path, target_path)
-                            # set permissions to open
-                            os.chmod(target_path, 0666)
-                        folders.append(target_path)
-    
-                elif action == "create_file":
-                    # create a new file based on content
-                    path = i.get("path")
-                    parent_folder = os.path.dirname(path)
-                    content = i.get("content")
-                    if not os.path.exists(parent_folder) and not preview_mode:
-                        os.makedirs(parent_folder, 0777)
-                    if not os.path.exists(path):
-                        if not preview_mode:
-                            # create the file
-                            fp = open(path, "wb")
-                            fp.write(content)
-                            fp.close()
-                            # and set permissions to open
-                            os.chmod(path, 0666)
-                        folders.append(path)
-                    
-        
-        finally:
-            # reset umask
-            os.umask(old_umask)
+        Large folder creation runs are split into chunks of at most 10000 items
+        (see tank.folder.folder_io.DEFAULT_CHUNK_SIZE) and this hook is executed once
+        per chunk, so a single run may call it several times. Each chunk is registered
+        in the path cache before the next one is started, meaning that parents which
+        belong to a previous chunk have already been processed and are not passed again.
+        If a later chunk fails, folders created by earlier chunks are left in place.
 
-        return folders
\ No newline at end of file
+        """
+        
+        return execute_folder_plan(items, preview_mode)
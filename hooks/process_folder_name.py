@@ -88,6 +88,22 @@ class ProcessFolderName(Hook):
         
         return str_value
     
+    def execute_batch(self, entity_type, items, **kwargs):
+        """
+        Converts several values for the same entity type in a single call. 
+        The following parameters are passed:
+        
+        * entity_type: the shotgun entity type for which the values are taken
+        * items: list of dictionaries with keys entity_id, field_name and value, 
+                 see execute() for details.
+        
+        Returns a list of string values, one for each item.
+        """
+        return [ self.execute(entity_type=entity_type, 
+                              entity_id=item["entity_id"], 
+                              field_name=item["field_name"], 
+                              value=item["value"]) for item in items ]
+    
     def _replace_non_alphanumeric(self, src, is_project_name):
         """
         Safely replace all non-alphanumeric characters 
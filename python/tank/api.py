@@ -14,12 +14,14 @@ Classes for the main Sgtk API.
 """
 import os
 import glob
+import threading
 
 from tank_vendor import yaml
 
 from . import folder
 from . import context
 from .util import shotgun
+from .util import shotgun_cache
 from .errors import TankError
 from .folder.folder_io import folder_preflight_checks
 from .path_cache import PathCache
@@ -42,6 +44,7 @@ class Tank(object):
         # this is a path and try to construct a pc from the path
 
         self.__sg = None
+        self.__sg_lock = threading.Lock()
 
         if isinstance(project_path, pipelineconfig.PipelineConfiguration):
             # this is actually a pc object
@@ -106,10 +109,29 @@ class Tank(object):
     @property
     def shotgun(self):
         """
-        Lazily create a Shotgun API handle
+        Lazily create a Shotgun API handle. 
+        
+        If the shotgun cache is enabled, see tank.util.shotgun_cache, lookups of rarely 
+        changing data, such as storages, publish types and the schema are cached in 
+        the pipeline configuration cache location. Use tk.shotgun.invalidate_cache() 
+        to force them to be read from Shotgun again.
+        
+        With the cache enabled, the handle is a CachingShotgun wrapper rather than a 
+        shotgun_api3.Shotgun instance. It supports the same methods and attributes, 
+        and tk.shotgun.get_wrapped_api() returns the Shotgun instance itself.
+        
+        The handle can be shared by several threads.
         """
         if self.__sg is None:
-            self.__sg = shotgun.create_sg_connection()
+            self.__sg_lock.acquire()
+            try:
+                # another thread may have created it while we were waiting
+                if self.__sg is None:
+                    cache_path = os.path.join(self.__pipeline_config.get_cache_location(), 
+                                              shotgun_cache.CACHE_FOLDER)
+                    self.__sg = shotgun.create_cached_sg_connection(cache_path)
+            finally:
+                self.__sg_lock.release()
 
         # pass on information to the user agent manager which core version is returning
         # this sg handle. This information will be passed to the web server logs
@@ -425,10 +447,14 @@ class Tank(object):
         """
         return context.from_entity(self, entity_type, entity_id)
 
-    def create_filesystem_structure(self, entity_type, entity_id, engine=None):
+    def create_filesystem_structure(self, entity_type, entity_id, engine=None, skip_unchanged=False, report=None):
         """
         Create folders and associated data on disk to reflect branches in the project tree
         related to a specific entity.
+        
+        Use the skip_unchanged parameter to skip entities whose folders have previously 
+        been created from the same folder configuration and with the same names. Folders
+        for new child entities, for example new tasks, are not created for skipped entities.
 
         :param entity_type: The name of the entity type.
         :type  entity_type: String.
@@ -438,6 +464,10 @@ class Tank(object):
                        folder creation pass should be executed for a particular engine.
                        Folders marked as deferred will be processed.
         :type engine: String.
+        :param skip_unchanged: Skip entities whose folders are up to date.
+        :type skip_unchanged: Boolean.
+        :param report: Optional report object to populate with performance statistics.
+        :type report: tank.folder.FolderCreationReport.
 
         :returns: The number of folders processed
         """
@@ -445,10 +475,12 @@ class Tank(object):
                                                       entity_type,
                                                       entity_id,
                                                       False,
-                                                      engine)
+                                                      engine,
+                                                      skip_unchanged,
+                                                      report)
         return len(folders)
 
-    def preview_filesystem_structure(self, entity_type, entity_id, engine=None):
+    def preview_filesystem_structure(self, entity_type, entity_id, engine=None, report=None):
         """
         Previews folders that would be created by create_filesystem_structure.
 
@@ -460,6 +492,8 @@ class Tank(object):
                        folder creation pass should be executed for a particular engine.
                        Folders marked as deferred will be processed.
         :type engine: String.
+        :param report: Optional report object to populate with performance statistics.
+        :type report: tank.folder.FolderCreationReport.
 
         :returns: List of items processed.
         """
@@ -467,7 +501,8 @@ class Tank(object):
                                                       entity_type,
                                                       entity_id,
                                                       True,
-                                                      engine)
+                                                      engine,
+                                                      report=report)
         return folders
 
     def execute_hook(self, hook_name, **kwargs):
@@ -491,15 +526,127 @@ class Tank(object):
 def tank_from_path(path):
     """
     Create an Sgtk API instance based on a path inside a project.
+    
+    If the instance registry has been enabled (see enable_instance_registry()), 
+    an existing instance for the associated pipeline configuration is returned
+    if one has already been loaded.
     """
-    return Tank(path)
+    if not is_instance_registry_enabled():
+        return Tank(path)
+    pc_path = pipelineconfig.get_pc_path_from_path(path)
+    return get_shared_instance(pc_path)
 
 def tank_from_entity(entity_type, entity_id):
     """
     Create a Sgtk API instance based on a path inside a project.
+
+    If the instance registry has been enabled (see enable_instance_registry()), 
+    an existing instance for the associated pipeline configuration is returned
+    if one has already been loaded.
+    """
+    if not is_instance_registry_enabled():
+        pc = pipelineconfig.from_entity(entity_type, entity_id)
+        return Tank(pc)
+    pc_path = pipelineconfig.get_pc_path_from_entity(entity_type, entity_id)
+    return get_shared_instance(pc_path)
+
+##########################################################################################
+# instance registry
+#
+# Constructing a Tank instance is relatively expensive - the pipeline configuration
+# has to be resolved, templates parsed and the init hooks executed. Code which 
+# repeatedly creates API instances for the same configuration (for example farm 
+# wrappers deserializing contexts) can opt in to a process wide registry which hands
+# out a single shared instance per pipeline configuration.
+
+# environment variable which enables the instance registry at startup
+INSTANCE_REGISTRY_ENV_VAR = "TANK_USE_INSTANCE_REGISTRY"
+
+_registry_lock = threading.RLock()
+_registry_instances = {}
+_registry_enabled = os.environ.get(INSTANCE_REGISTRY_ENV_VAR) not in [None, "", "0"]
+
+def enable_instance_registry(enabled=True):
+    """
+    Enables or disables the process wide instance registry. 
+    When the registry is disabled, all registered instances are released.
+    
+    :param enabled: True to enable the registry, False to disable it
+    """
+    global _registry_enabled
+    _registry_lock.acquire()
+    try:
+        _registry_enabled = enabled
+        if not enabled:
+            _registry_instances.clear()
+    finally:
+        _registry_lock.release()
+
+def is_instance_registry_enabled():
+    """
+    Returns True if the process wide instance registry is enabled.
+    """
+    return _registry_enabled
+
+def get_shared_instance(pipeline_config_path):
+    """
+    Returns the Sgtk API instance associated with a pipeline configuration.
+    If the instance registry is enabled, the instance will be shared by all 
+    callers requesting the same configuration. If the registry is disabled, 
+    a new instance is returned.
+    
+    :param pipeline_config_path: Registered path to a pipeline configuration root
+    :returns: Sgtk API instance
+    """
+    if not _registry_enabled:
+        return Tank(pipeline_config_path)
+
+    _registry_lock.acquire()
+    try:
+        tk = _registry_instances.get(pipeline_config_path)
+        if tk is None:
+            # note that the lock is re-entrant, so the init hooks executed
+            # as part of the construction may request shared instances too
+            tk = Tank(pipeline_config_path)
+            _registry_instances[pipeline_config_path] = tk
+        return tk
+    finally:
+        _registry_lock.release()
+
+def invalidate_shared_instances(pipeline_config_path=None):
+    """
+    Removes instances from the registry. The next request for the associated 
+    pipeline configuration will construct a new instance. Instances already
+    handed out remain valid.
+    
+    :param pipeline_config_path: Registered path to a pipeline configuration root. 
+                                 If None, all registered instances are removed.
+    """
+    _registry_lock.acquire()
+    try:
+        if pipeline_config_path is None:
+            _registry_instances.clear()
+        elif pipeline_config_path in _registry_instances:
+            del _registry_instances[pipeline_config_path]
+    finally:
+        _registry_lock.release()
+
+def reload_shared_instance(pipeline_config_path):
+    """
+    Constructs a new instance for a pipeline configuration and, if the instance 
+    registry is enabled, replaces any previously registered instance with it.
+    
+    :param pipeline_config_path: Registered path to a pipeline configuration root
+    :returns: The new Sgtk API instance
     """
-    pc = pipelineconfig.from_entity(entity_type, entity_id)
-    return Tank(pc)
+    _registry_lock.acquire()
+    try:
+        tk = Tank(pipeline_config_path)
+        if _registry_enabled:
+            _registry_instances[pipeline_config_path] = tk
+        return tk
+    finally:
+        _registry_lock.release()
 
 ##########################################################################################
 # sgtk API aliases
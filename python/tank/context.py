@@ -16,6 +16,7 @@ Management of the current context, e.g. the current shotgun entity/step/task.
 import os
 import pickle
 import copy
+import threading
 
 from tank_vendor import yaml
 
@@ -26,6 +27,12 @@ from .errors import TankError
 from .path_cache import PathCache
 from .template import TemplatePath
 
+# contexts may be accessed from several threads at once, for example when app 
+# configurations are validated concurrently as an engine starts up. The shotgun 
+# connection associated with a Sgtk API instance should not be used concurrently,
+# so serialize the lookups made on behalf of contexts.
+_shotgun_lookup_lock = threading.Lock()
+
 
 class Context(object):
     """
@@ -456,7 +463,11 @@ class Context(object):
                     # get the value from shotgun
                     filters = [["id", "is", entity["id"]]]
                     query_fields = [key.shotgun_field_name]
-                    result = self.__tk.shotgun.find_one(key.shotgun_entity_type, filters, query_fields)
+                    _shotgun_lookup_lock.acquire()
+                    try:
+                        result = self.__tk.shotgun.find_one(key.shotgun_entity_type, filters, query_fields)
+                    finally:
+                        _shotgun_lookup_lock.release()
                     if not result:
                         # no record with that id in shotgun!
                         raise TankError("Could not retrieve Shotgun data for key '%s' in "
@@ -833,7 +844,7 @@ def deserialize(context_str):
     Deserializaes a string created with serialize() into a context object
     """
     # lazy load this to avoid cyclic dependencies
-    from .api import Tank
+    from .api import get_shared_instance
     
     data = pickle.loads(context_str)
 
@@ -841,8 +852,9 @@ def deserialize(context_str):
     pipeline_config_path = data["_pc_path"] 
     del data["_pc_path"]
     
-    # create a Sgtk API instance.
-    tk = Tank(pipeline_config_path)
+    # get a Sgtk API instance. This will be shared with other 
+    # contexts if the instance registry is enabled.
+    tk = get_shared_instance(pipeline_config_path)
 
     # add it to the constructor instance
     data["tk"] = tk
@@ -886,7 +898,7 @@ def context_yaml_constructor(loader, node):
     Constructs a context object given the yaml data provided.
     """
     # lazy load this to avoid cyclic dependencies
-    from .api import Tank
+    from .api import get_shared_instance
     
     # get the dict from yaml
     context_constructor_dict = loader.construct_mapping(node)
@@ -895,8 +907,9 @@ def context_yaml_constructor(loader, node):
     pipeline_config_path = context_constructor_dict["_pc_path"] 
     del context_constructor_dict["_pc_path"]
     
-    # create a Sgtk API instance.
-    tk = Tank(pipeline_config_path)
+    # get a Sgtk API instance. This will be shared with other 
+    # contexts if the instance registry is enabled.
+    tk = get_shared_instance(pipeline_config_path)
 
     # add it to the constructor instance
     context_constructor_dict["tk"] = tk
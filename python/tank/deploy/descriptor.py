@@ -23,6 +23,55 @@ from ..errors import TankError
 from ..platform import constants
 
 
+###############################################################################################
+# process wide cache of parsed bundle manifests
+
+# parsed info.yml files, keyed by path. Values are tuples with the 
+# file signature at the time of parsing and the read-only manifest data.
+_MANIFEST_CACHE = {}
+
+def clear_manifest_cache():
+    """
+    Clears the process wide cache of parsed bundle manifests.
+    """
+    _MANIFEST_CACHE.clear()
+
+def _get_file_signature(path):
+    """
+    Returns a signature which changes when the file is modified,
+    or None if the file does not exist.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime, st.st_size)
+
+
+class _ReadOnlyDict(dict):
+    """
+    Dictionary which cannot be modified. Used to hand out manifest data
+    which is shared between all descriptors for the same bundle. Note that 
+    nested values are not protected and should not be modified either.
+    """
+    def __readonly(self, *args, **kwargs):
+        raise TypeError("Bundle manifest data is read-only!")
+    
+    __setitem__ = __readonly
+    __delitem__ = __readonly
+    clear = __readonly
+    pop = __readonly
+    popitem = __readonly
+    setdefault = __readonly
+    update = __readonly
+    
+    def __copy__(self):
+        return dict(self)
+    
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(dict(self), memo)
+
+
 class AppDescriptor(object):
     """
     An app descriptor describes a particular version of an app, engine or core component.
@@ -107,6 +156,10 @@ class AppDescriptor(object):
         Note that this call involves deep introspection; in order to
         access the metadata we normally need to have the code content
         local, so this method may trigger a remote code fetch if necessary.
+        
+        The parsed metadata is shared by all descriptors for the same bundle
+        and is returned as a read-only dictionary. Any values extracted from 
+        it must be copied before they are modified.
         """
         if self.__manifest_data is None:
             # make sure payload exists locally
@@ -117,24 +170,36 @@ class AppDescriptor(object):
             bundle_root = self.get_path()
         
             file_path = os.path.join(bundle_root, constants.BUNDLE_METADATA_FILE)
-        
-            if not os.path.exists(file_path):
+            
+            signature = _get_file_signature(file_path)
+            if signature is None:
                 raise TankError("Toolkit metadata file '%s' missing." % file_path)
-        
-            try:
-                file_data = open(file_path)
+            
+            cached_item = _MANIFEST_CACHE.get(file_path)
+            if cached_item and cached_item[0] == signature:
+                metadata = cached_item[1]
+            
+            else:
                 try:
-                    metadata = yaml.load(file_data)
-                finally:
-                    file_data.close()
-            except Exception, exp:
-                raise TankError("Cannot load metadata file '%s'. Error: %s" % (file_path, exp))
+                    file_data = open(file_path)
+                    try:
+                        metadata = yaml.load(file_data)
+                    finally:
+                        file_data.close()
+                except Exception, exp:
+                    raise TankError("Cannot load metadata file '%s'. Error: %s" % (file_path, exp))
+                
+                if not isinstance(metadata, dict):
+                    raise TankError("Cannot load metadata file '%s'. Error: The file "
+                                    "does not contain a dictionary." % file_path)
+                
+                metadata = _ReadOnlyDict(metadata)
+                _MANIFEST_CACHE[file_path] = (signature, metadata)
         
             # cache it
             self.__manifest_data = metadata
         
-        # return a copy
-        return copy.deepcopy(self.__manifest_data)
+        return self.__manifest_data
 
 
     ###############################################################################################
@@ -235,7 +300,7 @@ class AppDescriptor(object):
         return: ["tk-maya", "tk-nuke"] (works with maya and nuke)
         """
         md  = self._get_metadata()
-        return md.get("supported_engines")
+        return copy.deepcopy(md.get("supported_engines"))
         
     def get_required_context(self):
         """
@@ -250,7 +315,7 @@ class AppDescriptor(object):
         rc = md.get("required_context")
         if rc is None:
             rc = []
-        return rc
+        return copy.deepcopy(rc)
     
     def get_supported_platforms(self):
         """
@@ -267,7 +332,7 @@ class AppDescriptor(object):
         sp = md.get("supported_platforms")
         if sp is None:
             sp = []
-        return sp
+        return copy.deepcopy(sp)
         
     def get_configuration_schema(self):
         """
@@ -279,7 +344,7 @@ class AppDescriptor(object):
         # always return a dict
         if cfg is None:
             cfg = {}
-        return cfg
+        return copy.deepcopy(cfg)
          
     def get_required_frameworks(self):
         """
@@ -295,7 +360,7 @@ class AppDescriptor(object):
         # always return a list
         if frameworks is None:
             frameworks = []
-        return frameworks
+        return copy.deepcopy(frameworks)
 
     def get_deprecation_status(self):
         """
@@ -44,6 +44,7 @@ BUILT_IN_ACTIONS = [setup_project.SetupProjectAction,
                     validate_config.ValidateConfigAction,
                     cache_apps.CacheAppsAction,
                     misc.ClearCacheAction,
+                    misc.StartupProfileAction,
                     switch.SwitchAppAction,
                     app_info.AppInfoAction,
                     misc.InteractiveShellAction,
@@ -22,12 +22,19 @@ class CreateFoldersAction(Action):
                         Action.CTX, 
                         ("Creates folders on disk for your current context. This command is "
                          "typically used in conjunction with a Shotgun entity, for example "
-                         "'tank Shot P01 folders' in order to create folders on disk for Shot P01."), 
+                         "'tank Shot P01 folders' in order to create folders on disk for Shot P01. "
+                         "Use --skip-unchanged to skip folders which are known to be up to "
+                         "date and --report to print a summary of the "
+                         "time spent and the operations carried out."), 
                         "Production")
     
     def run(self, log, args):
-        if len(args) != 0:
-            raise TankError("This command takes no arguments!")
+        if len([ a for a in args if a not in ["--skip-unchanged", "--report"] ]) > 0:
+            raise TankError("This command takes no arguments other than --skip-unchanged and --report!")
+        skip_unchanged = "--skip-unchanged" in args
+        report = None
+        if "--report" in args:
+            report = folder.FolderCreationReport()
 
         if self.context.project is None:
             log.info("Looks like your context is empty! No folders to create!")
@@ -46,7 +53,7 @@ class CreateFoldersAction(Action):
             entity_id = self.context.task["id"]
         
         log.info("Creating folders, stand by...")
-        f = folder.process_filesystem_structure(self.tk, entity_type, entity_id, False, None)
+        f = folder.process_filesystem_structure(self.tk, entity_type, entity_id, False, None, skip_unchanged, report)
         log.info("")
         log.info("The following items were processed:")
         for x in f:
@@ -54,6 +61,7 @@ class CreateFoldersAction(Action):
         log.info("")
         log.info("In total, %s folders were processed." % len(f))
         log.info("")
+        _log_report(log, report)
 
 
 class PreviewFoldersAction(Action):
@@ -67,12 +75,17 @@ class PreviewFoldersAction(Action):
                         ("Previews folders on disk for your current context. This command is "
                          "typically used in conjunction with a Shotgun entity, for example "
                          "'tank Shot P01 preview_folders' in order to show what folders "
-                         "would be created if you ran the folders command for Shot P01."), 
+                         "would be created if you ran the folders command for Shot P01. "
+                         "Use --report to print a summary of the time spent and the "
+                         "operations carried out."), 
                         "Production")
     
     def run(self, log, args):
-        if len(args) != 0:
-            raise TankError("This command takes no arguments!")
+        if len([ a for a in args if a != "--report" ]) > 0:
+            raise TankError("This command takes no arguments other than --report!")
+        report = None
+        if "--report" in args:
+            report = folder.FolderCreationReport()
 
         if self.context.project is None:
             log.info("Looks like your context is empty! No folders to preview!")
@@ -91,7 +104,7 @@ class PreviewFoldersAction(Action):
             entity_id = self.context.task["id"]
 
         log.info("Previewing folder creation, stand by...")
-        f = folder.process_filesystem_structure(self.tk, entity_type, entity_id, True, None)
+        f = folder.process_filesystem_structure(self.tk, entity_type, entity_id, True, None, report=report)
         log.info("")
         log.info("The following items were processed:")
         for x in f:
@@ -99,5 +112,18 @@ class PreviewFoldersAction(Action):
         log.info("")
         log.info("In total, %s folders were processed." % len(f))
         log.info("Note - this was a preview and no actual folders were created.")            
+        _log_report(log, report)
+
+
+def _log_report(log, report):
+    """
+    Logs a folder creation report, if any.
+    """
+    if report is None:
+        return
+    log.info("")
+    log.info("Folder creation report:")
+    for line in report.get_report():
+        log.info(line)
 
 
@@ -518,45 +518,51 @@ class EntityMigrator(object):
         summaries = self._sg.summarize(entity_type=entity_type, filters = filters, summary_fields=[{'field':'id', 'type':'count'}])
         entity_count = summaries["summaries"]["id"]
         
-        block_count = 0
-        order = [{"field_name":"id", "direction":"asc"}]
+        # stream the entities in blocks ordered by id. The next block is 
+        # read from Shotgun while the current one is being processed
+        def _find_blocks(start_id):
+            block_filters = [["id", "greater_than", start_id]] + filters
+            return self._sg.find_iter(entity_type, 
+                                      filters=block_filters, 
+                                      fields=fields, 
+                                      page_size=block_size, 
+                                      id_cursor=True)
+        
         start_id = -1
+        sg_blocks = _find_blocks(start_id)
+        block_count = 0
         progress = 0.0
         
         results = []
         while True:
-            # report some progress info:
-            block_start = (block_count * block_size) + 1
-            block_end = min((block_count+1) * block_size, entity_count)
-            if block_end < block_start:
-                break
-            msg = "%d-%d of %d '%s' entities" % (block_start, block_end, entity_count, entity_type)
-            progress = (float(block_count*block_size)/entity_count) * 100
-            self.__report_progress(progress, msg)
-            block_count += 1
-            
-            # filter to start at next block:
-            filters = [["id", "greater_than", start_id]]
-            if self._project_filter:
-                filters.extend([self._project_filter])
-                
             # find entities
             try:
-                sg_entities = self._sg.find(entity_type, 
-                                                 filters=filters, 
-                                                 order=order, 
-                                                 limit=block_size, 
-                                                 fields=fields)
+                sg_entities = sg_blocks.next()
+            except StopIteration:
+                break
             except Exception, e:
                 self._migration_errors.append("Failed to retrieve details for %d %s entities from Shotgun! - %s"
                                               % (block_size, entity_type, e))
+                # the failed block counts towards the total so that we don't 
+                # keep retrying forever if Shotgun keeps failing
+                block_count += 1
+                if block_count * block_size >= entity_count:
+                    break
+                # the iterator is finished after an error, so start a new 
+                # one which retries the same block
+                sg_blocks = _find_blocks(start_id)
                 continue
-                
-            if not sg_entities:
-                break
-
+            
             # update start_id to max entity id:
             start_id = max([entity["id"] for entity in sg_entities])
+            
+            # report some progress info:
+            block_start = (block_count * block_size) + 1
+            block_end = min(block_start + len(sg_entities) - 1, entity_count)
+            msg = "%d-%d of %d '%s' entities" % (block_start, block_end, entity_count, entity_type)
+            progress = (float(block_count*block_size)/max(entity_count, 1)) * 100
+            self.__report_progress(progress, msg)
+            block_count += 1
 
             # process:
             res = callback(sg_entities)
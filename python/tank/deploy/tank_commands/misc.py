@@ -9,6 +9,8 @@
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
 from ...errors import TankError
+from ...platform import profiling
+from ...platform import constants
 from .action_base import Action
 
 import code
@@ -35,9 +37,10 @@ class ClearCacheAction(Action):
             raise TankError("This command takes no arguments!")
         
         cache_folder = self.tk.pipeline_configuration.get_cache_location()
-        # cache files are on the form shotgun_mac_project.txt
+        # cache files are on the form shotgun_mac_project.txt, with
+        # a shotgun_mac_project.fingerprint file next to them
         for f in os.listdir(cache_folder):
-            if f.startswith("shotgun") and f.endswith(".txt"):
+            if f.startswith("shotgun") and (f.endswith(".txt") or f.endswith(".fingerprint")):
                 full_path = os.path.join(cache_folder, f)
                 log.debug("Deleting cache file %s..." % full_path)
                 try:
@@ -48,6 +51,60 @@ class ClearCacheAction(Action):
         log.info("The Shotgun menu cache has been cleared.")
         
 
+class StartupProfileAction(Action):
+    """
+    Action that shows the most recent startup profiles for the engines in this configuration
+    """
+    def __init__(self):
+        Action.__init__(self, 
+                        "startup_profile", 
+                        Action.PC_LOCAL, 
+                        ("Shows how long the different parts of the most recent engine startup took. "
+                         "Profiles are recorded when the %s environment variable is set. "
+                         "Optionally pass an engine instance name to only show the profile for "
+                         "that engine." % constants.STARTUP_PROFILE_ENV_VAR), 
+                        "Developer")
+    
+    def run(self, log, args):
+        if len(args) > 1:
+            raise TankError("Syntax: startup_profile [engine_instance_name]")
+        
+        profile_folder = profiling.get_profile_folder(self.tk)
+        if os.path.exists(profile_folder):
+            profile_files = sorted([f for f in os.listdir(profile_folder) if f.endswith(".json")])
+        else:
+            profile_files = []
+        
+        if len(args) == 1:
+            profile_files = [f for f in profile_files if f == "%s.json" % args[0]]
+        
+        if len(profile_files) == 0:
+            log.info("No startup profiles found. Set the %s environment variable and start "
+                     "an engine to record a profile." % constants.STARTUP_PROFILE_ENV_VAR)
+            return
+        
+        for f in profile_files:
+            full_path = os.path.join(profile_folder, f)
+            try:
+                trace = profiling.load_trace(full_path)
+            except Exception, e:
+                log.warning("Could not read startup profile '%s': %s" % (full_path, e))
+                continue
+            
+            metadata = trace.get("otherData", {})
+            log.info("")
+            log.info("Engine %s started %s in environment %s" % (metadata.get("engine"), 
+                                                                 metadata.get("time"), 
+                                                                 metadata.get("environment")))
+            log.info("Context: %s" % metadata.get("context"))
+            log.info("Trace file (chrome://tracing format): %s" % full_path)
+            log.info("")
+            for line in profiling.format_trace(trace):
+                log.info(line)
+        log.info("")
+        
+
+
 class InteractiveShellAction(Action):
     """
     Action that starts an interactive shell
@@ -11,6 +11,7 @@
 from ... import pipelineconfig
 
 from ...util import shotgun
+from ...util import shotgun_cache
 from ...platform import constants
 from ...errors import TankError
 
@@ -216,6 +217,7 @@ class MovePCAction(Action):
         
         log.info("Updating Shotgun Configuration Record...")
         sg.update(constants.PIPELINE_CONFIGURATION_ENTITY, pipeline_config_id, new_paths)
+        shotgun_cache.invalidate_caches(constants.PIPELINE_CONFIGURATION_ENTITY)
         
         # finally clean up the previous location
         log.info("Deleting original configuration files...")
@@ -19,6 +19,7 @@ import uuid
 
 from .action_base import Action
 from ...util import shotgun
+from ...util import shotgun_cache
 from ...platform import constants
 from ...errors import TankError
 from ... import pipelineconfig
@@ -1178,6 +1179,7 @@ def _interactive_setup(log, install_root, check_storage_path_exists, force):
         for x in pcs:
             log.warning("Force mode: Deleting old pipeline configuration %s..." % x["code"])
             sg.delete("PipelineConfiguration", x["id"])
+        shotgun_cache.invalidate_caches(constants.PIPELINE_CONFIGURATION_ENTITY)
             
     # first do disk structure setup, this is most likely to fail.
     current_os_pc_location = locations_dict[sys.platform]    
@@ -1332,6 +1334,7 @@ def _interactive_setup(log, install_root, check_storage_path_exists, force):
             "mac_path": locations_dict["darwin"],
             "code": constants.PRIMARY_PIPELINE_CONFIG_NAME}
     pc_entity = sg.create(constants.PIPELINE_CONFIGURATION_ENTITY, data)
+    shotgun_cache.invalidate_caches(constants.PIPELINE_CONFIGURATION_ENTITY)
     log.debug("Created data: %s" % pc_entity)
     
     # write the record to disk
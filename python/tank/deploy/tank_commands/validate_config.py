@@ -23,7 +23,8 @@ class ValidateConfigAction(Action):
                         "validate", 
                         Action.PC_LOCAL, 
                         ("Validates your current Configuration to check that all "
-                        "environments have been correctly configured."), 
+                        "environments have been correctly configured. This also discards any "
+                        "cached validation results so that settings are fully re-validated."), 
                         "Configuration")
     
     def run(self, log, args):
@@ -34,6 +35,11 @@ class ValidateConfigAction(Action):
         log.info("")
         log.info("Welcome to the Shotgun Pipeline Toolkit Configuration validator!")
         log.info("")
+
+        # discard any cached validation results so that all 
+        # settings are fully validated the next time they are used
+        validation.clear_validation_cache(self.tk)
+        log.debug("Cleared the settings validation cache.")
     
         try:
             envs = self.tk.pipeline_configuration.get_environments()
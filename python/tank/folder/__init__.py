@@ -15,3 +15,5 @@ This module contains functionality relating to folder creation.
 
 from .operations import process_filesystem_structure
 from .configuration import read_ignore_files
+from .execution import build_folder_plan, execute_folder_plan, execute_folder_item
+from .report import FolderCreationReport
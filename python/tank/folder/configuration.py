@@ -14,16 +14,87 @@ Handles the creation of a configuration object structure based on the folder con
 """
 
 import os
+import copy
+import hashlib
 import fnmatch
 
 from .folder_types import Static, ListField, Entity, Project, UserWorkspace, ShotgunStep, ShotgunTask
 
 from ..errors import TankError
 from ..platform import constants
+from ..util import cache_file
 
 from tank_vendor import yaml
 
 
+# name of the file in the pipeline configuration cache where the scanned schema is stored
+SCHEMA_CACHE_FILE = "folder_schema.json"
+
+# scanned schemas keyed by schema location. Each entry is a (signature, schema) tuple.
+_SCHEMA_CACHE = {}
+
+# schema signatures keyed by schema location. Each entry is a (quick signature, signature) tuple.
+_SCHEMA_SIGNATURES = {}
+
+def clear_schema_cache():
+    """
+    Clears the in-memory cache of scanned folder schemas.
+    """
+    _SCHEMA_CACHE.clear()
+    _SCHEMA_SIGNATURES.clear()
+
+def _get_schema_signature(schema_config_path):
+    """
+    Returns a signature of the schema on disk which changes whenever files
+    or folders are added, removed or modified.
+    
+    Computing the signature stats every file in the schema, so a cheaper signature
+    covering the folders and the files which make up the scanned schema (the yml
+    files and ignore_files) is checked first. The scanned schema does not depend on
+    the contents of any other files, so a file which is only copied into the project
+    and is modified in place is not noticed until something else in the schema changes.
+    """
+    quick_signature = _get_quick_schema_signature(schema_config_path)
+    cached = _SCHEMA_SIGNATURES.get(schema_config_path)
+    if cached and cached[0] == quick_signature:
+        return cached[1]
+    
+    signature = _get_full_schema_signature(schema_config_path)
+    _SCHEMA_SIGNATURES[schema_config_path] = (quick_signature, signature)
+    return signature
+
+def _get_quick_schema_signature(schema_config_path):
+    """
+    Computes a signature from the modification times of the folders in the schema,
+    which change whenever anything is added, removed or renamed, and from the 
+    modification times and sizes of the files which are read when scanning the schema.
+    """
+    entries = []
+    for (root, dirs, files) in os.walk(schema_config_path):
+        # make the walk order deterministic
+        dirs.sort()
+        entries.append((root, os.path.getmtime(root)))
+        for file_name in sorted(files):
+            if file_name.endswith(".yml") or file_name == "ignore_files":
+                stat = os.stat(os.path.join(root, file_name))
+                entries.append((file_name, stat.st_mtime, stat.st_size))
+    return hashlib.md5(repr(entries)).hexdigest()
+
+def _get_full_schema_signature(schema_config_path):
+    """
+    Computes a signature from the modification times, sizes and inodes of all
+    files and folders in the schema.
+    """
+    entries = []
+    for (root, dirs, files) in os.walk(schema_config_path):
+        # make the walk order deterministic
+        dirs.sort()
+        entries.append((root, os.path.getmtime(root)))
+        for file_name in sorted(files):
+            stat = os.stat(os.path.join(root, file_name))
+            entries.append((file_name, stat.st_mtime, stat.st_size, stat.st_ino))
+    return hashlib.md5(repr(entries)).hexdigest()
+
 def read_ignore_files(schema_config_path):
     """
     Reads ignore_files from root of schema if it exists.
@@ -62,11 +133,14 @@ class FolderConfiguration(object):
         # maintain a list of all Step nodes for special introspection
         self._step_fields = []
         
-        # read skip files config
-        self._ignore_files = read_ignore_files(schema_config_path)
+        # patterns for files to skip, read when scanning the schema
+        self._ignore_files = []
+        
+        # signature of the schema files on disk
+        self._signature = None
         
         # load schema
-        self._load_schema(schema_config_path)
+        self._load_schema(self._get_schema(schema_config_path))
 
 
     ##########################################################################################
@@ -83,6 +157,13 @@ class FolderConfiguration(object):
         Returns all step nodes in the configuration
         """
         return self._step_fields
+    
+    def get_signature(self):
+        """
+        Returns a signature of the schema files on disk which changes 
+        whenever the schema configuration is modified.
+        """
+        return self._signature
 
     ####################################################################################
     # utility methods
@@ -154,24 +235,107 @@ class FolderConfiguration(object):
                 raise TankError("Cannot load config file '%s'. Error: %s" % (yml_file, error))
         return metadata
 
+    ##########################################################################################
+    # schema scanning and caching
+    
+    def _get_schema(self, schema_config_path):
+        """
+        Returns the scanned schema, see _scan_schema(). Scanned schemas are cached in 
+        memory and in the pipeline configuration cache and only scanned again if any 
+        files or folders in the schema have changed.
+        """
+        signature = _get_schema_signature(schema_config_path)
+        self._signature = signature
+        
+        cached = _SCHEMA_CACHE.get(schema_config_path)
+        if cached and cached[0] == signature:
+            return cached[1]
+        
+        cache_path = os.path.join(self._tk.pipeline_configuration.get_cache_location(), SCHEMA_CACHE_FILE)
+        schema = self._read_schema_cache_file(cache_path, schema_config_path, signature)
+        if schema is None:
+            schema = self._scan_schema(schema_config_path)
+            self._write_schema_cache_file(cache_path, schema_config_path, signature, schema)
+        
+        _SCHEMA_CACHE[schema_config_path] = (signature, schema)
+        return schema
+    
+    def _read_schema_cache_file(self, cache_path, schema_config_path, signature):
+        """
+        Returns the scanned schema stored on disk or None if it is missing, out of date
+        or not a valid scanned schema. The cache location is writable by everyone, so 
+        the data is checked before it is used.
+        """
+        data = cache_file.read_cache_file(cache_path)
+        if not isinstance(data, dict):
+            return None
+        if data.get("path") != schema_config_path or data.get("signature") != signature:
+            return None
+        
+        schema = data.get("schema")
+        if not isinstance(schema, list) or not all(self._is_valid_scanned_folder_r(x) for x in schema):
+            return None
+        return schema
+    
+    def _is_valid_scanned_folder_r(self, folder_data):
+        """
+        Checks that a folder read from the cache file has the structure produced by _scan_folder_r().
+        """
+        return (isinstance(folder_data, dict)
+                and sorted(folder_data.keys()) == ["children", "files", "metadata", "path"]
+                and isinstance(folder_data["path"], basestring)
+                and (folder_data["metadata"] is None or isinstance(folder_data["metadata"], dict))
+                and isinstance(folder_data["files"], list)
+                and all(isinstance(x, basestring) for x in folder_data["files"])
+                and isinstance(folder_data["children"], list)
+                and all(self._is_valid_scanned_folder_r(x) for x in folder_data["children"]))
+    
+    def _write_schema_cache_file(self, cache_path, schema_config_path, signature, schema):
+        """
+        Stores a scanned schema on disk. The cache is an optimization, so failures are ignored.
+        """
+        data = {"path": schema_config_path, "signature": signature, "schema": schema}
+        cache_file.write_cache_file(cache_path, data)
+    
+    def _scan_schema(self, schema_config_path):
+        """
+        Reads the schema from disk. Returns a list with an entry for each project folder.
+        Each entry is a dictionary with the path and metadata of the folder, the files
+        in it and entries for all its sub folders.
+        """
+        # read skip files config
+        self._ignore_files = read_ignore_files(schema_config_path)
+        
+        return [ self._scan_folder_r(x) for x in self._get_sub_directories(schema_config_path) ]
+        
+    def _scan_folder_r(self, full_path):
+        """
+        Reads a folder in the schema and all its sub folders.
+        """
+        return {"path": full_path,
+                "metadata": self._read_metadata(full_path),
+                "files": self._get_files_in_folder(full_path),
+                "children": [ self._scan_folder_r(x) for x in self._get_sub_directories(full_path) ]}
+    
     ##########################################################################################
     # internal stuff
 
 
-    def _load_schema(self, schema_config_path):
+    def _load_schema(self, schema):
         """
-        Scan the config and build objects structure
+        Build objects structure from the scanned schema
         """
 
-        project_folders = self._get_sub_directories(schema_config_path)
-
         # make some space in our obj/entity type mapping
         self._entity_nodes_by_type["Project"] = []
 
-        for project_folder in project_folders:
+        for project_data in schema:
+            
+            project_folder = project_data["path"]
 
             # read metadata to determine root path
-            metadata = self._read_metadata(project_folder)
+            # copy it since the scanned schema is cached
+            metadata = copy.deepcopy(project_data["metadata"])
 
             if metadata is None:
                 if os.path.basename(project_folder) == "project":
@@ -190,19 +354,20 @@ class FolderConfiguration(object):
             self._entity_nodes_by_type["Project"].append(project_obj)
 
             # recursively process the rest
-            self._process_config_r(project_obj, project_folder)
+            self._process_config_r(project_obj, project_data)
 
 
-    def _process_config_r(self, parent_node, parent_path):
+    def _process_config_r(self, parent_node, parent_data):
         """
-        Recursively scan the file system and construct an object
+        Recursively process the scanned schema and construct an object
         hierarchy.
 
         Factory method for Folder objects.
         """
-        for full_path in self._get_sub_directories(parent_path):
+        for child_data in parent_data["children"]:
+            full_path = child_data["path"]
             # check for metadata (non-static folder)
-            metadata = self._read_metadata(full_path)
+            metadata = copy.deepcopy(child_data["metadata"])
             if metadata:
                 node_type = metadata.get("type", "undefined")
 
@@ -241,10 +406,10 @@ class FolderConfiguration(object):
                 cur_node = Static.create(self._tk, parent_node, full_path, {"type": "static"})
 
             # and process children
-            self._process_config_r(cur_node, full_path)
+            self._process_config_r(cur_node, child_data)
 
         # now process all files and add them to the parent_node token
-        for f in self._get_files_in_folder(parent_path):
+        for f in parent_data["files"]:
             parent_node.add_file(f)
 
 
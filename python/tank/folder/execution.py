@@ -0,0 +1,183 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Planning and execution of the file system operations generated by folder creation.
+
+The folder creation classes generate a list of items describing folders to create
+and files to copy or write. Before these are handed to the process_folder_creation
+hook, they are turned into a plan where any duplicate paths have been removed and
+parents always come before their children.
+
+The plan can be executed concurrently using execute_folder_plan(), which processes
+all items at the same depth in the file system in parallel. Since an item's parent
+is always at a lower depth, independent subtrees are created concurrently while
+parents are still guaranteed to exist before their children are processed. The 
+created paths are returned in plan order, just as if the items had been processed
+one by one.
+
+"""
+
+import os
+import shutil
+
+from ..util.threads import map_in_threads
+
+# number of concurrent file system operations used by default
+DEFAULT_MAX_THREADS = 8
+
+
+def get_item_path(item):
+    """
+    Returns the path on disk that a folder creation item refers to.
+
+    :param item: item dictionary, see the process_folder_creation hook
+    """
+    if item.get("action") == "copy":
+        return item.get("target_path")
+    else:
+        return item.get("path")
+
+def _get_depth(path):
+    """
+    Returns the number of components in a path.
+    """
+    return len(os.path.normpath(path).split(os.path.sep))
+
+def build_folder_plan(items):
+    """
+    Turns a list of folder creation items into a plan which contains each path
+    only once and where parents always come before their children. Apart from 
+    this, the original order of the items is preserved: an item which appears 
+    before its parent is moved to just after it.
+
+    :param items: list of item dictionaries, see the process_folder_creation hook
+    :returns: list of item dictionaries
+    """
+    items_by_path = {}
+    for item in items:
+        items_by_path.setdefault(get_item_path(item), item)
+
+    plan = []
+    planned_paths = set()
+    for item in items:
+        # collect the item and any of its parents which haven't been planned yet
+        path = get_item_path(item)
+        pending = []
+        while True:
+            if path in items_by_path and path not in planned_paths:
+                pending.append(items_by_path[path])
+                planned_paths.add(path)
+            parent_path = os.path.dirname(path)
+            if parent_path == path:
+                break
+            path = parent_path
+        pending.reverse()
+        plan.extend(pending)
+
+    return plan
+
+def _make_folder(path):
+    """
+    Creates a folder and its parents, tolerating other threads
+    creating the same folders at the same time.
+    """
+    try:
+        os.makedirs(path, 0777)
+    except OSError:
+        if os.path.isdir(path):
+            return
+        # a parent folder may have been created concurrently,
+        # causing makedirs to bail out. Try again.
+        os.makedirs(path, 0777)
+
+def execute_folder_item(item, preview_mode):
+    """
+    Carries out the file system operation for a single folder creation item,
+    using open permissions. Items for paths which already exist are skipped.
+
+    :param item: item dictionary, see the process_folder_creation hook
+    :param preview_mode: if True, nothing is written to disk
+    :returns: the path that was created, or would be created in preview mode,
+              or None if the path already exists.
+    """
+    action = item.get("action")
+
+    if action == "entity_folder" or action == "folder":
+        # folder creation
+        path = item.get("path")
+        if not os.path.exists(path):
+            if not preview_mode:
+                # create the folder using open permissions
+                _make_folder(path)
+            return path
+
+    elif action == "copy":
+        # a file copy
+        source_path = item.get("source_path")
+        target_path = item.get("target_path")
+        if not os.path.exists(target_path):
+            if not preview_mode:
+                # do a standard file copy
+                shutil.copy(source_path, target_path)
+                # set permissions to open
+                os.chmod(target_path, 0666)
+            return target_path
+
+    elif action == "create_file":
+        # create a new file based on content
+        path = item.get("path")
+        parent_folder = os.path.dirname(path)
+        content = item.get("content")
+        if not os.path.exists(parent_folder) and not preview_mode:
+            _make_folder(parent_folder)
+        if not os.path.exists(path):
+            if not preview_mode:
+                # create the file
+                fp = open(path, "wb")
+                fp.write(content)
+                fp.close()
+                # and set permissions to open
+                os.chmod(path, 0666)
+            return path
+
+    return None
+
+def execute_folder_plan(items, preview_mode, max_threads=DEFAULT_MAX_THREADS):
+    """
+    Executes a folder creation plan using open permissions, processing items
+    at the same depth concurrently.
+
+    :param items: list of item dictionaries as returned by build_folder_plan()
+    :param preview_mode: if True, nothing is written to disk
+    :param max_threads: maximum number of concurrent file system operations
+    :returns: list of paths that were created, in plan order
+    """
+    # group the item indices by depth
+    groups = {}
+    for (idx, item) in enumerate(items):
+        groups.setdefault(_get_depth(get_item_path(item)), []).append(idx)
+
+    # set the umask so that we get true permissions
+    old_umask = os.umask(0)
+    results = [None] * len(items)
+    try:
+        for depth in sorted(groups):
+            group = groups[depth]
+            group_results = map_in_threads(lambda idx: execute_folder_item(items[idx], preview_mode),
+                                           group,
+                                           max_threads)
+            for (idx, result) in zip(group, group_results):
+                results[idx] = result
+    finally:
+        # reset umask
+        os.umask(old_umask)
+
+    return [ x for x in results if x is not None ]
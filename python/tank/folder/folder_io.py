@@ -23,34 +23,94 @@ from tank_vendor import yaml
 from ..path_cache import PathCache
 from ..platform import constants
 from ..errors import TankError
+from .execution import build_folder_plan
+from .report import ReportingProxy
 
+# number of items executed together by default
+DEFAULT_CHUNK_SIZE = 10000
     
 
 
 class FolderIOReceiver(object):
     """
     Class that encapsulates all the IO operations from the various folder classes.
+    
+    Items are executed in chunks as they are generated by the folder classes, meaning
+    that memory use does not grow with the size of the folder creation run. Each chunk
+    is checked, handed to the process_folder_creation hook and registered in the path 
+    cache before the next one is started.
     """
     
-    def __init__(self, tk, preview):
+    def __init__(self, tk, preview, chunk_size=DEFAULT_CHUNK_SIZE, report=None):
         """
         Constructor
+        
+        :param tk: Sgtk API instance
+        :param preview: if True, nothing is written to disk or to the path cache
+        :param chunk_size: maximum number of items to hold before they are executed
+        :param report: optional FolderCreationReport to record statistics in
         """
         self._tk = tk
         self._preview_mode = preview
+        self._chunk_size = chunk_size
+        self._report = report
         self._items = list()
         self._secondary_cache_entries = list()
         self._path_cache = PathCache(tk.pipeline_configuration)
+        if report:
+            self._path_cache = ReportingProxy(self._path_cache, report, "path_cache")
+        self._session_cache = dict()
+        self._ledger_hashes = dict()
+        self._folders = list()
         
     def execute_folder_creation(self):
         """
         Runs the actual execution. Returns a list of paths
         which were calculated to be created.
         """
+        # execute whatever is left over
+        self._execute_chunk()
+        
+        if not self._preview_mode:
+            # and finally record that the folders were successfully created
+            self._start_phase("path_cache_commit")
+            try:
+                self._path_cache.set_ledger_hashes(self._ledger_hashes)
+            finally:
+                self._stop_phase()
         
+        return self._folders
+    
+    def _start_phase(self, phase):
+        """
+        Starts timing a phase in the report, if any.
+        """
+        if self._report:
+            self._report.start(phase)
+    
+    def _stop_phase(self):
+        """
+        Stops timing the current phase in the report, if any.
+        """
+        if self._report:
+            self._report.stop()
+    
+    def _add_item(self, item):
+        """
+        Adds an item to the current chunk, executing the chunk if it is full.
+        """
+        self._items.append(item)
+        if self._chunk_size and len(self._items) >= self._chunk_size:
+            self._execute_chunk()
+    
+    def _execute_chunk(self):
+        """
+        Executes the items which have been collected so far.
+        """
         # first we do some pre processing to properly cover some edge cases   
         if not self._preview_mode:
-                 
+            
+            entity_folders = []
             for i in self._items:
 
                 if i.get("action") == "entity_folder":
@@ -59,52 +119,121 @@ class FolderIOReceiver(object):
                     entity_type = i.get("entity").get("type")
                     entity_id = i.get("entity").get("id")
                     entity_name = i.get("entity").get("name")
-                    
-                    folder_preflight_checks(self._tk, 
-                                            self._path_cache, 
-                                            path, 
-                                            entity_type, 
-                                            entity_id, 
-                                            entity_name)
+                    entity_folders.append( (path, entity_type, entity_id, entity_name) )
+            
+            # the checks only cover the current chunk, so by the time they fail
+            # the folders for any previous chunks may already have been created
+            self._start_phase("preflight_checks")
+            try:
+                bulk_folder_preflight_checks(self._tk, 
+                                             self._path_cache, 
+                                             entity_folders, 
+                                             folders_created=bool(self._folders))
+            finally:
+                self._stop_phase()
+        
+        plan = build_folder_plan(self._items)
+        for i in plan:
+            self.count("filesystem", i.get("action"))
                                 
-        # now request the IO operations to take place
-        created_folders = self._tk.execute_hook(constants.PROCESS_FOLDER_CREATION_HOOK_NAME, 
-                                                items=self._items, 
-                                                preview_mode=self._preview_mode)
+        # now request the IO operations to take place. The hook is passed a plan 
+        # without duplicates and where parents always come before their children.
+        # Parents which belong to a previous chunk have already been processed.
+        self._start_phase("io")
+        try:
+            created_folders = self._tk.execute_hook(constants.PROCESS_FOLDER_CREATION_HOOK_NAME, 
+                                                    items=plan, 
+                                                    preview_mode=self._preview_mode)
+        finally:
+            self._stop_phase()
+        
+        if isinstance(created_folders, list):
+            self.count("filesystem", "created", len(created_folders))
         
         # now handle the path cache
         if not self._preview_mode:    
+            mappings = []
             for i in self._items:
                 if i.get("action") == "entity_folder":
                     path = i.get("path")
                     entity_type = i.get("entity").get("type")
                     entity_id = i.get("entity").get("id")
                     entity_name = i.get("entity").get("name")
-                    self._path_cache.add_mapping(entity_type, entity_id, entity_name, path)
+                    mappings.append( (entity_type, entity_id, entity_name, path, True) )
                     
             for i in self._secondary_cache_entries:
                 path = i.get("path")
                 entity_type = i.get("entity").get("type")
                 entity_id = i.get("entity").get("id")
                 entity_name = i.get("entity").get("name")
-                self._path_cache.add_mapping(entity_type, entity_id, entity_name, path, False)
-
+                mappings.append( (entity_type, entity_id, entity_name, path, False) )
+            
+            # the whole chunk is committed in one go
+            self._start_phase("path_cache_commit")
+            try:
+                self._path_cache.add_mappings(mappings)
+            finally:
+                self._stop_phase()
+            self.count("path_cache", "mappings written", len(mappings))
 
         # note that for backwards compatibility, we are returning all folders, not 
         # just the ones that were created
-        folders = list()
         for i in self._items:
             action = i.get("action")
             if action in ["entity_folder", "create_file", "folder"]:
-                folders.append( i["path"] )
+                self._folders.append( i["path"] )
             elif action == "copy":
-                folders.append( i["target_path"] )        
-
-        return folders
+                self._folders.append( i["target_path"] )        
+        
+        self._items = list()
+        self._secondary_cache_entries = list()
             
         
+    ####################################################################################
+    # folder creation ledger
+    
+    def get_ledger_hashes(self, keys):
+        """
+        Returns the hashes recorded for previous folder creation runs,
+        see PathCache.get_ledger_hashes().
+        """
+        return self._path_cache.get_ledger_hashes(keys)
+    
+    def get_paths_for_entities(self, entities):
+        """
+        Returns the primary paths registered for a list of (entity_type, entity_id) 
+        tuples, see PathCache.get_paths_for_entities().
+        """
+        return self._path_cache.get_paths_for_entities(entities)
+    
+    def add_ledger_hash(self, key, ledger_hash):
+        """
+        Registers a ledger hash to be recorded once the folders have been 
+        successfully created. Nothing is recorded in preview mode.
+        
+        :param key: (entity_type, entity_id, folder, engine) tuple
+        :param ledger_hash: hash of the data the folders are created from
+        """
+        self._ledger_hashes[key] = ledger_hash
+    
     ####################################################################################
     # methods called by the folder classes
+    
+    def count(self, category, name, num=1):
+        """
+        Increments a counter in the folder creation report, if any.
+        See FolderCreationReport.count() for details.
+        """
+        if self._report:
+            self._report.count(category, name, num)
+    
+    def get_session_cache(self):
+        """
+        Returns a dictionary which the folder classes can use to cache 
+        data, typically Shotgun query results, for the duration of 
+        the folder creation session.
+        """
+        return self._session_cache
             
     def register_secondary_entity(self, path, entity):
         """
@@ -121,28 +250,107 @@ class FolderIOReceiver(object):
         Called by the folder creation classes when a normal simple folder
         is to be created.
         """
-        self._items.append({"path": path, "metadata": metadata, "action": "folder"})
+        self._add_item({"path": path, "metadata": metadata, "action": "folder"})
     
     def make_entity_folder(self, path, entity, metadata):
         """
         Creates an entity folder, including any cache entries
         the entity parameter must be a dict with id, type and name.
         """
-        self._items.append({"path": path, 
-                            "metadata": metadata, 
-                            "entity": entity, 
-                            "action": "entity_folder"})
+        self._add_item({"path": path, 
+                        "metadata": metadata, 
+                        "entity": entity, 
+                        "action": "entity_folder"})
     
     def copy_file(self, src_path, target_path, metadata):
         """
         Called by the folder creation classes when a file is to be copied.
         """
-        self._items.append({"source_path": src_path, 
-                            "target_path": target_path, 
-                            "metadata": metadata, 
-                            "action": "copy"})              
+        self._add_item({"source_path": src_path, 
+                        "target_path": target_path, 
+                        "metadata": metadata, 
+                        "action": "copy"})              
+
 
 
+def bulk_folder_preflight_checks(tk, path_cache, entity_folders, folders_created=False):
+    """
+    Runs the same checks as folder_preflight_checks() for a list of entity folders,
+    in order, but retrieves the path cache and Shotgun data for all of them upfront
+    using a few queries rather than several queries per folder.
+    
+    :param entity_folders: list of (path, entity_type, entity_id, entity_name) tuples
+    :param folders_created: True if folders have already been created earlier in the 
+                            same folder creation run, used when reporting errors
+    """
+    entities_in_db = path_cache.get_entities([ x[0] for x in entity_folders ])
+    paths_in_db = path_cache.get_paths_for_entities([ (x[1], x[2]) for x in entity_folders ], 
+                                                    primary_only=False)
+    
+    # find out which of the entities that are conflicting with the 
+    # paths we are about to create still exist in shotgun
+    conflicting_ids = {}
+    for (path, entity_type, entity_id, entity_name) in entity_folders:
+        entity_in_db = entities_in_db.get(path)
+        if entity_in_db and (entity_in_db["id"] != entity_id or entity_in_db["type"] != entity_type):
+            conflicting_ids.setdefault(entity_in_db["type"], set()).add(entity_in_db["id"])
+    
+    existing_entities = set()
+    for (entity_type, ids) in conflicting_ids.items():
+        id_filter = ["id", "in"]
+        id_filter.extend(sorted(ids)) # weird filter format here
+        for sg_data in tk.shotgun.find(entity_type, [id_filter]):
+            existing_entities.add( (entity_type, sg_data["id"]) )
+    
+    def _delete_path_tree(deleted_path):
+        # delete the records and drop them from the prefetched data as well
+        path_cache.delete_path_tree(deleted_path)
+        is_deleted = path_cache.get_path_tree_matcher(deleted_path)
+        for p in entities_in_db.keys():
+            if is_deleted(p):
+                del entities_in_db[p]
+        for (key, paths) in paths_in_db.items():
+            paths_in_db[key] = [ p for p in paths if not is_deleted(p) ]
+    
+    # now apply the rules, see folder_preflight_checks() for details
+    for (path, entity_type, entity_id, entity_name) in entity_folders:
+        
+        entity_in_db = entities_in_db.get(path)
+        if entity_in_db is not None:
+            if entity_in_db["id"] != entity_id or entity_in_db["type"] != entity_type:
+                if (entity_in_db["type"], entity_in_db["id"]) not in existing_entities:
+                    # retired - delete the path
+                    _delete_path_tree(path)
+        
+        for p in paths_in_db.get( (entity_type, entity_id), [] ):
+            if p not in paths_in_db[(entity_type, entity_id)]:
+                # removed while processing an earlier path
+                continue
+            if p != path and os.path.dirname(p) == os.path.dirname(path):
+                if not os.path.exists(p):
+                    # deleted from disk - delete the record
+                    _delete_path_tree(p)
+                else:
+                    _raise_renamed_path_error(path, p, entity_type, entity_name, folders_created)
+
+def _raise_renamed_path_error(path, p, entity_type, entity_name, folders_created=False):
+    """
+    Raises the error reported when an entity is already associated with a 
+    folder next to the path that is being created.
+    """
+    msg = "Folder creation aborted! "
+    if folders_created:
+        msg += "Folders for items processed earlier in this run have already been created. "
+    else:
+        msg += "No folders have been created. "
+    msg += "The path '%s' cannot be created because another " % path
+    msg += "path '%s' is already associated with %s %s. " % (p, entity_type, entity_name)
+    msg += "This typically happens if an item in Shotgun is renamed or "
+    msg += "if the path naming in the folder creation configuration "
+    msg += "is changed. To resolve this problem, either revert the name "
+    msg += "changes in Shotgun or move the folder '%s' to '%s' " % (p, path)
+    msg += "and run the folder creation again."
+    raise TankError(msg)
 
 def folder_preflight_checks(tk, path_cache, path, entity_type, entity_id, entity_name):
     """
@@ -187,12 +395,4 @@ def folder_preflight_checks(tk, path_cache, path, entity_type, entity_id, entity
             else:
                 # there is still a folder on disk. Abort folder creation
                 # with a descriptive error message
-                msg = "Folder creation aborted! No folders have been created. "
-                msg += "The path '%s' cannot be created because another " % path
-                msg += "path '%s' is already associated with %s %s. " % (p, entity_type, entity_name)
-                msg += "This typically happens if an item in Shotgun is renamed or "
-                msg += "if the path naming in the folder creation configuration "
-                msg += "is changed. To resolve this problem, either revert the name "
-                msg += "changes in Shotgun or move the folder '%s' to '%s' " % (p, path)
-                msg += "and run the folder creation again."
-                raise TankError(msg)
+                _raise_renamed_path_error(path, p, entity_type, entity_name)
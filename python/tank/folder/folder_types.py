@@ -14,6 +14,7 @@ Folder Classes representing various types of dynamic behaviour
 import os
 import copy
 
+from .layered_data import ShotgunDataLayer
 from ..util import shotgun_entity
 from ..util import login
 from ..errors import TankError
@@ -77,6 +78,19 @@ class Folder(object):
             return shotgun_data
         else:
             return self._parent.extract_shotgun_data_upwards(sg, shotgun_data)
+    
+    def extract_shotgun_data_upwards_batch(self, sg, shotgun_data_list):
+        """
+        Batch version of extract_shotgun_data_upwards(), processing a list
+        of shotgun data dictionaries and returning a list of results.
+        
+        This is subclassed by deriving classes which process Shotgun data.
+        For more information, see the Entity implementation.
+        """
+        if self._parent is None:
+            return shotgun_data_list
+        else:
+            return self._parent.extract_shotgun_data_upwards_batch(sg, shotgun_data_list)
             
     def get_parents(self):
         """
@@ -89,6 +103,25 @@ class Folder(object):
         else:
             return [self._parent] + self._parent.get_parents()
             
+    def get_ledger_data(self, recursive):
+        """
+        Returns data, other than the Shotgun data passed to create_folders(), that 
+        affects which folders are created. This is included in the folder creation
+        ledger, so that folders are created again whenever it changes.
+        
+        :param recursive: include the data for all children
+        :returns: list of (path, data) tuples, where the path is the configuration
+                  path of the node that the data belongs to
+        """
+        ledger_data = []
+        data = self._get_ledger_data()
+        if data is not None:
+            ledger_data.append( (self._full_path, data) )
+        if recursive:
+            for cp in self._children:
+                ledger_data.extend(cp.get_ledger_data(recursive))
+        return ledger_data
+            
     def add_file(self, path):
         """
         Adds a file name that should be added to this folder as part of processing.
@@ -195,6 +228,13 @@ class Folder(object):
     ###############################################################################################
     # private/protected methods
 
+    def _get_ledger_data(self):
+        """
+        Returns data for get_ledger_data() for this node only, or None.
+        Implemented by subclasses which depend on anything other than Shotgun data.
+        """
+        return None
+
     def _create_folders_impl(self, io_receiver, parent_path, sg_data):
         """
         Folder creation implementation. Implemented by all subclasses.
@@ -587,19 +627,21 @@ class ListField(Folder):
             values = resp[field_name]["properties"]["valid_values"]["value"]
                 
             if self._skip_unused:
-                # cull values based on their usage - EXPENSIVE WITH ONE SG QUERY PER VALUE
-                values = self.__filter_unused_list_values(entity_type, 
+                # cull values based on their usage
+                values = self.__filter_unused_list_values(io_receiver,
+                                                          entity_type, 
                                                           field_name, 
                                                           values, 
                                                           sg_data.get("Project"))
         
+        # render field expressions for all values in one go
+        folder_names = self._field_expr_obj.generate_names([ {self._field_name: x} for x in values ])
+        io_receiver.count("folder_names", self._field_name, len(values))
+        
         # process each value independently
         products = []
                         
-        for sg_value in values:
-            
-            # render field expression 
-            folder_name = self._field_expr_obj.generate_name({self._field_name: sg_value})
+        for (sg_value, folder_name) in zip(values, folder_names):
             
             # construct folder
             my_path = os.path.join(parent_path, folder_name)
@@ -610,18 +652,20 @@ class ListField(Folder):
             
             # create a new tokens dict including our own data. This will be used
             # by the main folder recursion when processing the child folder objects.
-            new_sg_data = copy.deepcopy(sg_data)
-            new_sg_data[token_name] = sg_value
+            # The new data is layered on top of the existing data rather than copying it.
+            new_sg_data = ShotgunDataLayer(sg_data, {token_name: sg_value})
             
             products.append( (my_path, new_sg_data) )
             
         return products
         
-    def __filter_unused_list_values(self, entity_type, field_name, values, project):
+    def __filter_unused_list_values(self, io_receiver, entity_type, field_name, values, project):
         """
         Remove values which are not used by entities in this project.
         
-        - WARNING! SLOW! Will do a shotgun query for every value in values.
+        The used values are retrieved using a single grouped shotgun query, 
+        which is cached for the duration of the folder creation session.
+        
         - WARNING! This logic will check if a value is 'unused' by looking at all items
                    for that entity type. This may be perfectly fine (in the case of asset type
                    and asset for example, however it will not be relevant if other filter criteria
@@ -629,22 +673,29 @@ class ListField(Folder):
                    tasks of type Foo then we would ideally want to query the unused-ness based on 
                    this subset, not based on all tasks in the project.
         """
-        used_values = []
-
-        for value in values:
-            
-            # eg. sg_asset_type is prop
-            filters = [ [field_name, "is", value] ] 
+        cache = io_receiver.get_session_cache()
+        cache_key = ("list_field_usage", entity_type, field_name, project["id"] if project else None)
+        
+        if cache_key not in cache:
+            filters = []
             if project:
                 filters.append( ["project", "is", project] )
-    
+            
+            # group the entities by the field value - only values 
+            # which are in use will be returned as groups.
             summary = self._tk.shotgun.summarize(entity_type, 
                                                  filters, 
-                                                 [{"field": field_name, "type": "count"}])
-            if summary.get("summaries", {}).get(field_name):
-                used_values.append(value)
-
-        return used_values
+                                                 [{"field": "id", "type": "count"}],
+                                                 grouping=[{"field": field_name, 
+                                                            "type": "exact", 
+                                                            "direction": "asc"}])
+            used = set()
+            for group in summary.get("groups", []):
+                if group.get("summaries", {}).get("id"):
+                    used.add(group.get("group_value"))
+            cache[cache_key] = used
+
+        return [ x for x in values if x in cache[cache_key] ]
 
 ################################################################################################
 
@@ -941,10 +992,12 @@ class Entity(Folder):
         """
         items_created = []
         
-        for entity in self.__get_entities(sg_data):
-
-            # generate the field name            
-            folder_name = self._entity_expression.generate_name(entity)
+        # generate the folder names for all entities in one go
+        entities = self.__get_entities(sg_data)
+        folder_names = self._entity_expression.generate_names(entities)
+        io_receiver.count("folder_names", self._entity_type, len(entities))
+        
+        for (entity, folder_name) in zip(entities, folder_names):
             
             # now for the case where the project name is encoded with slashes,
             # we need to translate those into a native representation
@@ -968,9 +1021,9 @@ class Entity(Folder):
             self._copy_files_to_folder(io_receiver, my_path)
 
             # create a new entity dict including our own data and pass it down to children
-            my_sg_data = copy.deepcopy(sg_data)
             my_sg_data_key = FilterExpressionToken.sg_data_key_for_folder_obj(self)
-            my_sg_data[my_sg_data_key] = { "type": self._entity_type, "id": entity["id"] }
+            my_sg_data = ShotgunDataLayer(sg_data, {my_sg_data_key: { "type": self._entity_type, 
+                                                                      "id": entity["id"] }})
             
             items_created.append( (my_path, my_sg_data) )
             
@@ -1055,7 +1108,7 @@ class Entity(Folder):
         asset / sub asset relationship.
         """
         
-        tokens = copy.deepcopy(shotgun_data)
+        tokens = ShotgunDataLayer(shotgun_data)
         
         # If we don't have an entry in tokens for the current entity type, then we can't
         # extract any tokens. Used by #17726. Typically, we start with a "seed", and then go
@@ -1069,52 +1122,7 @@ class Entity(Folder):
         my_sg_data_key = FilterExpressionToken.sg_data_key_for_folder_obj(self)
         if my_sg_data_key in tokens:
 
-            
-            link_map = {}
-            fields_to_retrieve = []
-            additional_filters = []
-            
-            # TODO: Support nested conditions
-            for condition in self._filters["conditions"]:
-                vals = condition["values"]
-                
-                # note the $FROM$ condition below - this is a bit of a hack to make sure we exclude
-                # the special $FROM$ step based culling filter that is commonly used. Because steps are 
-                # sort of free floating and not associated with an entity, removing them from the 
-                # resolve should be fine in most cases.
-                
-                # so - if at the shot level, we have defined the following filter:
-                # filters: [ { "path": "sg_sequence", "relation": "is", "values": [ "$sequence" ] } ]
-                # the $sequence will be represented by a Token object and we need to get a value for 
-                # this token. We fetch the id for this token and then, as we recurse upwards, and process
-                # the parent folder level (the sequence), this id will be the "seed" when we populate that
-                # level. 
-                
-                if vals[0] and isinstance(vals[0], FilterExpressionToken) and not condition["path"].startswith('$FROM$'):
-                    expr_token = vals[0]
-                    # we should get this field (eg. 'sg_sequence')
-                    fields_to_retrieve.append(condition["path"])
-                    # add to our map for later processing map['sg_sequence'] = 'Sequence'
-                    # note that for List fields, the key is EntityType.field
-                    link_map[ condition["path"] ] = expr_token 
-                
-                elif not condition["path"].startswith('$FROM$'):
-                    # this is a normal filter (we exclude the $FROM$ stuff since it is weird
-                    # and specific to steps.) So for example 'name must begin with X' - we want 
-                    # to include these in the query where we are looking for the object, to
-                    # ensure that assets with names starting with X are not created for an 
-                    # asset folder node which explicitly excludes these via its filters. 
-                    additional_filters.append(condition)
-            
-            # add some extra fields apart from the stuff in the config
-            if self._entity_type == "Project":
-                fields_to_retrieve.append("name")
-            elif self._entity_type == "Task":
-                fields_to_retrieve.append("content")
-            elif self._entity_type == "HumanUser":
-                fields_to_retrieve.append("login")
-            else:
-                fields_to_retrieve.append("code")
+            (link_map, fields_to_retrieve, additional_filters) = self.__get_upwards_query()
             
             # TODO: AND the id query with this folder's query to make sure this path is
             # valid for the current entity. Throw error if not so driver code knows to 
@@ -1144,53 +1152,7 @@ class Entity(Folder):
                 else:
                     raise EntityLinkTypeMismatch()
             
-            # and append the 'name field' which is always needed.
-            name = None # used for error reporting
-            if self._entity_type == "Project":
-                name = rec["name"]
-                tokens[ my_sg_data_key ]["name"] = rec["name"]
-            elif self._entity_type == "Task":
-                name = rec["content"]
-                tokens[ my_sg_data_key ]["content"] = rec["content"]
-            elif self._entity_type == "HumanUser":
-                name = rec["login"]
-                tokens[ my_sg_data_key ]["login"] = rec["login"]
-            else:
-                name = rec["code"]
-                tokens[ my_sg_data_key ]["code"] = rec["code"]
-            
-            
-            # Step through our token key map and process
-            #
-            # This is on the form
-            # link_map['sg_sequence'] = link_obj
-            #
-            for field in link_map:
-                
-                # do some juggling to make sure we don't double process the 
-                # name fields.
-                value = rec[field]
-                link_obj = link_map[field]
-                
-                if value is None:
-                    # field was none! - cannot handle that!
-                    raise TankError("The %s %s has a required field %s that \ndoes not have a value "
-                                    "set in Shotgun. \nDouble check the values and try "
-                                    "again!\n" % (self._entity_type, name, field))
-    
-                if isinstance(value, dict):
-                    # If the value is a dict, assume it comes from a entity link.
-                    
-                    # now make sure that this link is actually relevant for us,
-                    # e.g. that it points to an entity of the right type.
-                    # this may be a problem whenever a link can link to more
-                    # than one type. See the EntityLinkTypeMismatch docs for example.
-                    if value["type"] != link_obj.get_entity_type():
-                        raise EntityLinkTypeMismatch()
-                    
-                
-                # store it in our sg_data prefetch chunk
-                tokens[ link_obj.get_sg_data_key() ] = value
+            self.__add_record_to_tokens(tokens, rec, link_map)
                 
         # now keep recursing upwards
         if self._parent is None:
@@ -1199,6 +1161,175 @@ class Entity(Folder):
         else:
             return self._parent.extract_shotgun_data_upwards(sg, tokens)
     
+    def extract_shotgun_data_upwards_batch(self, sg, shotgun_data_list):
+        """
+        Batch version of extract_shotgun_data_upwards(), resolving the data for many
+        seeds using a single Shotgun query per level instead of one query per seed
+        and level. 
+        
+        The returned data is identical to calling extract_shotgun_data_upwards() for 
+        each seed. Seeds which cannot be resolved are returned as the exception that 
+        extract_shotgun_data_upwards() would have raised, e.g. EntityLinkTypeMismatch.
+        
+        :param sg: Shotgun API instance
+        :param shotgun_data_list: list of shotgun data dictionaries
+        :returns: list with an item for each item in shotgun_data_list
+        """
+        my_sg_data_key = FilterExpressionToken.sg_data_key_for_folder_obj(self)
+        
+        # collect all the ids we need to look up at this level
+        ids = []
+        for shotgun_data in shotgun_data_list:
+            if not isinstance(shotgun_data, Exception) and my_sg_data_key in shotgun_data:
+                my_id = shotgun_data[my_sg_data_key]["id"]
+                if my_id not in ids:
+                    ids.append(my_id)
+        
+        records = {}
+        existing_ids = set()
+        if ids:
+            (link_map, fields_to_retrieve, additional_filters) = self.__get_upwards_query()
+            additional_filters.append( {"path": "id", "relation": "in", "values": ids} )
+            filter_dict = { "logical_operator": "and", "conditions": additional_filters }
+            for rec in sg.find(self._entity_type, filter_dict, fields_to_retrieve):
+                records[rec["id"]] = rec
+            
+            # for anything not returned, check if it is a missing id or just a filtered out thing
+            missing_ids = [ x for x in ids if x not in records ]
+            if missing_ids:
+                id_filter = ["id", "in"]
+                id_filter.extend(missing_ids) # weird filter format here
+                existing_ids = set([ x["id"] for x in sg.find(self._entity_type, [id_filter]) ])
+        
+        results = []
+        for shotgun_data in shotgun_data_list:
+            
+            if isinstance(shotgun_data, Exception) or my_sg_data_key not in shotgun_data:
+                # resolved at a lower level or not seeded at this level
+                results.append(shotgun_data)
+                continue
+            
+            tokens = ShotgunDataLayer(shotgun_data)
+            my_id = tokens[ my_sg_data_key ]["id"]
+            rec = records.get(my_id)
+            try:
+                if rec is None:
+                    if my_id not in existing_ids:
+                        raise TankError("Could not find entity %s:%s in Shotgun as required by "
+                                        "the folder creation setup" % (self._entity_type, my_id))
+                    else:
+                        raise EntityLinkTypeMismatch()
+                self.__add_record_to_tokens(tokens, rec, link_map)
+            except (TankError, EntityLinkTypeMismatch), e:
+                results.append(e)
+            else:
+                results.append(tokens)
+        
+        # now keep recursing upwards
+        if self._parent is None:
+            return results
+        
+        else:
+            return self._parent.extract_shotgun_data_upwards_batch(sg, results)
+    
+    def __get_upwards_query(self):
+        """
+        Returns the information needed to query Shotgun for the data
+        used by extract_shotgun_data_upwards().
+        
+        :returns: tuple with link map, list of fields to retrieve and list of
+                  filter conditions, excluding the id of the entity itself.
+        """
+        link_map = {}
+        fields_to_retrieve = []
+        additional_filters = []
+        
+        # TODO: Support nested conditions
+        for condition in self._filters["conditions"]:
+            vals = condition["values"]
+            
+            # note the $FROM$ condition below - this is a bit of a hack to make sure we exclude
+            # the special $FROM$ step based culling filter that is commonly used. Because steps are 
+            # sort of free floating and not associated with an entity, removing them from the 
+            # resolve should be fine in most cases.
+            
+            # so - if at the shot level, we have defined the following filter:
+            # filters: [ { "path": "sg_sequence", "relation": "is", "values": [ "$sequence" ] } ]
+            # the $sequence will be represented by a Token object and we need to get a value for 
+            # this token. We fetch the id for this token and then, as we recurse upwards, and process
+            # the parent folder level (the sequence), this id will be the "seed" when we populate that
+            # level. 
+            
+            if vals[0] and isinstance(vals[0], FilterExpressionToken) and not condition["path"].startswith('$FROM$'):
+                expr_token = vals[0]
+                # we should get this field (eg. 'sg_sequence')
+                fields_to_retrieve.append(condition["path"])
+                # add to our map for later processing map['sg_sequence'] = 'Sequence'
+                # note that for List fields, the key is EntityType.field
+                link_map[ condition["path"] ] = expr_token 
+            
+            elif not condition["path"].startswith('$FROM$'):
+                # this is a normal filter (we exclude the $FROM$ stuff since it is weird
+                # and specific to steps.) So for example 'name must begin with X' - we want 
+                # to include these in the query where we are looking for the object, to
+                # ensure that assets with names starting with X are not created for an 
+                # asset folder node which explicitly excludes these via its filters. 
+                additional_filters.append(condition)
+        
+        # add some extra fields apart from the stuff in the config
+        fields_to_retrieve.append(self.__get_name_field_for_et(self._entity_type))
+        
+        return (link_map, fields_to_retrieve, additional_filters)
+    
+    def __add_record_to_tokens(self, tokens, rec, link_map):
+        """
+        Adds the data retrieved from Shotgun for this level to the tokens dictionary.
+        
+        :param tokens: shotgun data dictionary, seeded with our entity
+        :param rec: Shotgun record for our entity
+        :param link_map: link map as returned by __get_upwards_query()
+        """
+        my_sg_data_key = FilterExpressionToken.sg_data_key_for_folder_obj(self)
+        
+        # and append the 'name field' which is always needed. The entity 
+        # dictionary is shared with the layers below so copy it first.
+        name_field = self.__get_name_field_for_et(self._entity_type)
+        name = rec[name_field] # used for error reporting
+        tokens[ my_sg_data_key ] = dict(tokens[ my_sg_data_key ])
+        tokens[ my_sg_data_key ][name_field] = name
+        
+        # Step through our token key map and process
+        #
+        # This is on the form
+        # link_map['sg_sequence'] = link_obj
+        #
+        for field in link_map:
+            
+            # do some juggling to make sure we don't double process the 
+            # name fields.
+            value = rec[field]
+            link_obj = link_map[field]
+            
+            if value is None:
+                # field was none! - cannot handle that!
+                raise TankError("The %s %s has a required field %s that \ndoes not have a value "
+                                "set in Shotgun. \nDouble check the values and try "
+                                "again!\n" % (self._entity_type, name, field))
+
+            if isinstance(value, dict):
+                # If the value is a dict, assume it comes from a entity link.
+                
+                # now make sure that this link is actually relevant for us,
+                # e.g. that it points to an entity of the right type.
+                # this may be a problem whenever a link can link to more
+                # than one type. See the EntityLinkTypeMismatch docs for example.
+                if value["type"] != link_obj.get_entity_type():
+                    raise EntityLinkTypeMismatch()
+                
+            
+            # store it in our sg_data prefetch chunk
+            tokens[ link_obj.get_sg_data_key() ] = value
+    
     
 class UserWorkspace(Entity):
     """
@@ -1243,6 +1374,7 @@ class UserWorkspace(Entity):
 
         user_filter = { "path": "id", "relation": "is", "values": [ user["id"] ] }
         entity_filter["conditions"].append( user_filter )
+        self._user_id = user["id"]
                 
         # user work spaces are always deferred so make sure to add a setting to the metadata
         # note: This should ideally be a parameter passed to the base class.
@@ -1258,6 +1390,12 @@ class UserWorkspace(Entity):
                         entity_filter, 
                         create_with_parent=True)
 
+    def _get_ledger_data(self):
+        """
+        Workspaces are created for the current user only.
+        """
+        return {"user": self._user_id}
+
 
 class ShotgunStep(Entity):
     """
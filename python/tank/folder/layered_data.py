@@ -0,0 +1,96 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Layered dictionary used to pass Shotgun data around the folder tree.
+
+As folder creation recurses through the schema, each level adds an entry to the
+Shotgun data dictionary before passing it on to its children. Rather than copying
+the whole dictionary for each child, a new layer is stacked on top of the parent
+data, holding only the entries added at that level.
+
+"""
+
+import copy
+
+from UserDict import DictMixin
+
+# marker for keys which have been deleted from a layer
+_DELETED = object()
+
+
+class ShotgunDataLayer(DictMixin):
+    """
+    Dictionary which records its own entries and falls back on a parent
+    mapping for everything else. The parent is never modified.
+
+    Note that values are shared with the parent, so values which are themselves
+    dictionaries need to be copied before they are modified.
+    """
+
+    def __init__(self, parent=None, data=None):
+        """
+        :param parent: mapping to fall back on, typically a dictionary or another layer
+        :param data: optional dictionary with the initial entries for this layer
+        """
+        self._parent = parent
+        self._data = dict(data or {})
+
+    def new_layer(self, data=None):
+        """
+        Returns a new layer on top of this one.
+
+        :param data: optional dictionary with the initial entries for the new layer
+        """
+        return ShotgunDataLayer(self, data)
+
+    def __getitem__(self, key):
+        value = self._data.get(key, _DELETED)
+        if value is not _DELETED:
+            return value
+        if key in self._data or self._parent is None:
+            raise KeyError(key)
+        return self._parent[key]
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._data[key] = _DELETED
+
+    def __contains__(self, key):
+        if key in self._data:
+            return self._data[key] is not _DELETED
+        return self._parent is not None and key in self._parent
+
+    has_key = __contains__
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        if self._parent is None:
+            keys = []
+        else:
+            keys = [ k for k in self._parent.keys() if k not in self._data ]
+        keys.extend([ k for (k, v) in self._data.iteritems() if v is not _DELETED ])
+        return keys
+
+    def copy(self):
+        """
+        Returns the contents of all layers as a standard dictionary.
+        """
+        return dict(self.iteritems())
+
+    def __deepcopy__(self, memo):
+        # deep copies are standard dictionaries
+        return copy.deepcopy(self.copy(), memo)
@@ -15,10 +15,14 @@ Main entry points for folder creation.
 
 import os
 import sys
+import hashlib
+
+from tank_vendor import yaml
 
 from .configuration import FolderConfiguration
 from .folder_io import FolderIOReceiver
 from .folder_types import EntityLinkTypeMismatch
+from .report import ReportingTank
 
 from ..errors import TankError
 from ..platform import constants
@@ -60,46 +64,146 @@ def create_single_folder_item(tk, config_obj, io_receiver, entity_type, entity_i
             # path from folder_obj up to the root. 
             continue
         
-        # now get all the parents, the list goes from the bottom up
-        # parents:
-        # [Entity /Project/sequences/Sequence/Shot, 
-        #  Entity /Project/sequences/Sequence, 
-        #  Static /Project/sequences, Project /Project ]
-        #
-        # the last element is now always the project object
-        folder_objects_to_recurse = [folder_obj] + folder_obj.get_parents()
-        
-        # get the project object and take it out of the list
-        # we will use the project object to start the recursion down
-        project_folder = folder_objects_to_recurse.pop()
-        
-        # get the parent path of the project folder
-        storage_root_path = project_folder.get_storage_root()
-                
-        # now walk down, starting from the project level until we reach our entity 
-        # and create all the structure.
-        #
-        # we pass a list of folder objects to create, so that in the case an object has multiple
-        # children, the folder creation knows which object to create at that point.
-        #
-        # the shotgun_entity_data dictionary contains all the shotgun data needed in order to create
-        # all the folders down this particular recursion path
-        project_folder.create_folders(io_receiver, 
-                                      storage_root_path, 
-                                      shotgun_entity_data, 
-                                      True,
-                                      folder_objects_to_recurse,
-                                      engine)
+        _create_folders_for_folder_obj(io_receiver, folder_obj, shotgun_entity_data, engine)
+
+
+def _create_folders_for_folder_obj(io_receiver, folder_obj, shotgun_entity_data, engine):
+    """
+    Creates the folders for a folder object and all its parents, given the
+    shotgun data resolved for the folder object.
+    
+    :param io_receiver: a FolderIOReceiver representing the folder operation callbacks
+    :param folder_obj: the folder object to create folders for
+    :param shotgun_entity_data: shotgun data as returned by extract_shotgun_data_upwards()
+    :param engine: Engine to create folders for / indicate second pass if not None.
+    """
+    # now get all the parents, the list goes from the bottom up
+    # parents:
+    # [Entity /Project/sequences/Sequence/Shot, 
+    #  Entity /Project/sequences/Sequence, 
+    #  Static /Project/sequences, Project /Project ]
+    #
+    # the last element is now always the project object
+    folder_objects_to_recurse = [folder_obj] + folder_obj.get_parents()
+    
+    # get the project object and take it out of the list
+    # we will use the project object to start the recursion down
+    project_folder = folder_objects_to_recurse.pop()
+    
+    # get the parent path of the project folder
+    storage_root_path = project_folder.get_storage_root()
+            
+    # now walk down, starting from the project level until we reach our entity 
+    # and create all the structure.
+    #
+    # we pass a list of folder objects to create, so that in the case an object has multiple
+    # children, the folder creation knows which object to create at that point.
+    #
+    # the shotgun_entity_data dictionary contains all the shotgun data needed in order to create
+    # all the folders down this particular recursion path
+    project_folder.create_folders(io_receiver, 
+                                  storage_root_path, 
+                                  shotgun_entity_data, 
+                                  True,
+                                  folder_objects_to_recurse,
+                                  engine)
+
+
+def _extract_shotgun_data(tk, config_obj, items):
+    """
+    Resolves the shotgun data needed to create folders for a list of items. 
+    Rather than querying Shotgun for each item and folder level, all items of
+    the same entity type are resolved together, using one query per level.
+    
+    :param config_obj: a FolderConfiguration object representing the folder configuration
+    :param items: list of dictionaries with keys type, id and sg_task_data
+    :returns: list with an entry for each item. Each entry is a list of 
+              (folder object, shotgun entity data) tuples, where the shotgun entity data
+              is an exception if the data could not be resolved.
+    """
+    results = [ [] for x in items ]
+    
+    entity_types = []
+    for i in items:
+        if i["type"] not in entity_types:
+            entity_types.append(i["type"])
+    
+    for entity_type in entity_types:
+        indices = [ idx for idx in range(len(items)) if items[idx]["type"] == entity_type ]
         
+        # Recurse over entire tree and find find all Entity folders of this type
+        for folder_obj in config_obj.get_folder_objs_for_entity_type(entity_type):
+            
+            # fill in the information we know about the entities now
+            entity_id_seeds = []
+            for idx in indices:
+                entity_id_seeds.append({ 
+                    entity_type: { "type": entity_type, "id": items[idx]["id"] },
+                    "current_task_data": items[idx]["sg_task_data"] 
+                })
+            
+            data = folder_obj.extract_shotgun_data_upwards_batch(tk.shotgun, entity_id_seeds)
+            for (idx, shotgun_entity_data) in zip(indices, data):
+                results[idx].append( (folder_obj, shotgun_entity_data) )
+    
+    return results
 
 
+def _get_ledger_hash(tk, config_obj, folder_obj, shotgun_entity_data):
+    """
+    Computes the hash recorded in the folder creation ledger. The hash covers the
+    schema configuration, the storage roots and the shotgun data resolved for the 
+    entity and its parents, meaning that it changes if the schema is modified or 
+    if any of the entities that the folder names are based on are renamed.
+    """
+    ledger_data = folder_obj.get_ledger_data(recursive=True)
+    for parent in folder_obj.get_parents():
+        ledger_data.extend(parent.get_ledger_data(recursive=False))
+    
+    hash_data = {
+        "schema": config_obj.get_signature(),
+        "roots": tk.pipeline_configuration.get_data_roots(),
+        "folders": ledger_data,
+        "data": dict(shotgun_entity_data)
+    }
+    # yaml serializes dictionaries with sorted keys so the output is stable
+    return hashlib.md5(yaml.dump(hash_data)).hexdigest()
+
+def _get_unchanged_keys(io_receiver, ledger_hashes):
+    """
+    Returns the ledger keys whose folders can be skipped because they were 
+    previously created from the same data and the entity folders still exist on disk.
+    
+    :param ledger_hashes: dictionary keyed by (entity_type, entity_id, folder, engine)
+                          tuples containing the current hashes
+    :returns: set of keys
+    """
+    recorded_hashes = io_receiver.get_ledger_hashes(ledger_hashes.keys())
+    candidates = [ k for k in recorded_hashes if recorded_hashes[k] == ledger_hashes[k] ]
+    
+    # make sure that folders haven't been removed since they were created
+    entity_paths = io_receiver.get_paths_for_entities([ (k[0], k[1]) for k in candidates ])
+    
+    unchanged_keys = set()
+    for key in candidates:
+        paths = entity_paths.get( (key[0], key[1]) )
+        if paths and all([ os.path.exists(p) for p in paths ]):
+            unchanged_keys.add(key)
+    return unchanged_keys
 
     
-def process_filesystem_structure(tk, entity_type, entity_ids, preview, engine):    
+def process_filesystem_structure(tk, entity_type, entity_ids, preview, engine, skip_unchanged=False, report=None):    
     """
     Creates filesystem structure in Tank based on Shotgun and a schema config.
     Internal implementation.
     
+    Successful folder creation is recorded in a ledger in the path cache. If skip_unchanged
+    is set, entities whose folders were previously created from the same schema and 
+    with the same names are skipped, including all the folders below them. Note that
+    this means that folders based on Shotgun data that is not part of the name of the 
+    entity or its parents, for example new shots in a sequence or new tasks, are not 
+    created when skip_unchanged is set.
+    
     :param tk: A tank instance
     :param entity_type: A shotgun entity type to create folders for
     :param entity_ids: list of entity ids to process or a single entity id
@@ -108,96 +212,141 @@ def process_filesystem_structure(tk, entity_type, entity_ids, preview, engine):
                    option indicates to the system that a second pass should be executed and all
                    which are marked as deferred are processed. Pass None for non-deferred mode.
                    The convention is to pass the name of the current engine, e.g 'tk-maya'.
+    :param skip_unchanged: skip entities which are up to date according to the ledger
+    :param report: optional FolderCreationReport object which will be populated with
+                   the number of Shotgun, path cache, hook and file system operations
+                   and the time spent in each phase of the folder creation.
     
     :returns: tuple: list of items processed
     
     """
+    if report:
+        # count all shotgun and hook calls
+        tk = ReportingTank(tk, report)
+        report.start("schema_load")
+    try:
+        # check that engine is either a string or None
+        if not (isinstance(engine, basestring) or engine is None):
+            raise ValueError("engine parameter needs to be a string or None")
 
-    # check that engine is either a string or None
-    if not (isinstance(engine, basestring) or engine is None):
-        raise ValueError("engine parameter needs to be a string or None")
 
-
-    # Ensure ids is a list
-    if not isinstance(entity_ids, (list, tuple)):
-        if isinstance(entity_ids, int):
-            entity_ids = (entity_ids,)
-        elif isinstance(entity_ids, str) and entity_ids.isdigit():
-            entity_ids = (int(entity_ids),)
-        else:
-            raise ValueError("Parameter entity_ids was passed %s, accepted types are list, tuple and int.")
+        # Ensure ids is a list
+        if not isinstance(entity_ids, (list, tuple)):
+            if isinstance(entity_ids, int):
+                entity_ids = (entity_ids,)
+            elif isinstance(entity_ids, str) and entity_ids.isdigit():
+                entity_ids = (int(entity_ids),)
+            else:
+                raise ValueError("Parameter entity_ids was passed %s, accepted types are list, tuple and int.")
     
-    if len(entity_ids) == 0:
-        return
+        if len(entity_ids) == 0:
+            return
 
-    # create schema builder
-    schema_cfg_folder = tk.pipeline_configuration.get_schema_config_location()   
-    config = FolderConfiguration(tk, schema_cfg_folder)
+        # create schema builder
+        schema_cfg_folder = tk.pipeline_configuration.get_schema_config_location()   
+        config = FolderConfiguration(tk, schema_cfg_folder)
+    finally:
+        if report:
+            report.stop()
 
-    # all things to create
-    items = []
+    if report:
+        report.start("shotgun_resolution")
+    try:
+        # all things to create
+        items = []
 
-    #################################################################################
-    #
-    # Steps are not supported
-    #
-    if entity_type == "Step":
-        raise TankError("Cannot create folders from Steps, only for entity types such as Shots, Assets etc.")
+        #################################################################################
+        #
+        # Steps are not supported
+        #
+        if entity_type == "Step":
+            raise TankError("Cannot create folders from Steps, only for entity types such as Shots, Assets etc.")
         
-    #################################################################################
-    #
-    # Special handling of tasks. In the case of tasks, jump to the connected entity
-    # note that this requires a shotgun query, and is therefore a performance hit. 
-    #
-    # Tasks with no entity associated will be ignored.
-    #
-    if entity_type == "Task":
+        #################################################################################
+        #
+        # Special handling of tasks. In the case of tasks, jump to the connected entity
+        # note that this requires a shotgun query, and is therefore a performance hit. 
+        #
+        # Tasks with no entity associated will be ignored.
+        #
+        if entity_type == "Task":
         
-        filters = ["id", "in"]
-        filters.extend(entity_ids) # weird filter format here
+            filters = ["id", "in"]
+            filters.extend(entity_ids) # weird filter format here
         
-        # "steps" are a grouping mechanism that sits
-        # on the "side" and allows for Shotgun to group tasks into 
-        # smaller sets (lighting, modeling etc). By default, the Step
-        # entity in Shotgun is controlling this, but it is possible to customize
-        # this behaviour in the step node, to use a different entity type as a "step".
-        # (this can be useful if you want standard Steps for scheduling but 
-        # a different breakdown for your disk setup).
-        #
-        # We need to capture the connection data between a task and other entities,
-        # both the parent entity and these steps, so first figure out all the different
-        # connection fields from Task -> Step that this configuration needs.
-        task_link_fields = [ sn.get_task_link_field() for sn in config.get_task_step_nodes() ]
+            # "steps" are a grouping mechanism that sits
+            # on the "side" and allows for Shotgun to group tasks into 
+            # smaller sets (lighting, modeling etc). By default, the Step
+            # entity in Shotgun is controlling this, but it is possible to customize
+            # this behaviour in the step node, to use a different entity type as a "step".
+            # (this can be useful if you want standard Steps for scheduling but 
+            # a different breakdown for your disk setup).
+            #
+            # We need to capture the connection data between a task and other entities,
+            # both the parent entity and these steps, so first figure out all the different
+            # connection fields from Task -> Step that this configuration needs.
+            task_link_fields = [ sn.get_task_link_field() for sn in config.get_task_step_nodes() ]
         
-        # and of course we always need the entity link
-        task_link_fields.append("entity")
+            # and of course we always need the entity link
+            task_link_fields.append("entity")
         
-        data = tk.shotgun.find(entity_type, [filters], task_link_fields)
-        for sg_entry in data:
-            if sg_entry["entity"]: # task may not be associated with an entity                
-                items.append( { "type":    sg_entry["entity"]["type"], 
-                                "id":      sg_entry["entity"]["id"], 
-                                "sg_task_data": sg_entry } )
+            data = tk.shotgun.find(entity_type, [filters], task_link_fields)
+            for sg_entry in data:
+                if sg_entry["entity"]: # task may not be associated with an entity                
+                    items.append( { "type":    sg_entry["entity"]["type"], 
+                                    "id":      sg_entry["entity"]["id"], 
+                                    "sg_task_data": sg_entry } )
             
-    else:
-        # normal entities
-        for i in entity_ids:
-            items.append( { "type": entity_type, "id": i, "sg_task_data": None } )
+        else:
+            # normal entities
+            for i in entity_ids:
+                items.append( { "type": entity_type, "id": i, "sg_task_data": None } )
         
     
-    # create an object to receive all IO requests
-    io_receiver = FolderIOReceiver(tk, preview)
-
-    # now loop over all individual objects and create folders
-    for i in items:        
-        create_single_folder_item(tk, 
-                                  config, 
-                                  io_receiver, 
-                                  i["type"], 
-                                  i["id"], 
-                                  i["sg_task_data"],
-                                  engine)
+        # create an object to receive all IO requests
+        io_receiver = FolderIOReceiver(tk, preview, report=report)
+
+        # resolve all the shotgun data upfront
+        shotgun_data = _extract_shotgun_data(tk, config, items)
+    finally:
+        if report:
+            report.stop()
+
+    if report:
+        report.start("plan_generation")
+    try:
+        # work out which folder objects to process for each item
+        work = []
+        ledger_hashes = {}
+        for (item, item_data) in zip(items, shotgun_data):
+            for (folder_obj, shotgun_entity_data) in item_data:
+                if isinstance(shotgun_entity_data, EntityLinkTypeMismatch):
+                    # the seed entity id object does not satisfy the link
+                    # path from folder_obj up to the root. 
+                    continue
+                elif isinstance(shotgun_entity_data, Exception):
+                    raise shotgun_entity_data
+            
+                key = (item["type"], item["id"], folder_obj.get_path(), engine)
+                ledger_hashes[key] = _get_ledger_hash(tk, config, folder_obj, shotgun_entity_data)
+                work.append( (key, folder_obj, shotgun_entity_data) )
+    
+        # skip the ones that are already up to date
+        if skip_unchanged:
+            unchanged_keys = _get_unchanged_keys(io_receiver, ledger_hashes)
+        else:
+            unchanged_keys = set()
+
+        # now loop over all individual objects and create folders
+        for (key, folder_obj, shotgun_entity_data) in work:
+            if key in unchanged_keys:
+                continue
+            _create_folders_for_folder_obj(io_receiver, folder_obj, shotgun_entity_data, engine)
+            io_receiver.add_ledger_hash(key, ledger_hashes[key])
 
-    folders_created = io_receiver.execute_folder_creation()
+        folders_created = io_receiver.execute_folder_creation()
+    finally:
+        if report:
+            report.stop()
     
     return folders_created
@@ -0,0 +1,167 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Performance reporting for folder creation.
+
+A report counts the Shotgun calls, path cache operations, hook calls and file
+system operations made during folder creation and times its main phases. This
+makes it possible to tell whether a slow folder creation run is spending its time
+talking to Shotgun or waiting for the file system.
+
+"""
+
+import time
+
+# the phases of folder creation, in the order they are reported
+PHASES = ["schema_load", "shotgun_resolution", "plan_generation", "preflight_checks", 
+          "io", "path_cache_commit"]
+
+
+class FolderCreationReport(object):
+    """
+    Counters and phase timings for a folder creation run.
+
+    Phases can be nested, in which case the time spent in the inner phase
+    is not included in the time reported for the outer phase.
+    """
+    def __init__(self):
+        self.__counts = {}
+        self.__timings = {}
+        self.__stack = []
+
+    def count(self, category, name, num=1):
+        """
+        Increments a counter.
+
+        :param category: Counter category, e.g. "shotgun"
+        :param name: Counter name within the category, e.g. "find Shot"
+        :param num: Amount to increment the counter with
+        """
+        counters = self.__counts.setdefault(category, {})
+        counters[name] = counters.get(name, 0) + num
+
+    def start(self, phase):
+        """
+        Starts timing a phase, pausing the timing of the current phase, if any.
+
+        :param phase: Name of the phase, see PHASES
+        """
+        self.__stack.append([phase, time.time(), 0.0])
+
+    def stop(self):
+        """
+        Stops timing the most recently started phase.
+        """
+        (phase, start_time, nested_time) = self.__stack.pop()
+        elapsed = time.time() - start_time
+        self.__timings[phase] = self.__timings.get(phase, 0.0) + elapsed - nested_time
+        if self.__stack:
+            self.__stack[-1][2] += elapsed
+
+    def get_counts(self):
+        """
+        Returns the counters as a dictionary keyed by category, where each
+        value is a dictionary of counts keyed by name.
+        """
+        return dict([ (k, dict(v)) for (k, v) in self.__counts.items() ])
+
+    def get_timings(self):
+        """
+        Returns the time spent in each phase, in seconds, as a dictionary.
+        """
+        return dict(self.__timings)
+
+    def get_report(self):
+        """
+        Returns a human readable summary of the report.
+
+        :returns: list of lines of text
+        """
+        lines = ["Time spent:"]
+        phases = PHASES + sorted([ p for p in self.__timings if p not in PHASES ])
+        for phase in phases:
+            if phase in self.__timings:
+                lines.append("%10.1f ms  %s" % (self.__timings[phase] * 1000.0, phase))
+
+        for category in sorted(self.__counts):
+            counters = self.__counts[category]
+            lines.append("")
+            lines.append("%s (%d in total):" % (category, sum(counters.values())))
+            for name in sorted(counters):
+                lines.append("%10d  %s" % (counters[name], name))
+
+        return lines
+
+
+class ReportingProxy(object):
+    """
+    Wraps an object, counting the calls made to its methods.
+    """
+    def __init__(self, obj, report, category, by_entity_type=False):
+        """
+        :param obj: Object to wrap, e.g. a Shotgun API instance
+        :param report: FolderCreationReport to count the calls in
+        :param category: Counter category to use
+        :param by_entity_type: Count calls by method and entity type, where the entity
+                               type is the first argument or the entity_type argument.
+        """
+        self.__obj = obj
+        self.__report = report
+        self.__category = category
+        self.__by_entity_type = by_entity_type
+
+    def __getattr__(self, name):
+        attr = getattr(self.__obj, name)
+        if not callable(attr):
+            return attr
+
+        def _counting_method(*args, **kwargs):
+            counter_name = name
+            if self.__by_entity_type:
+                entity_type = kwargs.get("entity_type")
+                if args and isinstance(args[0], basestring):
+                    entity_type = args[0]
+                if entity_type:
+                    counter_name = "%s %s" % (name, entity_type)
+            self.__report.count(self.__category, counter_name)
+            return attr(*args, **kwargs)
+        return _counting_method
+
+
+class ReportingTank(object):
+    """
+    Wraps an Sgtk API instance, counting Shotgun and core hook calls.
+    Everything else is passed through to the API instance.
+    """
+    def __init__(self, tk, report):
+        self.__tk = tk
+        self.__report = report
+        self.__sg = None
+
+    def __getattr__(self, name):
+        return getattr(self.__tk, name)
+
+    @property
+    def shotgun(self):
+        if self.__sg is None:
+            self.__sg = ReportingProxy(self.__tk.shotgun, self.__report, "shotgun", by_entity_type=True)
+        return self.__sg
+
+    def execute_hook(self, hook_name, **kwargs):
+        self.__report.count("hooks", hook_name)
+        return self.__tk.execute_hook(hook_name, **kwargs)
+
+    def count(self, category, name, num=1):
+        """
+        Increments a counter in the report, for calls which don't go 
+        through the API instance. See FolderCreationReport.count().
+        """
+        self.__report.count(category, name, num)
@@ -27,6 +27,12 @@ class Hook(object):
     or Application instance.
     """
     
+    # hooks which compute setting values (using the hook:hook_name syntax in the
+    # environment configuration) can set this to True to indicate that the value 
+    # they return is constant for a given app, engine or framework instance. The
+    # value will then be computed once rather than every time the setting is accessed.
+    cache_setting_value = False
+    
     def __init__(self, parent):
         self.__parent = parent
     
@@ -60,11 +66,11 @@ def clear_hooks_cache():
     _HOOKS_CACHE = {}
 
 def execute_hook(hook_path, parent, **kwargs):
-    hook_class = _get_hook_class(hook_path)
+    hook_class = get_hook_class(hook_path)
     hook = hook_class(parent)
     return hook.execute(**kwargs)
 
-def _get_hook_class(hook_path):
+def get_hook_class(hook_path):
     """
     Returns a hook class given its path
     """
@@ -74,3 +80,6 @@ def _get_hook_class(hook_path):
         _HOOKS_CACHE[hook_path] = loader.load_plugin(hook_path, Hook)
     
     return _HOOKS_CACHE[hook_path]
+
+# backwards compatibility - this was previously a private method
+_get_hook_class = get_hook_class
@@ -16,9 +16,14 @@ all Tank items in the file system are kept.
 
 import sqlite3
 import os
+import re
 
 from .errors import TankError 
 
+# maximum number of values passed in a single sql IN clause
+# sqlite limits the number of parameters in a query to 999 by default.
+MAX_QUERY_VALUES = 500
+
 class PathCache(object):
     """
     A global cache which holds the mapping between a shotgun entity and a location on disk.
@@ -75,6 +80,10 @@ class PathCache(object):
             CREATE INDEX IF NOT EXISTS path_cache_path ON path_cache(root, path, primary_entity);
         
             CREATE UNIQUE INDEX IF NOT EXISTS path_cache_all ON path_cache(entity_type, entity_id, root, path, primary_entity);
+            
+            CREATE TABLE IF NOT EXISTS folder_ledger (entity_type text, entity_id integer, folder text, engine text, hash text);
+            
+            CREATE UNIQUE INDEX IF NOT EXISTS folder_ledger_all ON folder_ledger(entity_type, entity_id, folder, engine);
         """)
         
         ret = c.execute("PRAGMA table_info(path_cache)")
@@ -181,6 +190,38 @@ class PathCache(object):
         c.execute(query, (root_name,) )
         self._connection.commit()
         c.close()
+    
+    def get_path_tree_matcher(self, path):
+        """
+        Returns a function which can be used to update data read from the path 
+        cache after calling delete_path_tree(), without reading it again.
+        
+        :param path: path passed to delete_path_tree()
+        :returns: function which takes a path and returns True if the records 
+                  for that path are deleted by delete_path_tree()
+        """
+        root_name, relative_path = self._separate_root(path)
+        db_path = self._path_to_dbpath(relative_path)
+        
+        # delete_path_tree() uses a like expression, which is case insensitive
+        # for ascii characters and where % and _ are wildcards
+        pattern = ""
+        for char in db_path:
+            if char == "%":
+                pattern += ".*"
+            elif char == "_":
+                pattern += "."
+            else:
+                pattern += re.escape(char)
+        regex = re.compile(pattern, re.IGNORECASE | re.DOTALL)
+        
+        def _matches(p):
+            try:
+                p_root_name, p_relative_path = self._separate_root(p)
+            except TankError:
+                return False
+            return p_root_name == root_name and regex.match(self._path_to_dbpath(p_relative_path)) is not None
+        return _matches
         
 
     def add_mapping(self, entity_type, entity_id, entity_name, path, primary=True):
@@ -197,7 +238,28 @@ class PathCache(object):
         :param entity_name: a shotgun entity name
         :param path: a path on disk representing the entity.
         """
+        self.add_mappings([ (entity_type, entity_id, entity_name, path, primary) ])
+    
+    def add_mappings(self, mappings):
+        """
+        Adds several associations to the database, see add_mapping(). All the
+        associations are committed together rather than one at a time.
         
+        :param mappings: list of (entity_type, entity_id, entity_name, path, primary) tuples
+        """
+        c = self._connection.cursor()
+        try:
+            for (entity_type, entity_id, entity_name, path, primary) in mappings:
+                self._insert_mapping(c, entity_type, entity_id, entity_name, path, primary)
+        finally:
+            # commit the associations added so far, even if one of them fails
+            self._connection.commit()
+            c.close()
+    
+    def _insert_mapping(self, c, entity_type, entity_id, entity_name, path, primary):
+        """
+        Adds an association to the database without committing it, see add_mapping().
+        """
         if primary:
             # the primary entity must be unique: path/id/type 
             # see if there are any records for this path
@@ -242,7 +304,6 @@ class PathCache(object):
                 return
 
         # there was no entity in the db. So let's create it!
-        c = self._connection.cursor()
         root_name, relative_path = self._separate_root(path)
         db_path = self._path_to_dbpath(relative_path)
         c.execute("INSERT INTO path_cache VALUES(?, ?, ?, ?, ?, ?)", (entity_type, 
@@ -251,8 +312,6 @@ class PathCache(object):
                                                                 root_name,
                                                                 db_path,
                                                                 primary))
-        self._connection.commit()
-        c.close()
 
     def get_paths(self, entity_type, entity_id, primary_only=True):
         """
@@ -323,6 +382,145 @@ class PathCache(object):
         else:
             return None
 
+    def get_entities(self, paths):
+        """
+        Returns the primary entities for a list of paths. Bulk version 
+        of get_entity(), using a few queries rather than one per path.
+        
+        :param paths: list of paths on disk
+        :returns: dictionary keyed by path with Shotgun entity dicts, e.g. 
+                  {"type": "Shot", "name": "xxx", "id": 123}. Paths which 
+                  are not found are not included.
+        """
+        # group the paths by root. 
+        paths_by_root = {}
+        for path in paths:
+            try:
+                root_path, relative_path = self._separate_root(path)
+            except TankError:
+                # fail gracefully if path is not a valid path
+                # eg. doesn't belong to the project
+                continue
+            db_path = self._path_to_dbpath(relative_path)
+            db_paths = paths_by_root.setdefault(root_path, {}).setdefault(db_path, [])
+            if path not in db_paths:
+                db_paths.append(path)
+        
+        entities = {}
+        c = self._connection.cursor()
+        for (root_path, paths_by_db_path) in paths_by_root.items():
+            db_paths = paths_by_db_path.keys()
+            for idx in range(0, len(db_paths), MAX_QUERY_VALUES):
+                chunk = db_paths[idx:idx+MAX_QUERY_VALUES]
+                query = ("SELECT entity_type, entity_id, entity_name, path FROM path_cache "
+                         "WHERE root = ? and primary_entity = 1 and path IN (%s)" % ",".join(["?"] * len(chunk)))
+                for row in c.execute(query, [root_path] + chunk):
+                    # convert to string, not unicode!
+                    entity = {"type": str(row[0]), "id": row[1], "name": str(row[2]) }
+                    for path in paths_by_db_path[row[3]]:
+                        if path in entities:
+                            # never supposed to happen!
+                            c.close()
+                            raise TankError("More than one entry in path database for %s!" % path)
+                        entities[path] = entity
+        c.close()
+        
+        return entities
+    
+    def get_paths_for_entities(self, entities, primary_only=True):
+        """
+        Returns the paths for a list of shotgun entities. Bulk version of get_paths(), 
+        using a few queries rather than one per entity.
+        
+        :param entities: list of (entity_type, entity_id) tuples
+        :param primary_only: only return paths where the entity is the primary entity
+        :returns: dictionary keyed by (entity_type, entity_id) with lists of paths.
+                  Entities without any paths are not included.
+        """
+        ids_by_type = {}
+        for (entity_type, entity_id) in entities:
+            ids = ids_by_type.setdefault(entity_type, [])
+            if entity_id not in ids:
+                ids.append(entity_id)
+        
+        paths = {}
+        c = self._connection.cursor()
+        for (entity_type, ids) in ids_by_type.items():
+            for idx in range(0, len(ids), MAX_QUERY_VALUES):
+                chunk = ids[idx:idx+MAX_QUERY_VALUES]
+                query = ("SELECT entity_id, root, path FROM path_cache "
+                         "WHERE entity_type = ? AND entity_id IN (%s)" % ",".join(["?"] * len(chunk)))
+                if primary_only:
+                    query += " and primary_entity = 1"
+                for row in c.execute(query, [entity_type] + chunk):
+                    root_path = self._roots.get(row[1])
+                    if not root_path:
+                        # The root name doesn't match a recognized name, so skip this entry
+                        continue
+                    path_str = self._dbpath_to_path(root_path, row[2])
+                    paths.setdefault((entity_type, row[0]), []).append(path_str)
+        c.close()
+        
+        return paths
+
+    ############################################################################################
+    # folder creation ledger
+    
+    def get_ledger_hashes(self, keys):
+        """
+        Returns the hashes recorded in the folder creation ledger. 
+        
+        The ledger keeps track of the last successful folder creation for an
+        entity and a folder configuration object, using a hash of the data 
+        that the folders were created from.
+        
+        :param keys: list of (entity_type, entity_id, folder, engine) tuples, where
+                     folder is the path to the folder configuration object and engine
+                     is the engine name passed to folder creation, or None.
+        :returns: dictionary keyed by the tuples passed in, containing hashes.
+                  Keys which are not in the ledger are not included.
+        """
+        ids_by_type = {}
+        for (entity_type, entity_id, folder, engine) in keys:
+            ids = ids_by_type.setdefault(entity_type, [])
+            if entity_id not in ids:
+                ids.append(entity_id)
+        
+        hashes = {}
+        c = self._connection.cursor()
+        for (entity_type, ids) in ids_by_type.items():
+            for idx in range(0, len(ids), MAX_QUERY_VALUES):
+                chunk = ids[idx:idx+MAX_QUERY_VALUES]
+                query = ("SELECT entity_id, folder, engine, hash FROM folder_ledger "
+                         "WHERE entity_type = ? AND entity_id IN (%s)" % ",".join(["?"] * len(chunk)))
+                for row in c.execute(query, [entity_type] + chunk):
+                    # engine None is stored as an empty string
+                    key = (entity_type, row[0], row[1], row[2] or None)
+                    hashes[key] = row[3]
+        c.close()
+        
+        return dict([ (k, hashes[k]) for k in keys if k in hashes ])
+    
+    def set_ledger_hashes(self, hashes):
+        """
+        Records hashes in the folder creation ledger, replacing any existing entries.
+        
+        :param hashes: dictionary keyed by (entity_type, entity_id, folder, engine) 
+                       tuples, see get_ledger_hashes(), containing hashes.
+        """
+        if not hashes:
+            return
+        
+        c = self._connection.cursor()
+        for ((entity_type, entity_id, folder, engine), ledger_hash) in hashes.items():
+            c.execute("INSERT OR REPLACE INTO folder_ledger VALUES(?, ?, ?, ?, ?)", (entity_type, 
+                                                                                    entity_id, 
+                                                                                    folder,
+                                                                                    engine or "",
+                                                                                    ledger_hash))
+        self._connection.commit()
+        c.close()
+
     def get_secondary_entities(self, path):
         """
         Returns all the secondary entities for a path.
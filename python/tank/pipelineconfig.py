@@ -14,6 +14,7 @@ across storages, configurations etc.
 """
 import os
 import sys
+import copy
 import glob
 
 from tank_vendor import yaml
@@ -105,7 +106,7 @@ class PipelineConfiguration(object):
         """
         Caches PC metadata from shotgun.
         """
-        sg = shotgun.create_sg_connection()
+        sg = shotgun.create_cached_sg_connection()
         platform_lookup = {"linux2": "linux_path", "win32": "windows_path", "darwin": "mac_path" }
         sg_path_field = platform_lookup[sys.platform]
         data = sg.find_one(constants.PIPELINE_CONFIGURATION_ENTITY,
@@ -339,20 +340,23 @@ class PipelineConfiguration(object):
         
         info_yml_path = os.path.join(associated_api_root, "core", "info.yml")
 
-        if os.path.exists(info_yml_path):
-            try:
-                info_fh = open(info_yml_path, "r")
+        def _load_version():
+            if os.path.exists(info_yml_path):
                 try:
-                    data = yaml.load(info_fh)
-                finally:
-                    info_fh.close()
-                data = data.get("version")
-            except:
+                    info_fh = open(info_yml_path, "r")
+                    try:
+                        data = yaml.load(info_fh)
+                    finally:
+                        info_fh.close()
+                    data = data.get("version")
+                except:
+                    data = None
+            else:
                 data = None
-        else:
-            data = None
+            return data
 
-        return data
+        snapshot = _get_metadata_snapshot(self._pc_root)
+        return snapshot.get(("associated_core_version", info_yml_path), [info_yml_path], _load_version)
         
 
     def get_install_location(self):
@@ -363,6 +367,26 @@ class PipelineConfiguration(object):
         where it keeps the Core API.        
         """
 
+        core_upgrader = os.path.join(self._pc_root, "install", "core", "_core_upgrader.py")
+
+        studio_linkback_files = {"win32": os.path.join(self._pc_root, "install", "core", "core_Windows.cfg"), 
+                                 "linux2": os.path.join(self._pc_root, "install", "core", "core_Linux.cfg"), 
+                                 "darwin": os.path.join(self._pc_root, "install", "core", "core_Darwin.cfg")}
+        
+        curr_linkback_file = studio_linkback_files[sys.platform]
+
+        snapshot = _get_metadata_snapshot(self._pc_root)
+        return snapshot.get("install_location", 
+                            [core_upgrader, curr_linkback_file], 
+                            lambda: self.__resolve_install_location(curr_linkback_file))
+
+    def __resolve_install_location(self, curr_linkback_file):
+        """
+        Resolves the install location from disk. See get_install_location() for details.
+        
+        :param curr_linkback_file: Path to the core linkback file for the current platform
+        :returns: install location path
+        """
         if is_localized(self._pc_root):
             # first, try to locate an install local to this pipeline configuration.
             # this would find any localized APIs.
@@ -372,11 +396,6 @@ class PipelineConfiguration(object):
             # this PC is associated with a shared API (studio install)
             # follow the links defined in the configuration to establish which 
             # setup it has been associated with.
-            studio_linkback_files = {"win32": os.path.join(self._pc_root, "install", "core", "core_Windows.cfg"), 
-                                     "linux2": os.path.join(self._pc_root, "install", "core", "core_Linux.cfg"), 
-                                     "darwin": os.path.join(self._pc_root, "install", "core", "core_Darwin.cfg")}
-            
-            curr_linkback_file = studio_linkback_files[sys.platform]
             
             # this file will contain the path to the API which is meant to be used with this PC.
             install_path = None
@@ -526,6 +545,16 @@ class PipelineConfiguration(object):
         :param hook_name: Name of hook to execute.
         :returns: Return value of the hook.
         """
+        hook_path = self.get_core_hook_path(hook_name)
+        return hook.execute_hook(hook_path, parent, **kwargs)
+
+    def get_core_hook_path(self, hook_name):
+        """
+        Returns the path to the file implementing a core level hook.
+        
+        :param hook_name: Name of hook
+        :returns: Path to the hook file
+        """
         # first look for the hook in the pipeline configuration
         # if it does not exist, fall back onto core API default implementation.
         hook_folder = self.get_core_hooks_location()
@@ -537,8 +566,8 @@ class PipelineConfiguration(object):
             # of the core API.
             hooks_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "hooks"))
             hook_path = os.path.join(hooks_path, file_name)
-
-        return hook.execute_hook(hook_path, parent, **kwargs)
+        
+        return hook_path
 
 
 class StorageConfigurationMapping(object):
@@ -623,10 +652,17 @@ def from_entity(entity_type, entity_id):
     """
     Factory method that constructs a PC given a shotgun object
     """
+    return PipelineConfiguration(get_pc_path_from_entity(entity_type, entity_id))
+
+def get_pc_path_from_entity(entity_type, entity_id):
+    """
+    Resolves the registered location of the PC associated with a shotgun 
+    object without constructing the PC. See from_entity() for details.
+    """
 
     platform_lookup = {"linux2": "linux_path", "win32": "windows_path", "darwin": "mac_path" }
 
-    sg = shotgun.create_sg_connection()
+    sg = shotgun.create_cached_sg_connection()
 
     e = sg.find_one(entity_type, [["id", "is", entity_id]], ["project", "name"])
 
@@ -690,7 +726,7 @@ def from_entity(entity_type, entity_id):
                             "found!" % (proj.get("name"), current_os_path))
 
         # looks good, we got a primary pipeline config that exists
-        return PipelineConfiguration(current_os_path)
+        return current_os_path
 
 
     else:
@@ -731,7 +767,7 @@ def from_entity(entity_type, entity_id):
                             "Shotgun for the project." % (entity_type, entity_id, proj.get("name"), pc_registered_path))
         # ok we got a pipeline config matching the tank command from which we launched.
         # because we found the PC in the list of PCs for this project, we know that it must be valid!
-        return PipelineConfiguration(pc_registered_path)
+        return pc_registered_path
 
 
 
@@ -742,6 +778,13 @@ def from_path(path):
     - data paths are being traversed and resolved
     - if the path is a direct path to a PC root that's fine too
     """
+    return PipelineConfiguration(get_pc_path_from_path(path))
+
+def get_pc_path_from_path(path):
+    """
+    Resolves the registered location of the PC associated with a path
+    without constructing the PC. See from_path() for details.
+    """
 
     if not isinstance(path, basestring):
         raise TankError("Cannot create a Configuration from path '%s' - "
@@ -778,7 +821,7 @@ def from_path(path):
                             "it looks like this pipeline configuration and tank command "
                             "has not been configured for the current operating system." % path)
 
-        return PipelineConfiguration(pc_registered_path)
+        return pc_registered_path
 
 
     ########################################################################################
@@ -832,13 +875,13 @@ def from_path(path):
                 continue
             pc_name = data.get("pc_name")
             if pc_name == constants.PRIMARY_PIPELINE_CONFIG_NAME:
-                return PipelineConfiguration(pc_path)
+                return pc_path
 
         # no luck - this may be because some projects don't have this 
         # metadata cached. Now try by looking in Shotgun instead.
 
         # in the list of paths found in the inverse lookup table on disk, find the primary.
-        sg = shotgun.create_sg_connection()
+        sg = shotgun.create_cached_sg_connection()
         platform_lookup = {"linux2": "linux_path", "win32": "windows_path", "darwin": "mac_path" }
         filters = [ platform_lookup[sys.platform], "in"]
         filters.extend(current_os_pcs)
@@ -865,7 +908,7 @@ def from_path(path):
                             "found!" % (primary_pc.get("project"), current_os_path))
 
         # looks good, we got a primary pipeline config that exists
-        return PipelineConfiguration(current_os_path)
+        return current_os_path
 
     else:
         # we are running a tank command coming from a particular PC!
@@ -904,13 +947,90 @@ def from_path(path):
                             "that belongs to a project B." % (curr_pc_path, path, current_os_pcs))
 
         # okay so this PC is valid!
-        return PipelineConfiguration(pc_registered_path)
+        return pc_registered_path
+
+
+
 
 
 
 
 
+################################################################################################
+# metadata snapshots
+#
+# Constructing a pipeline configuration touches a number of small metadata files
+# (roots.yml, pipeline_configuration.yml, install_location.yml, core info.yml files etc).
+# Rather than reading and parsing these every time, the parsed data is held in a 
+# process wide snapshot per configuration root. Each value in the snapshot remembers
+# the modification time and size of the files it was computed from and is 
+# transparently recomputed when any of those files change on disk.
+
+_METADATA_SNAPSHOTS = {}
+
+class _MetadataSnapshot(object):
+    """
+    Memoised metadata for a single configuration (or core) root.
+    """
+    
+    def __init__(self, root_path):
+        """
+        :param root_path: The root path which this snapshot represents
+        """
+        self._root_path = root_path
+        self._entries = {}
+        
+    def __repr__(self):
+        return "<Metadata snapshot for %s, %d entries>" % (self._root_path, len(self._entries))
+        
+    def get(self, key, file_paths, compute_fn):
+        """
+        Returns a memoised value, recomputing it if any of the files it 
+        depends on have been modified, created or removed since it was computed.
+        Exceptions raised by compute_fn are never cached.
+        
+        :param key: Key to store the value under
+        :param file_paths: List of files that the value is computed from
+        :param compute_fn: Function that computes the value
+        :returns: the computed value
+        """
+        signature = tuple([ _get_file_signature(x) for x in file_paths ])
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+        
+        value = compute_fn()
+        # note - dictionary assignment is atomic, so concurrent access at worst 
+        # means that a value is computed more than once.
+        self._entries[key] = (signature, value)
+        return value
+
+
+def _get_file_signature(path):
+    """
+    Returns a value representing the state of a file on disk, 
+    or None if the file does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime, stat.st_size)
+
+def _get_metadata_snapshot(root_path):
+    """
+    Returns the process wide metadata snapshot for a root path.
+    """
+    snapshot = _METADATA_SNAPSHOTS.get(root_path)
+    if snapshot is None:
+        snapshot = _METADATA_SNAPSHOTS.setdefault(root_path, _MetadataSnapshot(root_path))
+    return snapshot
 
+def clear_metadata_cache():
+    """
+    Clears the process wide cache where pipeline configuration metadata is kept.
+    """
+    _METADATA_SNAPSHOTS.clear()
 
 
 ################################################################################################
@@ -922,7 +1042,15 @@ def get_core_api_version_based_on_current_code():
     executing.
     """
     # read this from info.yml
-    info_yml_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "info.yml"))
+    core_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    info_yml_path = os.path.join(core_root, "info.yml")
+    snapshot = _get_metadata_snapshot(core_root)
+    return snapshot.get("core_api_version", [info_yml_path], lambda: _load_core_api_version(info_yml_path))
+    
+def _load_core_api_version(info_yml_path):
+    """
+    Reads the core API version from an info.yml file.
+    """
     try:
         info_fh = open(info_yml_path, "r")
         try:
@@ -953,7 +1081,22 @@ def get_pc_registered_location(pipeline_config_root_path):
     """
     # now read in the pipeline_configuration.yml file
     cfg_yml = os.path.join(pipeline_config_root_path, "config", "core", "install_location.yml")
+    snapshot = _get_metadata_snapshot(pipeline_config_root_path)
+    data = snapshot.get("install_location_metadata", [cfg_yml], lambda: _load_pc_registered_locations(cfg_yml))
 
+    if sys.platform == "linux2":
+        return data.get("Linux")
+    elif sys.platform == "win32":
+        return data.get("Windows")
+    elif sys.platform == "darwin":
+        return data.get("Darwin")
+    else:
+        raise TankError("Unsupported platform '%s'" % sys.platform)
+
+def _load_pc_registered_locations(cfg_yml):
+    """
+    Loads the install_location.yml location metadata file from disk.
+    """
     if not os.path.exists(cfg_yml):
         raise TankError("Location metadata file '%s' missing! Please contact support." % cfg_yml)
 
@@ -966,14 +1109,7 @@ def get_pc_registered_location(pipeline_config_root_path):
     finally:
         fh.close()
 
-    if sys.platform == "linux2":
-        return data.get("Linux")
-    elif sys.platform == "win32":
-        return data.get("Windows")
-    elif sys.platform == "darwin":
-        return data.get("Darwin")
-    else:
-        raise TankError("Unsupported platform '%s'" % sys.platform)
+    return data
 
 
 def get_pc_disk_metadata(pipeline_config_root_path):
@@ -983,7 +1119,15 @@ def get_pc_disk_metadata(pipeline_config_root_path):
 
     # now read in the pipeline_configuration.yml file
     cfg_yml = os.path.join(pipeline_config_root_path, "config", "core", "pipeline_configuration.yml")
+    snapshot = _get_metadata_snapshot(pipeline_config_root_path)
+    data = snapshot.get("pc_metadata", [cfg_yml], lambda: _load_pc_disk_metadata(cfg_yml))
+    # hand out a copy so that callers cannot modify the memoised data
+    return copy.deepcopy(data)
 
+def _load_pc_disk_metadata(cfg_yml):
+    """
+    Loads and parses the pipeline_configuration.yml config metadata file.
+    """
     if not os.path.exists(cfg_yml):
         raise TankError("Configuration metadata file '%s' missing! Please contact support." % cfg_yml)
 
@@ -1074,7 +1218,17 @@ def get_pc_roots_metadata(pipeline_config_root_path):
     # this will contain something like
     # {'primary': {'mac_path': '/studio', 'windows_path': None, 'linux_path': '/studio'}}
     roots_yml = os.path.join(pipeline_config_root_path, "config", "core", "roots.yml")
-
+    snapshot = _get_metadata_snapshot(pipeline_config_root_path)
+    data = snapshot.get("roots", 
+                        [roots_yml], 
+                        lambda: _load_pc_roots_metadata(pipeline_config_root_path, roots_yml))
+    # hand out a copy so that callers cannot modify the memoised data
+    return copy.deepcopy(data)
+
+def _load_pc_roots_metadata(pipeline_config_root_path, roots_yml):
+    """
+    Loads, validates and normalizes the roots.yml metadata file.
+    """
     if not os.path.exists(roots_yml):
         raise TankError("Roots metadata file '%s' missing! Please contact support." % roots_yml)
 
@@ -11,6 +11,7 @@
 
 # Engine management
 from .engine import start_engine, current_engine, get_engine_path, find_app_settings
+from .engine import get_environment_from_context
 
 # base classes to derive from
 from .application import Application
@@ -77,7 +78,7 @@ def _get_current_bundle():
 ################################################################################################
 # Public API methods
 
-def restart():
+def restart(incremental=False):
     """
     Running restart will shut down any currently running engine, then refresh the templates
     definitions and finally start up the engine again. 
@@ -88,6 +89,14 @@ def restart():
     Any open windows will remain open and will use the old code base and settings. In order to
     access any changes that have happened as part of a reload, you need to launch new app
     windows and these will use the fresh code and configs.
+    
+    If incremental is True, the engine is kept running and only apps that have changed 
+    are destroyed and loaded again. An app is considered changed if its location or 
+    settings, or those of its frameworks, have changed or if any of its files have been 
+    modified. If the engine itself has changed or does not support incremental restarts,
+    a full restart is carried out.
+    
+    :param incremental: Only reload apps which have changed
     """
 
     engine = current_engine()
@@ -102,6 +111,24 @@ def restart():
     except TankError, e:
         engine.log_error(e)
 
+    if incremental:
+        reloaded_apps = None
+        try:
+            new_env = get_environment_from_context(engine.tank, engine.context)
+            if new_env:
+                reloaded_apps = engine._reload_changed_apps(new_env)
+        except TankError, e:
+            engine.log_error("Could not restart the engine incrementally: %s" % e)
+        except Exception:
+            engine.log_exception("Could not restart the engine incrementally!")
+        
+        if reloaded_apps is not None:
+            engine.log_info("Toolkit platform was restarted. The following apps were "
+                            "reloaded: %s" % ", ".join(reloaded_apps or ["None"]))
+            return
+        
+        engine.log_debug("Carrying out a full restart of %s" % engine)
+
     try:
         # now restart the engine            
         current_context = engine.context            
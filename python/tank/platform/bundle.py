@@ -16,6 +16,7 @@ Base class for Abstract classes for Engines, Apps and Frameworks
 import os
 import sys
 import imp
+import copy
 import uuid
 from .. import hook
 from ..errors import TankError
@@ -37,6 +38,10 @@ class TankBundle(object):
         self.__module_uid = None
         self.__descriptor = descriptor    
         self.__frameworks = {}
+        # configuration schema, loaded on demand
+        self.__schema = None
+        # post processed setting values, keyed by setting name
+        self.__resolved_settings = {}
 
         # emit an engine started event
         tk.execute_hook(constants.TANK_BUNDLE_INIT_HOOK_NAME, bundle=self)
@@ -284,9 +289,12 @@ class TankBundle(object):
         
         return sys.modules[mod_name]
 
-    def __post_process_settings_r(self, key, value, schema):
+    def __post_process_settings_r(self, key, value, schema, dynamic_keys):
         """
         Recursive post-processing of settings values
+        
+        Any settings which are computed by hooks which do not allow their 
+        values to be cached are added to the dynamic_keys list.
         """
         
         settings_type = schema.get("type")
@@ -295,14 +303,14 @@ class TankBundle(object):
             processed_val = []
             value_schema = schema["values"]
             for x in value:
-                processed_val.append(self.__post_process_settings_r(key, x, value_schema))
+                processed_val.append(self.__post_process_settings_r(key, x, value_schema, dynamic_keys))
         
         elif settings_type == "dict":
             items = schema.get("items", {})
             # note - we assign the original values here because we 
-            processed_val = value
+            processed_val = dict(value)
             for (key, value_schema) in items.items():            
-                processed_val[key] = self.__post_process_settings_r(key, value[key], value_schema)
+                processed_val[key] = self.__post_process_settings_r(key, value[key], value_schema, dynamic_keys)
             
         
         elif settings_type == "config_path":
@@ -333,6 +341,11 @@ class TankBundle(object):
                                                    setting=key, 
                                                    bundle_obj=self, 
                                                    extra_params=params)
+            
+            hook_path = self.__tk.pipeline_configuration.get_core_hook_path(hook_name)
+            if not hook.get_hook_class(hook_path).cache_setting_value:
+                # the hook computes a new value every time
+                dynamic_keys.append(key)
 
         else:
             # pass-through
@@ -340,7 +353,17 @@ class TankBundle(object):
         
         return processed_val
         
-    def __resolve_setting_value(self, key, value):
+    def __get_schema(self):
+        """
+        Returns the configuration schema for this bundle. The schema is 
+        retrieved from the descriptor once and then kept for the lifetime of 
+        the bundle so that settings lookups do not need to go back to the manifest.
+        """
+        if self.__schema is None:
+            self.__schema = self.__descriptor.get_configuration_schema()
+        return self.__schema
+        
+    def __resolve_setting_value(self, key, value, dynamic_keys=None):
         """
         Resolve a setting value.  Exposed to allow values
         to be resolved for settings derived outside of the 
@@ -348,29 +371,63 @@ class TankBundle(object):
         
         :param key:   setting name
         :param value: setting value
+        :param dynamic_keys: Optional list which any settings computed by 
+                             hooks which cannot be cached are added to
         """
+        if dynamic_keys is None:
+            dynamic_keys = []
         # try to get the type for the setting
         # (may fail if the key does not exist in the schema,
         # which is an old use case we need to support now...)
         try:
-            schema = self.__descriptor.get_configuration_schema().get(key)
+            schema = self.__get_schema().get(key)
         except:
             schema = None
         
         if schema:
             # post process against schema
-            value = self.__post_process_settings_r(key, value, schema)
+            value = self.__post_process_settings_r(key, value, schema, dynamic_keys)
             
         return value
 
     def get_setting(self, key, default=None):
         """
         Get a value from the item's settings
+        
+        Setting values are resolved once and then cached for the lifetime of the 
+        item, unless they are computed by a hook which does not declare that its
+        value can be cached. See refresh_settings().
 
         :param key: config name
         :param default: default value to return
         """
-        return self.__resolve_setting_value(key, self.__settings.get(key, default))
+        if key in self.__resolved_settings:
+            value = self.__resolved_settings[key]
+        
+        elif key not in self.__settings:
+            # not cached since the value depends on the default passed in
+            return self.__resolve_setting_value(key, default)
+        
+        else:
+            dynamic_keys = []
+            value = self.__resolve_setting_value(key, self.__settings[key], dynamic_keys)
+            if dynamic_keys:
+                return value
+            self.__resolved_settings[key] = value
+        
+        if isinstance(value, (list, dict)):
+            # make sure the cached value cannot be modified by the caller
+            value = copy.deepcopy(value)
+        
+        return value
+    
+    def refresh_settings(self):
+        """
+        Discards all cached setting values. Settings will be resolved
+        again, and any hooks computing setting values executed again, 
+        the next time they are accessed.
+        """
+        self.__resolved_settings = {}
             
     def get_template(self, key):
         """
@@ -417,7 +474,7 @@ class TankBundle(object):
         if hook_name == constants.TANK_BUNDLE_DEFAULT_HOOK_SETTING:
             # hook settings points to the default one.
             # find the name of the hook from the manifest
-            manifest = self.__descriptor.get_configuration_schema()
+            manifest = self.__get_schema()
             #
             # Entries are on the following form
             #            
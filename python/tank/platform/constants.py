@@ -201,3 +201,20 @@ SHOTGUN_ENGINE_NAME = "tk-shotgun"
 
 # the menu favourites key for an engine
 MENU_FAVOURITES_KEY = "menu_favourites"
+
+# the maximum number of threads used to load app metadata and validate app
+# configurations concurrently when an engine starts up.
+MAX_APP_VALIDATION_THREADS = 8
+
+# environment variable which can be used to override the number of validation threads.
+# setting it to 1 will load and validate all apps serially.
+APP_VALIDATION_THREADS_ENV_VAR = "TANK_APP_VALIDATION_THREADS"
+
+# environment variable which enables lazy app initialization. When set, apps which
+# have previously been initialized have their commands registered from a cached
+# command manifest and are only initialized once they are actually used.
+LAZY_APP_INIT_ENV_VAR = "TANK_LAZY_APP_INIT"
+
+# environment variable which, when set, makes the engine write a profile of its startup
+# to the pipeline configuration cache location, in chrome trace event format.
+STARTUP_PROFILE_ENV_VAR = "TANK_STARTUP_PROFILE"
@@ -15,23 +15,38 @@ Defines the base class for all Tank Engines.
 
 import os
 import sys
+import copy
+import collections
+import time
+import hashlib
 import traceback
 import weakref
+import threading
         
+from tank_vendor import yaml
+
 from .. import loader
 from .. import hook
 from ..errors import TankError, TankEngineInitError
 from ..deploy import descriptor
 from ..deploy.dev_descriptor import TankDevDescriptor
+from ..util.threads import map_in_threads
 
 from . import application
 from . import constants
 from . import validation
 from . import qt
 from . import black_list
+from . import lazy_app
+from . import profiling
+from . import main_thread
 from .bundle import TankBundle
 from .framework import setup_frameworks
 
+# app configurations are validated concurrently, but the parts of the validation
+# which access the shared Sgtk API instance, context and path cache are serialized
+_app_validation_lock = threading.Lock()
+
 class Engine(TankBundle):
     """
     Base class for an engine in Tank.
@@ -50,102 +65,168 @@ class Engine(TankBundle):
         self.__env = env
         self.__engine_instance_name = engine_instance_name
         self.__applications = {}
+        # source files of the engine and its apps when they were loaded, 
+        # used to detect changes when restarting incrementally
+        self.__engine_snapshot = None
+        self.__app_snapshots = {}
         self.__commands = {}
         self.__currently_initializing_app = None
         
+        # apps whose initialization has been deferred, keyed by instance name
+        self.__deferred_apps = {}
+        self.__lazy_app_init = bool(os.environ.get(constants.LAZY_APP_INIT_ENV_VAR))
+        # list of commands registered by the initializing app, if captured
+        self.__command_capture = None
+        
         self.__qt_widget_trash = []
         self.__created_qt_dialogs = []
         self.__qt_debug_info = {}
         
         self.__commands_that_need_prefixing = []
         
-        # get the engine settings
-        settings = self.__env.get_engine_settings(self.__engine_instance_name)
+        # the invoker is created once Qt has been set up after init_engine(), but
+        # the queue exists from the start so that engines can queue calls to the 
+        # main thread during their initialization. Until there is an invoker, 
+        # calls are executed directly.
+        self._invoker = None
+        self.__main_thread_queue = main_thread.MainThreadQueue(self.__post_to_main_thread)
+        
+        # record timings into the profile set up by start_engine, or
+        # into a profile of our own if the engine is created directly.
+        self.__startup_profile = profiling.get_active_profile()
+        owns_profile = self.__startup_profile is None
+        if owns_profile:
+            self.__startup_profile = profiling.StartupProfile("Engine %s" % engine_instance_name)
+            profiling.set_active_profile(self.__startup_profile)
+        
+        profiling.begin_span("Engine init")
+        try:
+            # get the engine settings
+            settings = self.__env.get_engine_settings(self.__engine_instance_name)
         
-        # get the descriptor representing the engine        
-        descriptor = self.__env.get_engine_descriptor(self.__engine_instance_name)        
+            # get the descriptor representing the engine        
+            descriptor = self.__env.get_engine_descriptor(self.__engine_instance_name)        
         
-        # init base class
-        TankBundle.__init__(self, tk, context, settings, descriptor)
-
-        # check that the context contains all the info that the app needs
-        validation.validate_context(descriptor, context)
-        
-        # make sure the current operating system platform is supported
-        validation.validate_platform(descriptor)
+            # init base class
+            TankBundle.__init__(self, tk, context, settings, descriptor)
+            
+            if self.supports_incremental_restart:
+                # record the source files before any of the engine code is imported
+                self.__engine_snapshot = _get_bundle_snapshot(_get_bundle_state(self.__env, 
+                                                                                descriptor, 
+                                                                                settings))
 
-        # Get the settings for the engine and then validate them
-        engine_schema = descriptor.get_configuration_schema()
-        validation.validate_settings(self.__engine_instance_name, tk, context, engine_schema, settings)
-        
-        # set up any frameworks defined
-        setup_frameworks(self, self, self.__env, descriptor)
+            profiling.begin_span("Validate engine configuration")
+            try:
+                # check that the context contains all the info that the app needs
+                validation.validate_context(descriptor, context)
         
-        # run the engine init
-        self.log_debug("Engine init: Instantiating %s" % self)
-        self.log_debug("Engine init: Current Context: %s" % context)
-
-        # now if a folder named python is defined in the engine, add it to the pythonpath
-        my_path = os.path.dirname(sys.modules[self.__module__].__file__)
-        python_path = os.path.join(my_path, constants.BUNDLE_PYTHON_FOLDER)
-        if os.path.exists(python_path):            
-            # only append to python path if __init__.py does not exist
-            # if __init__ exists, we should use the special tank import instead
-            init_path = os.path.join(python_path, "__init__.py")
-            if not os.path.exists(init_path):
-                self.log_debug("Appending to PYTHONPATH: %s" % python_path)
-                sys.path.append(python_path)
-
-
-        # initial init pass on engine
-        self.init_engine()
+                # make sure the current operating system platform is supported
+                validation.validate_platform(descriptor)
 
-        # try to pull in QT classes and assign to tank.platform.qt.XYZ
-        base_def = self._define_qt_base()
-        qt.QtCore = base_def.get("qt_core")
-        qt.QtGui = base_def.get("qt_gui")
-        qt.TankDialogBase = base_def.get("dialog_base")
-        
-        # create invoker to allow execution of functions on the
-        # main thread:
-        self._invoker = self.__create_main_thread_invoker()
-        
-        # now load all apps and their settings
-        self.__load_apps()
+                # Get the settings for the engine and then validate them
+                engine_schema = descriptor.get_configuration_schema()
+                validation.validate_settings(self.__engine_instance_name, tk, context, engine_schema, settings)
+            finally:
+                profiling.end_span()
         
-        # execute the post engine init for all apps
-        # note that this is executed before the post_app_init
-        # in the engine - this is because typically the post app
-        # init in the engine will contain code which captures the
-        # state of the apps - for example creates a menu, so at that 
-        # point we want to try and have all app initialization complete.
-        for app in self.__applications.values():
-
+            # set up any frameworks defined
+            profiling.begin_span("Engine frameworks")
             try:
-                app.post_engine_init()
-            except TankError, e:
-                self.log_error("App %s Failed to run its post_engine_init. It is loaded, but"
-                               "may not operate in its desired state! Details: %s" % (app, e))
-            except Exception:
-                self.log_exception("App %s failed run its post_engine_init. It is loaded, but"
-                                   "may not operate in its desired state!" % app)
-        
-        # Useful dev helpers: If there is one or more dev descriptors in the 
-        # loaded environment, add a reload button to the menu!
-        for app in self.__applications.values():
-            if isinstance(app.descriptor, TankDevDescriptor):
-                self.log_debug("App %s is registerered via a dev descriptor. Will add a reload "
-                               "button to the actions listings."  % app)
-                from . import restart 
-                self.register_command("Reload and Restart", restart, {"short_name": "restart", "type": "context_menu"})                
-                # only need one reload button, so don't keep iterating :)
-                break
-        
-        # now run the post app init
-        self.post_app_init()
+                setup_frameworks(self, self, self.__env, descriptor)
+            finally:
+                profiling.end_span()
+        
+            # run the engine init
+            self.log_debug("Engine init: Instantiating %s" % self)
+            self.log_debug("Engine init: Current Context: %s" % context)
+
+            # now if a folder named python is defined in the engine, add it to the pythonpath
+            my_path = os.path.dirname(sys.modules[self.__module__].__file__)
+            python_path = os.path.join(my_path, constants.BUNDLE_PYTHON_FOLDER)
+            if os.path.exists(python_path):            
+                # only append to python path if __init__.py does not exist
+                # if __init__ exists, we should use the special tank import instead
+                init_path = os.path.join(python_path, "__init__.py")
+                if not os.path.exists(init_path):
+                    self.log_debug("Appending to PYTHONPATH: %s" % python_path)
+                    sys.path.append(python_path)
+
+
+            # initial init pass on engine
+            profiling.begin_span("init_engine")
+            try:
+                self.init_engine()
+            finally:
+                profiling.end_span()
+
+            # try to pull in QT classes and assign to tank.platform.qt.XYZ
+            base_def = self._define_qt_base()
+            qt.QtCore = base_def.get("qt_core")
+            qt.QtGui = base_def.get("qt_gui")
+            qt.TankDialogBase = base_def.get("dialog_base")
+        
+            # create invoker to allow execution of functions on the
+            # main thread:
+            self._invoker = self.__create_main_thread_invoker()
+        
+            # now load all apps and their settings
+            profiling.begin_span("Load apps")
+            try:
+                self.__load_apps()
+            finally:
+                profiling.end_span()
+        
+            # execute the post engine init for all apps
+            # note that this is executed before the post_app_init
+            # in the engine - this is because typically the post app
+            # init in the engine will contain code which captures the
+            # state of the apps - for example creates a menu, so at that 
+            # point we want to try and have all app initialization complete.
+            profiling.begin_span("post_engine_init")
+            try:
+                for app in self.__applications.values():
+                    profiling.begin_span(app.instance_name)
+                    try:
+                        self.__run_post_engine_init(app)
+                    finally:
+                        profiling.end_span()
+            finally:
+                profiling.end_span()
+        
+            # Useful dev helpers: If there is one or more dev descriptors in the 
+            # loaded environment, add a reload button to the menu!
+            for app in self.apps.values():
+                if isinstance(app.descriptor, TankDevDescriptor):
+                    self.log_debug("App %s is registerered via a dev descriptor. Will add a reload "
+                                   "button to the actions listings."  % app)
+                    from . import restart 
+                    self.register_command("Reload and Restart", 
+                                          lambda: restart(incremental=True), 
+                                          {"short_name": "restart", "type": "context_menu"})                
+                    # only need one reload button, so don't keep iterating :)
+                    break
+        
+            # now run the post app init
+            profiling.begin_span("post_app_init")
+            try:
+                self.post_app_init()
+            finally:
+                profiling.end_span()
         
-        # emit an engine started event
-        tk.execute_hook(constants.TANK_ENGINE_INIT_HOOK_NAME, engine=self)
+            # emit an engine started event
+            profiling.begin_span("Engine init hook")
+            try:
+                tk.execute_hook(constants.TANK_ENGINE_INIT_HOOK_NAME, engine=self)
+            finally:
+                profiling.end_span()
+        finally:
+            profiling.end_span()
+            if owns_profile:
+                # make sure that a failed engine does not leave its profile
+                # behind for the next engine to record into
+                self.__startup_profile.end()
+                profiling.set_active_profile(None)
         
         self.log_debug("Init complete: %s" % self)
         
@@ -221,14 +302,31 @@ class Engine(TankBundle):
         """
         return self.__engine_instance_name
 
+    @property
+    def startup_profile(self):
+        """
+        Timings recorded while the engine was started.
+        
+        :returns: StartupProfile object
+        """
+        return self.__startup_profile
+    
     @property
     def apps(self):
         """
         Dictionary of apps associated with this engine
         
+        Apps whose initialization has been deferred are represented by stand-in 
+        objects which initialize the app as soon as it is used.
+        
         :returns: dictionary with keys being app name and values being app objects
         """
-        return self.__applications
+        if not self.__deferred_apps:
+            return self.__applications
+        
+        apps = dict(self.__deferred_apps)
+        apps.update(self.__applications)
+        return apps
     
     @property
     def commands(self):
@@ -244,6 +342,18 @@ class Engine(TankBundle):
         """
         return self.__commands
     
+    @property
+    def supports_incremental_restart(self):
+        """
+        Indicates that the engine can be restarted incrementally, meaning that only
+        apps which have changed are reloaded while the engine keeps running. Engines 
+        which build menus or other UI from the registered commands need to refresh 
+        these in post_app_reload() and should only return True if they do so.
+        
+        :returns: boolean value indicating if incremental restarts are supported
+        """
+        return False
+    
     @property
     def has_ui(self):
         """
@@ -277,6 +387,16 @@ class Engine(TankBundle):
         """
         pass
     
+    def post_app_reload(self):
+        """
+        Runs after apps have been reloaded as part of an incremental restart.
+        Engines supporting incremental restarts should rebuild any menus or
+        other UI created from the registered commands here.
+        
+        Implemented by deriving classes.
+        """
+        pass
+    
     def destroy(self):
         """
         Destroy all apps, then call destroy_engine so subclasses can add their own tear down code.
@@ -317,6 +437,29 @@ class Engine(TankBundle):
         if properties is None:
             properties = {}
         
+        if self.__command_capture is not None and self.__currently_initializing_app is not None:
+            # keep a copy of the properties passed in so that they can be stored
+            # in the command manifest for the app
+            self.__command_capture.append( (name, dict(properties)) )
+        
+        # if the app being initialized has been deferred, its placeholder commands 
+        # should be replaced rather than being treated as duplicates
+        app = self.__currently_initializing_app
+        deferred_app = self.__deferred_apps.get(app.instance_name) if app else None
+        if deferred_app is not None and deferred_app is not app:
+            placeholder_key = self.__find_command_key(deferred_app, name)
+            if placeholder_key is not None:
+                placeholder = self.__commands[placeholder_key]
+                properties["prefix"] = placeholder["properties"]["prefix"]
+                properties["app"] = app
+                if "description" not in properties:
+                    properties["description"] = app.description
+                # update in place so that anyone holding on to the entry
+                # will see the actual command
+                placeholder["callback"] = callback
+                placeholder["properties"] = properties
+                return
+        
         # uniqueness prefix, populated when there are several instances of the same app
         properties["prefix"] = None
         
@@ -368,18 +511,69 @@ class Engine(TankBundle):
         
         :returns: the result of the function call
         """
-        if self._invoker:
-            from .qt import QtGui, QtCore
-            if (QtGui.QApplication.instance() 
-                and QtCore.QThread.currentThread() != QtGui.QApplication.instance().thread()):
-                # invoke the function on the thread that the QtGui.QApplication was created on.
-                return self._invoker.invoke(func, *args, **kwargs)
-            else:
-                # we're already on the main thread so lets just call our function:
-                return func(*args, **kwargs)
+        if self.__is_off_main_thread():
+            # invoke the function on the thread that the QtGui.QApplication was created on.
+            return self._invoker.invoke(func, *args, **kwargs)
         else:
-            # we don't have an invoker so just call the function:
+            # we're already on the main thread or we don't have an 
+            # invoker so just call the function:
             return func(*args, **kwargs)
+    
+    def execute_in_main_thread_async(self, func, *args, **kwargs):
+        """
+        Execute the specified function in the main thread without waiting for it
+        to complete. Each call is executed in its own event loop iteration of the 
+        main thread. 
+        
+        If called from the main thread or if Qt is not available, the function
+        is executed immediately on the current thread.
+        
+        :param func: function to call
+        :param args: arguments to pass to the function
+        :param kwargs: named arguments to pass to the function
+        
+        :returns: future object. Call its result() method to wait for and 
+                  retrieve the result of the function call.
+        """
+        if self.__is_off_main_thread():
+            return self.__main_thread_queue.submit(func, args, kwargs)
+        else:
+            return self.__main_thread_queue.execute_direct(func, args, kwargs)
+    
+    def execute_in_main_thread_batched(self, func, *args, **kwargs):
+        """
+        Execute the specified function in the main thread without waiting for it
+        to complete. All batched calls which are pending when the main thread gets 
+        to them are executed in a single event loop iteration, making this suitable 
+        for frequent updates such as progress reporting from a background worker.
+        
+        If called from the main thread or if Qt is not available, the function
+        is executed immediately on the current thread.
+        
+        :param func: function to call
+        :param args: arguments to pass to the function
+        :param kwargs: named arguments to pass to the function
+        
+        :returns: future object. Call its result() method to wait for and 
+                  retrieve the result of the function call.
+        """
+        if self.__is_off_main_thread():
+            return self.__main_thread_queue.submit_batched(func, args, kwargs)
+        else:
+            return self.__main_thread_queue.execute_direct(func, args, kwargs)
+    
+    @property
+    def main_thread_metrics(self):
+        """
+        Statistics about the calls made through execute_in_main_thread_async() and
+        execute_in_main_thread_batched(): the current and maximum queue depth,
+        the number of queued and direct calls, the number of main thread 
+        iterations used to execute them and the average and maximum latency 
+        in seconds between queuing a call and its execution starting.
+        
+        :returns: dictionary
+        """
+        return self.__main_thread_queue.get_metrics()
                 
     ##########################################################################################
     # logging interfaces
@@ -732,6 +926,8 @@ class Engine(TankBundle):
                         QtCore.QObject.__init__(self)
                         self._res = None
                         
+                        self._pending = collections.deque()
+                        
                     def invoke(self, fn, *args, **kwargs):
                         self._fn = lambda: fn(*args, **kwargs) 
                         self._res = None
@@ -739,6 +935,10 @@ class Engine(TankBundle):
                         QtCore.QMetaObject.invokeMethod(self, "_do_invoke", QtCore.Qt.BlockingQueuedConnection)
                         
                         return self._res
+                    
+                    def invoke_async(self, fn):
+                        self._pending.append(fn)
+                        QtCore.QMetaObject.invokeMethod(self, "_do_invoke_async", QtCore.Qt.QueuedConnection)
                 
                     @qt.QtCore.Slot()
                     def _do_invoke(self):
@@ -746,96 +946,125 @@ class Engine(TankBundle):
                         Execute function and return result
                         """
                         self._res = self._fn()
+                    
+                    @qt.QtCore.Slot()
+                    def _do_invoke_async(self):
+                        """
+                        Execute the next pending function
+                        """
+                        self._pending.popleft()()
                         
                 return Invoker()
 
         # don't have ui so can't create an invoker!
         return None
+    
+    def __post_to_main_thread(self, fn):
+        """
+        Arranges for fn to be called on the main thread without waiting for it.
+        """
+        self._invoker.invoke_async(fn)
+    
+    def __is_off_main_thread(self):
+        """
+        Returns True if there is an invoker and we are not running on the main thread.
+        """
+        if not self._invoker:
+            return False
+        from .qt import QtGui, QtCore
+        return bool(QtGui.QApplication.instance() 
+                    and QtCore.QThread.currentThread() != QtGui.QApplication.instance().thread())
 
             
     ##########################################################################################
     # private         
         
-    def __load_apps(self):
+    def __load_apps(self, app_instance_names=None):
         """
         Populate the __applications dictionary, skip over apps that fail to initialize.
+        
+        This happens in two passes: Firstly, the metadata for all apps is loaded
+        and their configurations validated. Since this is mostly IO bound, this is
+        done concurrently. Secondly, the apps which validated are initialized, serially 
+        and in the order they appear in the environment.
+        
+        :param app_instance_names: List of apps to load. Defaults to all the apps
+                                   defined for the engine in the environment.
         """
-        for app_instance_name in self.__env.get_apps(self.__engine_instance_name):
+        if app_instance_names is None:
+            app_instance_names = self.__env.get_apps(self.__engine_instance_name)
+        
+        try:
+            num_threads = int(os.environ.get(constants.APP_VALIDATION_THREADS_ENV_VAR, 
+                                             constants.MAX_APP_VALIDATION_THREADS))
+        except ValueError:
+            num_threads = constants.MAX_APP_VALIDATION_THREADS
+        
+        # pass 1 - load descriptors and validate. Note that all reporting is 
+        # deferred until the second pass so that the log output is identical
+        # to what it would be if all apps were processed serially.
+        profiling.begin_span("Validate app configurations")
+        try:
+            prepared_apps = map_in_threads(self.__prepare_app, app_instance_names, num_threads)
+        finally:
+            profiling.end_span()
+
+        # pass 2 - report and initialize
+        for (app_instance_name, prepared_app) in zip(app_instance_names, prepared_apps):
             
-            # get a handle to the app bundle
-            descriptor = self.__env.get_app_descriptor(self.__engine_instance_name, app_instance_name)
-            if not descriptor.exists_local():
+            (status, descriptor, app_settings, error) = prepared_app
+            
+            if status == self.__APP_MISSING:
                 self.log_error("Cannot start app! %s does not exist on disk." % descriptor)
                 continue
             
-            # Load settings for app - skip over the ones that don't validate
-            try:
-                # get the app settings data and validate it.
-                app_schema = descriptor.get_configuration_schema()
-                app_settings = self.__env.get_app_settings(self.__engine_instance_name, app_instance_name)
-
-                # check that the context contains all the info that the app needs
-                if self.__engine_instance_name != constants.SHOTGUN_ENGINE_NAME: 
-                    # special case! The shotgun engine is special and does not have a 
-                    # context until you actually run a command, so disable the valiation
-                    validation.validate_context(descriptor, self.context)
-                
-                # make sure the current operating system platform is supported
-                validation.validate_platform(descriptor)
-                                
-                # for multi engine apps, make sure our engine is supported
-                supported_engines = descriptor.get_supported_engines()
-                if supported_engines and self.name not in supported_engines:
-                    raise TankError("The app could not be loaded since it only supports "
-                                    "the following engines: %s. Your current engine has been "
-                                    "identified as '%s'" % (supported_engines, self.name))
-                
-                # now validate the configuration                
-                validation.validate_settings(app_instance_name, self.tank, self.context, app_schema, app_settings)
-                
-                    
-            except TankError, e:
+            elif status == self.__APP_INVALID:
                 # validation error - probably some issue with the settings!
                 # report this as an error message.
-                self.log_error("App configuration Error for %s. It will not be loaded: %s" % (app_instance_name, e))
+                self.log_error("App configuration Error for %s. It will not be loaded: %s" % (app_instance_name, error))
                 continue
             
-            except Exception:
+            elif status == self.__APP_VALIDATION_EXCEPTION:
                 # code execution error in the validation. Report this as an error 
-                # with the engire call stack!
-                self.log_exception("A general exception was caught while trying to " 
-                                   "validate the configuration for app %s. "
-                                   "The app will not be loaded." % app_instance_name)
+                # with the engire call stack! Re-raise the exception that was captured 
+                # by the worker thread so that it can be logged with its traceback.
+                try:
+                    raise error[0], error[1], error[2]
+                except Exception:
+                    self.log_exception("A general exception was caught while trying to " 
+                                       "validate the configuration for app %s. "
+                                       "The app will not be loaded." % app_instance_name)
                 continue
-            
                                     
             # load the app
+            if self.supports_incremental_restart:
+                self.__app_snapshots[app_instance_name] = _get_bundle_snapshot(_get_bundle_state(self.__env, 
+                                                                                                 descriptor, 
+                                                                                                 app_settings))
+            profiling.begin_span(app_instance_name)
             try:
-                # now get the app location and resolve it into a version object
-                app_dir = descriptor.get_path()
-
-                # create the object, run the constructor
-                app = application.get_application(self, app_dir, descriptor, app_settings, app_instance_name)
+                if self.__lazy_app_init and lazy_app.supports_deferred_init(descriptor):
+                    manifest_key = lazy_app.get_manifest_key(self, descriptor, app_settings, app_instance_name)
+                    manifest = lazy_app.load_command_manifest(self, app_instance_name, manifest_key)
                 
-                # load any frameworks required
-                setup_frameworks(self, app, self.__env, descriptor)
-                
-                # track the init of the app
-                self.__currently_initializing_app = app
-                try:
-                    app.init_app()
-                finally:
-                    self.__currently_initializing_app = None
-            
-            except TankError, e:
-                self.log_error("App %s failed to initialize. It will not be loaded: %s" % (app_dir, e))
-                
-            except Exception:
-                self.log_exception("App %s failed to initialize. It will not be loaded." % app_dir)
-            else:
-                # note! Apps are keyed by their instance name, meaning that we 
-                # could theoretically have multiple instances of the same app.
-                self.__applications[app_instance_name] = app
+                    if manifest is not None:
+                        # we know which commands the app registers, so we can 
+                        # postpone initializing it until it is actually needed
+                        self.__defer_app(app_instance_name, descriptor, app_settings, manifest)
+                    else:
+                        # initialize the app and record its commands for next time
+                        self.__command_capture = []
+                        try:
+                            app = self.__init_app(app_instance_name, descriptor, app_settings)
+                            commands = self.__command_capture
+                        finally:
+                            self.__command_capture = None
+                        if app:
+                            lazy_app.save_command_manifest(self, app_instance_name, manifest_key, commands)
+                else:
+                    self.__init_app(app_instance_name, descriptor, app_settings)
+            finally:
+                profiling.end_span()
                 
             # lastly check if there are any compatibility warnings
             messages = black_list.compare_against_black_list(descriptor)
@@ -845,8 +1074,301 @@ class Engine(TankBundle):
                     self.log_warning("")
                     self.log_warning(msg)
                 
+    def __init_app(self, app_instance_name, descriptor, app_settings):
+        """
+        Creates and initializes an app and adds it to the list of loaded apps.
+        Any errors are logged.
+        
+        :param app_instance_name: The name of the app instance in the environment
+        :param descriptor: Descriptor for the app
+        :param app_settings: Validated settings for the app
+        :returns: The app object or None if the app failed to initialize
+        """
+        try:
+            # now get the app location and resolve it into a version object
+            app_dir = descriptor.get_path()
+
+            # create the object, run the constructor
+            app = application.get_application(self, app_dir, descriptor, app_settings, app_instance_name)
             
+            # load any frameworks required
+            profiling.begin_span("Frameworks")
+            try:
+                setup_frameworks(self, app, self.__env, descriptor)
+            finally:
+                profiling.end_span()
+            
+            # track the init of the app
+            self.__currently_initializing_app = app
+            profiling.begin_span("init_app")
+            try:
+                app.init_app()
+            finally:
+                self.__currently_initializing_app = None
+                profiling.end_span()
+        
+        except TankError, e:
+            self.log_error("App %s failed to initialize. It will not be loaded: %s" % (app_dir, e))
+            
+        except Exception:
+            self.log_exception("App %s failed to initialize. It will not be loaded." % app_dir)
+            
+        else:
+            # note! Apps are keyed by their instance name, meaning that we 
+            # could theoretically have multiple instances of the same app.
+            self.__applications[app_instance_name] = app
+            return app
+        
+        return None
+
+    def __run_post_engine_init(self, app):
+        """
+        Runs the post_engine_init for an app, logging any errors.
+        """
+        try:
+            app.post_engine_init()
+        except TankError, e:
+            self.log_error("App %s Failed to run its post_engine_init. It is loaded, but"
+                           "may not operate in its desired state! Details: %s" % (app, e))
+        except Exception:
+            self.log_exception("App %s failed run its post_engine_init. It is loaded, but"
+                               "may not operate in its desired state!" % app)
+
+    def __defer_app(self, app_instance_name, descriptor, app_settings, manifest):
+        """
+        Registers placeholder commands for an app based on its command manifest 
+        rather than initializing it.
+        
+        :param app_instance_name: The name of the app instance in the environment
+        :param descriptor: Descriptor for the app
+        :param app_settings: Validated settings for the app
+        :param manifest: List of (command name, properties) tuples
+        """
+        self.log_debug("Deferring initialization of app %s" % app_instance_name)
+        
+        deferred_app = lazy_app.LazyApplication(self, descriptor, app_settings, app_instance_name)
+        self.__deferred_apps[app_instance_name] = deferred_app
+        
+        self.__currently_initializing_app = deferred_app
+        try:
+            for (name, properties) in manifest:
+                callback = self.__create_placeholder_callback(deferred_app, name)
+                self.register_command(name, callback, properties)
+        finally:
+            self.__currently_initializing_app = None
+
+    def __create_placeholder_callback(self, deferred_app, name):
+        """
+        Creates a callback which initializes a deferred app and then
+        executes the actual command that the app registered.
+        """
+        def callback(*args, **kwargs):
+            app = self._initialize_deferred_app(deferred_app.instance_name)
+            key = self.__find_command_key(app, name)
+            if key is None:
+                raise TankError("The command '%s' is no longer registered by %s!" % (name, app))
+            return self.__commands[key]["callback"](*args, **kwargs)
+        return callback
+    
+    def __find_command_key(self, app, name):
+        """
+        Returns the key in the commands dictionary for a command 
+        registered by an app, or None if not found. 
+        """
+        for key in [name, "%s:%s" % (app.instance_name, name)]:
+            item = self.__commands.get(key)
+            if item and item["properties"].get("app") is app:
+                return key
+        return None
+
+    def _initialize_deferred_app(self, app_instance_name):
+        """
+        Initializes an app whose initialization was deferred when the engine started.
+        This is a private method which is internal to tank and should not be used by
+        external code.
+        
+        :param app_instance_name: The name of the app instance in the environment
+        :returns: The initialized app object
+        """
+        if app_instance_name in self.__applications:
+            return self.__applications[app_instance_name]
+        
+        deferred_app = self.__deferred_apps.get(app_instance_name)
+        if deferred_app is None:
+            raise TankError("App %s is not loaded by %s!" % (app_instance_name, self))
+        
+        self.log_debug("Initializing deferred app %s" % app_instance_name)
+        app = self.__init_app(app_instance_name, deferred_app.descriptor, deferred_app.settings)
+        
+        # whether it succeeded or not, the app is no longer deferred - remove any
+        # placeholder commands which were not replaced by the app itself.
+        del self.__deferred_apps[app_instance_name]
+        for (key, item) in self.__commands.items():
+            if item["properties"].get("app") is deferred_app:
+                del self.__commands[key]
+        
+        if app is None:
+            raise TankError("App %s failed to initialize. Please see the log for details." % app_instance_name)
+        
+        self.__run_post_engine_init(app)
+        return app
+
+    # status codes returned by __prepare_app
+    (__APP_VALID, __APP_MISSING, __APP_INVALID, __APP_VALIDATION_EXCEPTION) = range(4)
+
+    def __prepare_app(self, app_instance_name):
+        """
+        Loads the descriptor and settings for an app and validates them.
+        
+        This method is executed in a worker thread and must therefore not 
+        log or modify any engine state. Instead, the outcome is returned.
+        
+        Loading the descriptor and its manifest and the platform and engine checks
+        only read app specific data and run concurrently. The context and settings 
+        validation use the shared Sgtk API instance, context and path cache, none 
+        of which are thread safe, so these are serialized.
+        
+        :param app_instance_name: The name of the app instance in the environment
+        :returns: tuple with (status, descriptor, settings, error details)
+        """
+        # get a handle to the app bundle
+        descriptor = self.__env.get_app_descriptor(self.__engine_instance_name, app_instance_name)
+        if not descriptor.exists_local():
+            return (self.__APP_MISSING, descriptor, None, None)
+        
+        # Load settings for app - skip over the ones that don't validate
+        try:
+            # get the app settings data and validate it.
+            app_schema = descriptor.get_configuration_schema()
+            app_settings = self.__env.get_app_settings(self.__engine_instance_name, app_instance_name)
+
+            # make sure the current operating system platform is supported
+            validation.validate_platform(descriptor)
+                            
+            # for multi engine apps, make sure our engine is supported
+            supported_engines = descriptor.get_supported_engines()
+            if supported_engines and self.name not in supported_engines:
+                raise TankError("The app could not be loaded since it only supports "
+                                "the following engines: %s. Your current engine has been "
+                                "identified as '%s'" % (supported_engines, self.name))
+            
+            _app_validation_lock.acquire()
+            try:
+                # check that the context contains all the info that the app needs
+                if self.__engine_instance_name != constants.SHOTGUN_ENGINE_NAME: 
+                    # special case! The shotgun engine is special and does not have a 
+                    # context until you actually run a command, so disable the valiation
+                    validation.validate_context(descriptor, self.context)
+                
+                # now validate the configuration                
+                validation.validate_settings(app_instance_name, self.tank, self.context, app_schema, app_settings)
+            finally:
+                _app_validation_lock.release()
+                
+        except TankError, e:
+            return (self.__APP_INVALID, descriptor, None, e)
+        
+        except Exception:
+            return (self.__APP_VALIDATION_EXCEPTION, descriptor, None, sys.exc_info())
+        
+        return (self.__APP_VALID, descriptor, app_settings, None)
 
+    def _reload_changed_apps(self, new_env):
+        """
+        Updates the running engine to reflect a freshly loaded version of its 
+        environment. Apps which have been removed or changed since they were loaded
+        are destroyed, new and changed apps are loaded and all other apps are left
+        running. An app is considered changed if its location or settings, or those of 
+        the frameworks it uses, differ or if any of their source files have been added,
+        removed or modified since the app was loaded.
+        
+        This is a private method which is internal to tank and should not be used 
+        by external code. Use tank.platform.restart(incremental=True) instead.
+        
+        :param new_env: Environment object
+        :returns: List of instance names for the apps that were loaded or None if the 
+                  engine itself has changed or does not support incremental restarts,
+                  in which case the engine was left untouched.
+        """
+        if not self.supports_incremental_restart:
+            return None
+        
+        engine_name = self.__engine_instance_name
+        if engine_name not in new_env.get_engines():
+            return None
+        
+        old_state = _get_bundle_state(self.__env, 
+                                      self.__env.get_engine_descriptor(engine_name),
+                                      self.__env.get_engine_settings(engine_name))
+        new_state = _get_bundle_state(new_env,
+                                      new_env.get_engine_descriptor(engine_name),
+                                      new_env.get_engine_settings(engine_name))
+        if old_state != new_state or _get_bundle_snapshot(old_state) != self.__engine_snapshot:
+            self.log_debug("%s has changed and cannot be restarted incrementally." % self)
+            return None
+        
+        new_app_names = new_env.get_apps(engine_name)
+        running_app_names = set(self.__applications.keys()) | set(self.__deferred_apps.keys())
+        
+        apps_to_unload = []
+        for app_instance_name in running_app_names:
+            if app_instance_name not in new_app_names:
+                apps_to_unload.append(app_instance_name)
+                continue
+            
+            old_state = _get_bundle_state(self.__env, 
+                                          self.__env.get_app_descriptor(engine_name, app_instance_name), 
+                                          self.__env.get_app_settings(engine_name, app_instance_name))
+            new_state = _get_bundle_state(new_env, 
+                                          new_env.get_app_descriptor(engine_name, app_instance_name), 
+                                          new_env.get_app_settings(engine_name, app_instance_name))
+            if (old_state != new_state 
+                or _get_bundle_snapshot(old_state) != self.__app_snapshots.get(app_instance_name)):
+                apps_to_unload.append(app_instance_name)
+        
+        for app_instance_name in apps_to_unload:
+            self.__unload_app(app_instance_name)
+        
+        # switch over to the new environment. Make sure any modified hooks are picked up. 
+        self.__env = new_env
+        hook.clear_hooks_cache()
+        
+        # now load all apps which are not running - this includes apps 
+        # which failed to load previously.
+        apps_to_load = [ x for x in new_app_names 
+                         if x not in self.__applications and x not in self.__deferred_apps ]
+        self.__load_apps(apps_to_load)
+        
+        for app_instance_name in apps_to_load:
+            if app_instance_name in self.__applications:
+                self.__run_post_engine_init(self.__applications[app_instance_name])
+        
+        self.post_app_reload()
+        
+        return apps_to_load
+    
+    def __unload_app(self, app_instance_name):
+        """
+        Destroys a running app and removes all its commands.
+        
+        :param app_instance_name: The name of the app instance in the environment
+        """
+        if app_instance_name in self.__applications:
+            app = self.__applications.pop(app_instance_name)
+            self.log_debug("Destroying %s" % app)
+            try:
+                app._destroy_frameworks()
+                app.destroy_app()
+            except Exception:
+                self.log_exception("App %s failed to shut down cleanly." % app)
+        else:
+            # never initialized, so nothing to destroy
+            app = self.__deferred_apps.pop(app_instance_name)
+        
+        for (name, item) in self.__commands.items():
+            if item["properties"].get("app") is app:
+                del self.__commands[name]
+    
     def __destroy_apps(self):
         """
         Call the destroy_app method on all loaded apps
@@ -908,20 +1430,46 @@ def start_engine(engine_name, tk, context):
                         "please shut down the previous one using the command "
                         "tank.platform.current_engine().destroy()." % current_engine())
 
-    # get environment and engine location
-    (env, engine_descriptor) = __get_env_and_descriptor_for_engine(engine_name, tk, context)
-
-    # make sure it exists locally
-    if not engine_descriptor.exists_local():
-        raise TankEngineInitError("Cannot start engine! %s does not exist on disk" % engine_descriptor)
-
-    # get path to engine code
-    engine_path = engine_descriptor.get_path()
-    plugin_file = os.path.join(engine_path, constants.ENGINE_FILE)
-
-    # Instantiate the engine
-    class_obj = loader.load_plugin(plugin_file, Engine)
-    obj = class_obj(tk, context, engine_name, env)
+    # time the startup of the engine. The engine picks up the 
+    # active profile and records its initialization into it.
+    profile = profiling.StartupProfile("start_engine %s" % engine_name)
+    profiling.set_active_profile(profile)
+    try:
+        # get environment and engine location
+        (env, engine_descriptor) = __get_env_and_descriptor_for_engine(engine_name, tk, context)
+    
+        # make sure it exists locally
+        if not engine_descriptor.exists_local():
+            raise TankEngineInitError("Cannot start engine! %s does not exist on disk" % engine_descriptor)
+    
+        # get path to engine code
+        engine_path = engine_descriptor.get_path()
+        plugin_file = os.path.join(engine_path, constants.ENGINE_FILE)
+    
+        # Instantiate the engine
+        profiling.begin_span("Load engine code")
+        try:
+            class_obj = loader.load_plugin(plugin_file, Engine)
+        finally:
+            profiling.end_span()
+        
+        obj = class_obj(tk, context, engine_name, env)
+    finally:
+        profiling.set_active_profile(None)
+    
+    profile.end()
+    
+    if profiling.is_trace_output_enabled():
+        profile_path = profiling.get_profile_path(tk, engine_name)
+        metadata = {"engine": engine_name, 
+                    "environment": env.name, 
+                    "context": str(context),
+                    "time": time.strftime("%Y-%m-%d %H:%M:%S")}
+        try:
+            profile.write_trace(profile_path, metadata)
+            obj.log_debug("Startup profile written to %s" % profile_path)
+        except Exception, e:
+            obj.log_warning("Could not write startup profile to %s: %s" % (profile_path, e))
 
     # register this engine as the current engine
     set_current_engine(obj)
@@ -1027,6 +1575,45 @@ def start_shotgun_engine(tk, entity_type, context=None):
 
     return obj
 
+def get_shotgun_cache_fingerprint(tk, entity_type):
+    """
+    Special, internal method that computes a fingerprint for everything that 
+    determines the actions in the shotgun menu cache for an entity type: the core 
+    version, the environment file and its includes and the locations of the 
+    engines, apps and frameworks configured in the environment.
+    
+    Returns None if the environment contains dev descriptors. Their code may change 
+    at any time so the cache needs to be generated every time.
+    """
+    env = tk.pipeline_configuration.get_environment("shotgun_%s" % entity_type.lower())
+    
+    files = []
+    for path in [env.disk_location] + env.get_include_files():
+        stat = os.stat(path)
+        files.append([path, stat.st_mtime, stat.st_size])
+    
+    descriptors = []
+    for engine_name in env.get_engines():
+        descriptors.append(env.get_engine_descriptor(engine_name))
+        for app_name in env.get_apps(engine_name):
+            descriptors.append(env.get_app_descriptor(engine_name, app_name))
+    for fw_name in env.get_frameworks():
+        descriptors.append(env.get_framework_descriptor(fw_name))
+    
+    locations = []
+    for desc in descriptors:
+        if isinstance(desc, TankDevDescriptor):
+            return None
+        locations.append(desc.get_location())
+    
+    key_data = {"core": tk.version,
+                "platform": sys.platform,
+                "entity_type": entity_type,
+                "files": files,
+                "locations": locations}
+    # yaml serializes dictionaries with sorted keys so the output is stable
+    return hashlib.md5(yaml.dump(key_data)).hexdigest()
+
 def get_environment_from_context(tk, context):
     """
     Returns an environment object given a context. 
@@ -1047,6 +1634,63 @@ def get_environment_from_context(tk, context):
 ##########################################################################################
 # utilities
 
+def _get_bundle_state(env, descriptor, settings):
+    """
+    Returns a structure describing the configuration of a bundle and
+    the frameworks it uses. Two states can be compared to determine whether 
+    the configuration has changed.
+    
+    :param env: Environment object the bundle belongs to
+    :param descriptor: Descriptor for the bundle
+    :param settings: Settings dictionary for the bundle
+    """
+    try:
+        fw_instance_names = validation.validate_and_return_frameworks(descriptor, env)
+    except TankError, e:
+        # missing frameworks - include the problem in the state
+        fw_states = str(e)
+    else:
+        fw_states = []
+        for fw_instance_name in fw_instance_names:
+            fw_states.append(_get_bundle_state(env, 
+                                               env.get_framework_descriptor(fw_instance_name), 
+                                               env.get_framework_settings(fw_instance_name)))
+    
+    return {"location": descriptor.get_location(),
+            "path": descriptor.get_path(),
+            "settings": copy.deepcopy(settings),
+            "frameworks": fw_states}
+
+def _get_bundle_snapshot(state):
+    """
+    Returns the modification times and sizes of the source files belonging to
+    a bundle and the frameworks it uses. Compiled python files, which are written
+    whenever modules are imported, and hidden folders such as .git are skipped.
+    Two snapshots can be compared to determine whether any files have changed.
+    
+    :param state: Bundle state as returned by _get_bundle_state()
+    :returns: dictionary of (modification time, size) tuples keyed by path
+    """
+    snapshot = {}
+    for (root, dirs, files) in os.walk(state["path"]):
+        dirs[:] = [ d for d in dirs if not d.startswith(".") ]
+        for f in files:
+            if os.path.splitext(f)[1] in [".pyc", ".pyo"]:
+                continue
+            path = os.path.join(root, f)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # file removed while scanning
+                continue
+            snapshot[path] = (stat.st_mtime, stat.st_size)
+    
+    if isinstance(state["frameworks"], list):
+        for fw_state in state["frameworks"]:
+            snapshot.update(_get_bundle_snapshot(fw_state))
+    
+    return snapshot
+
 def __get_env_and_descriptor_for_engine(engine_name, tk, context):
     """
     Utility method to return commonly needed objects when instantiating engines.
@@ -1054,17 +1698,29 @@ def __get_env_and_descriptor_for_engine(engine_name, tk, context):
     Raises TankEngineInitError if the engine name cannot be found.
     """
     # get the environment via the pick_environment hook
-    env_name = __pick_environment(engine_name, tk, context)
+    profiling.begin_span("Pick environment")
+    try:
+        env_name = __pick_environment(engine_name, tk, context)
+    finally:
+        profiling.end_span()
 
     # get the env object based on the name in the pick env hook
-    env = tk.pipeline_configuration.get_environment(env_name, context)
+    profiling.begin_span("Load environment")
+    try:
+        env = tk.pipeline_configuration.get_environment(env_name, context)
+    finally:
+        profiling.end_span()
     
     # make sure that the environment has an engine instance with that name
     if not engine_name in env.get_engines():
         raise TankEngineInitError("Cannot find an engine instance %s in %s." % (engine_name, env))
 
     # get the location for our engine
-    engine_descriptor = env.get_engine_descriptor(engine_name)
+    profiling.begin_span("Engine descriptor")
+    try:
+        engine_descriptor = env.get_engine_descriptor(engine_name)
+    finally:
+        profiling.end_span()
 
     return (env, engine_descriptor)
 
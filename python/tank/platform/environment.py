@@ -73,7 +73,11 @@ class Environment(object):
         finally:
             env_file.close()
      
-        self.__env_data = environment_includes.process_includes(self.__env_path, data, self.__context)
+        self.__include_files = []
+        self.__env_data = environment_includes.process_includes(self.__env_path, 
+                                                                data, 
+                                                                self.__context, 
+                                                                self.__include_files)
         
         if not self.__env_data:
             raise TankError('No data in env file: %s' % (self.__env_path))
@@ -233,6 +237,12 @@ class Environment(object):
     ##########################################################################################
     # Public methods - data retrieval
 
+    def get_include_files(self):
+        """
+        Returns the paths to all files included by this environment file
+        """
+        return list(self.__include_files)
+
     def get_engines(self):
         """
         Returns all the engines contained in this environment file
@@ -182,7 +182,7 @@ def _resolve_frameworks(lookup_dict, data):
     
 
         
-def process_includes(file_name, data, context):
+def process_includes(file_name, data, context, resolved_files=None):
     """
     Processes includes for an environment file.
     
@@ -192,6 +192,8 @@ def process_includes(file_name, data, context):
     2. recursively go through the current file and replace any 
        @ref with a dictionary value from X
     
+    If a resolved_files list is passed, the paths of all files 
+    that were included, directly or indirectly, are appended to it.
     """
     
     # first build our big fat lookup dict
@@ -199,6 +201,9 @@ def process_includes(file_name, data, context):
     
     lookup_dict = {}
     for include_file in include_files:
+        
+        if resolved_files is not None:
+            resolved_files.append(include_file)
                 
         # path exists, so try to read it
         fh = open(include_file, "r")
@@ -208,7 +213,7 @@ def process_includes(file_name, data, context):
             fh.close()
                 
         # now resolve this data before proceeding
-        included_data = process_includes(include_file, included_data, context)
+        included_data = process_includes(include_file, included_data, context, resolved_files)
         
         # update our big lookup dict with this data
         lookup_dict.update(included_data)
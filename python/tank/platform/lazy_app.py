@@ -0,0 +1,210 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Support for deferred (lazy) app initialization.
+
+When lazy app initialization is enabled, the commands that an app registers
+as part of its init_app() are captured in a command manifest which is cached
+on disk. On subsequent engine starts, the engine registers placeholder commands
+from the manifest rather than importing and initializing the app. The app is
+initialized the first time one of its commands is executed or when some other
+code accesses it via the engine's apps dictionary.
+
+"""
+
+import os
+import hashlib
+
+from tank_vendor import yaml
+
+from ..deploy.dev_descriptor import TankDevDescriptor
+
+# folder inside the engine's cache location where command manifests are stored
+MANIFEST_FOLDER = "command_manifests"
+
+
+class LazyApplication(object):
+    """
+    Stand-in for an app which has been configured but not yet initialized.
+
+    Basic properties which can be resolved without loading the app code are
+    provided directly. Accessing any other attribute initializes the app and
+    forwards the request to the real app object.
+    """
+
+    def __init__(self, engine, descriptor, settings, instance_name):
+        """
+        :param engine: The engine the app belongs to
+        :param descriptor: Descriptor for the app
+        :param settings: Settings dictionary for the app
+        :param instance_name: The name of the app instance in the environment
+        """
+        self.__engine = engine
+        self.__descriptor = descriptor
+        self.__settings = settings
+        self.__instance_name = instance_name
+
+    def __repr__(self):
+        return "<Sgtk App (not loaded): %s, engine: %s>" % (self.__descriptor.get_system_name(),
+                                                            self.__engine)
+
+    def __getattr__(self, name):
+        # any attribute which is not provided by the stand-in
+        # requires the actual app to be loaded.
+        app = self.__engine._initialize_deferred_app(self.__instance_name)
+        return getattr(app, name)
+
+    @property
+    def engine(self):
+        return self.__engine
+
+    @property
+    def instance_name(self):
+        return self.__instance_name
+
+    @property
+    def descriptor(self):
+        return self.__descriptor
+
+    @property
+    def settings(self):
+        return self.__settings
+
+    @property
+    def name(self):
+        return self.__descriptor.get_system_name()
+
+    @property
+    def display_name(self):
+        return self.__descriptor.get_display_name()
+
+    @property
+    def description(self):
+        return self.__descriptor.get_description()
+
+    @property
+    def version(self):
+        return self.__descriptor.get_version()
+
+
+def supports_deferred_init(descriptor):
+    """
+    Returns True if an app can be initialized lazily. Apps running from dev
+    descriptors are always initialized since their code may change at any point
+    without this being reflected in their version number.
+
+    :param descriptor: Descriptor for the app
+    """
+    return not isinstance(descriptor, TankDevDescriptor)
+
+def get_manifest_key(engine, descriptor, settings, instance_name):
+    """
+    Computes a key which uniquely identifies the commands that an app registers.
+    The key is based on the app version, its settings, the engine and the parts of
+    the context that apps typically use to decide which commands to register.
+
+    :param engine: The engine the app belongs to
+    :param descriptor: Descriptor for the app
+    :param settings: Settings dictionary for the app
+    :param instance_name: The name of the app instance in the environment
+    :returns: key string
+    """
+    ctx = engine.context
+    context_shape = {
+        "project": ctx.project is not None,
+        "entity_type": ctx.entity.get("type") if ctx.entity else None,
+        "step": ctx.step is not None,
+        "task": ctx.task is not None,
+    }
+
+    key_data = {
+        "engine": [engine.name, engine.version, engine.instance_name],
+        "app": [descriptor.get_system_name(), descriptor.get_version(), instance_name],
+        "location": descriptor.get_location(),
+        "settings": settings,
+        "context": context_shape
+    }
+    # yaml serializes dictionaries with sorted keys so the output is stable
+    return hashlib.md5(yaml.dump(key_data)).hexdigest()
+
+def _get_manifest_path(engine, instance_name):
+    """
+    Returns the path to the command manifest for an app.
+    """
+    file_name = "%s.%s.yml" % (engine.get_env().name, instance_name)
+    return os.path.join(engine.cache_location, MANIFEST_FOLDER, file_name)
+
+def load_command_manifest(engine, instance_name, key):
+    """
+    Loads the cached command manifest for an app.
+
+    :param engine: The engine the app belongs to
+    :param instance_name: The name of the app instance in the environment
+    :param key: Manifest key, as computed by get_manifest_key()
+    :returns: List of (command name, properties) tuples or None if no valid manifest exists.
+    """
+    manifest_path = _get_manifest_path(engine, instance_name)
+    if not os.path.exists(manifest_path):
+        return None
+
+    try:
+        fh = open(manifest_path, "rt")
+        try:
+            data = yaml.safe_load(fh)
+        finally:
+            fh.close()
+    except Exception, e:
+        engine.log_debug("Could not read command manifest %s: %s" % (manifest_path, e))
+        return None
+
+    if not isinstance(data, dict) or data.get("key") != key:
+        # manifest is out of date
+        return None
+
+    return [ (x["name"], x["properties"]) for x in data.get("commands", []) ]
+
+def save_command_manifest(engine, instance_name, key, commands):
+    """
+    Writes the command manifest for an app to disk. Commands with properties that
+    cannot be serialized are not supported and no manifest will be written in that case,
+    meaning that the app will always be initialized.
+
+    :param engine: The engine the app belongs to
+    :param instance_name: The name of the app instance in the environment
+    :param key: Manifest key, as computed by get_manifest_key()
+    :param commands: List of (command name, properties) tuples.
+    """
+    manifest_path = _get_manifest_path(engine, instance_name)
+    data = {"key": key,
+            "commands": [ {"name": name, "properties": props} for (name, props) in commands ]}
+
+    try:
+        contents = yaml.safe_dump(data)
+    except Exception, e:
+        engine.log_debug("Commands registered by %s cannot be cached and the app will "
+                         "not be loaded lazily: %s" % (instance_name, e))
+        return
+
+    try:
+        manifest_folder = os.path.dirname(manifest_path)
+        if not os.path.exists(manifest_folder):
+            old_umask = os.umask(0)
+            try:
+                os.makedirs(manifest_folder, 0777)
+            finally:
+                os.umask(old_umask)
+        fh = open(manifest_path, "wt")
+        try:
+            fh.write(contents)
+        finally:
+            fh.close()
+    except Exception, e:
+        engine.log_debug("Could not write command manifest %s: %s" % (manifest_path, e))
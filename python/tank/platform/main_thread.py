@@ -0,0 +1,216 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Asynchronous execution of functions on the main thread.
+
+Functions are queued together with a future which the calling thread can use
+to wait for the result. The queue does not know how to get onto the main thread;
+it is handed a function which posts a callable to the main thread without blocking,
+typically implemented using the Qt event loop.
+
+"""
+
+import sys
+import time
+import threading
+
+
+class MainThreadFuture(object):
+    """
+    The result of a function that has been queued for execution on the main thread.
+    """
+    def __init__(self):
+        self.__event = threading.Event()
+        self.__result = None
+        self.__exc_info = None
+
+    def done(self):
+        """
+        Returns True if the function has been executed.
+        """
+        return self.__event.isSet()
+
+    def result(self, timeout=None):
+        """
+        Waits for the function to be executed and returns its result. If the function
+        raised an exception, the exception is re-raised in the calling thread.
+
+        :param timeout: Maximum number of seconds to wait, None to wait forever
+        :returns: the result of the function call
+        """
+        self.__event.wait(timeout)
+        if not self.__event.isSet():
+            raise RuntimeError("Timed out waiting for the main thread!")
+        if self.__exc_info:
+            raise self.__exc_info[0], self.__exc_info[1], self.__exc_info[2]
+        return self.__result
+
+    def _set_result(self, result):
+        self.__result = result
+        self.__event.set()
+
+    def _set_exc_info(self, exc_info):
+        self.__exc_info = exc_info
+        self.__event.set()
+
+
+def _execute(func, args, kwargs, future):
+    """
+    Executes a function and stores the outcome in a future.
+    """
+    try:
+        future._set_result(func(*args, **kwargs))
+    except:
+        future._set_exc_info(sys.exc_info())
+
+
+class MainThreadQueue(object):
+    """
+    Queue of function calls waiting to be executed on the main thread.
+
+    Calls can either be posted individually, in which case each call is executed
+    in its own main thread tick, or batched, in which case all calls which are
+    pending when the main thread gets to them are executed in a single tick.
+    Calls are always executed in the order they were submitted.
+    """
+    def __init__(self, post_fn):
+        """
+        :param post_fn: Function taking a callable as its single argument and
+                        arranging for it to be called on the main thread,
+                        without waiting for it to complete.
+        """
+        self.__post_fn = post_fn
+        self.__lock = threading.Lock()
+        self.__pending = []
+        self.__batch_scheduled = False
+
+        self.__num_calls = 0
+        self.__num_direct_calls = 0
+        self.__num_ticks = 0
+        self.__max_depth = 0
+        self.__total_latency = 0.0
+        self.__max_latency = 0.0
+
+    def submit(self, func, args, kwargs):
+        """
+        Queues a function call to be executed in its own main thread tick.
+
+        :returns: MainThreadFuture
+        """
+        future = self.__enqueue(func, args, kwargs)
+        self.__post_fn(self.__process_one)
+        return future
+
+    def submit_batched(self, func, args, kwargs):
+        """
+        Queues a function call to be executed together with all other pending calls.
+
+        :returns: MainThreadFuture
+        """
+        future = self.__enqueue(func, args, kwargs)
+
+        self.__lock.acquire()
+        try:
+            schedule = not self.__batch_scheduled
+            self.__batch_scheduled = True
+        finally:
+            self.__lock.release()
+
+        if schedule:
+            self.__post_fn(self.__process_all)
+        return future
+
+    def execute_direct(self, func, args, kwargs):
+        """
+        Executes a function call immediately, for when there is no
+        main thread to queue it for or we are already on it.
+
+        :returns: MainThreadFuture which has completed
+        """
+        self.__lock.acquire()
+        try:
+            self.__num_direct_calls += 1
+        finally:
+            self.__lock.release()
+
+        future = MainThreadFuture()
+        _execute(func, args, kwargs, future)
+        return future
+
+    def get_metrics(self):
+        """
+        Returns statistics about the calls executed through the queue. Latency
+        is the time between submitting a call and the main thread starting to
+        execute it, in seconds.
+
+        :returns: dictionary
+        """
+        self.__lock.acquire()
+        try:
+            if self.__num_calls:
+                avg_latency = self.__total_latency / self.__num_calls
+            else:
+                avg_latency = 0.0
+            return {"queue_depth": len(self.__pending),
+                    "max_queue_depth": self.__max_depth,
+                    "num_calls": self.__num_calls,
+                    "num_direct_calls": self.__num_direct_calls,
+                    "num_ticks": self.__num_ticks,
+                    "avg_latency": avg_latency,
+                    "max_latency": self.__max_latency}
+        finally:
+            self.__lock.release()
+
+    def __enqueue(self, func, args, kwargs):
+        future = MainThreadFuture()
+        self.__lock.acquire()
+        try:
+            self.__pending.append((func, args, kwargs, future, time.time()))
+            self.__max_depth = max(self.__max_depth, len(self.__pending))
+        finally:
+            self.__lock.release()
+        return future
+
+    def __take(self, take_all):
+        """
+        Removes pending calls from the queue and records their latency.
+        """
+        now = time.time()
+        self.__lock.acquire()
+        try:
+            if take_all:
+                items = self.__pending
+                self.__pending = []
+                self.__batch_scheduled = False
+            else:
+                items = self.__pending[:1]
+                del self.__pending[:1]
+
+            if items:
+                self.__num_ticks += 1
+            for item in items:
+                latency = now - item[4]
+                self.__num_calls += 1
+                self.__total_latency += latency
+                self.__max_latency = max(self.__max_latency, latency)
+        finally:
+            self.__lock.release()
+        return items
+
+    def __process_one(self):
+        # another tick may already have executed our call
+        # in which case there is nothing to do
+        for (func, args, kwargs, future, submit_time) in self.__take(False):
+            _execute(func, args, kwargs, future)
+
+    def __process_all(self):
+        for (func, args, kwargs, future, submit_time) in self.__take(True):
+            _execute(func, args, kwargs, future)
@@ -0,0 +1,240 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Timing of engine startup.
+
+While an engine starts, named and nested timing spans are recorded into a
+startup profile. The profile can be written to disk in the Chrome trace event
+format, meaning that it can be inspected in chrome://tracing, or summarized
+as text using the tank command.
+
+"""
+
+import os
+import time
+
+try:
+    import json
+except ImportError:
+    from tank_vendor.shotgun_api3.lib import simplejson as json
+
+from . import constants
+
+# folder inside the pipeline configuration cache where startup profiles are written
+PROFILE_FOLDER = "startup_profiles"
+
+
+class Span(object):
+    """
+    A named, timed section of the startup, with optional child spans.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.start = time.time()
+        self.end = None
+        self.children = []
+
+    def __repr__(self):
+        return "<Span %s %s>" % (self.name, self.duration)
+
+    @property
+    def duration(self):
+        """
+        Duration in seconds, or None if the span has not finished.
+        """
+        if self.end is None:
+            return None
+        return self.end - self.start
+
+
+class StartupProfile(object):
+    """
+    Records nested timing spans during engine startup.
+    """
+    def __init__(self, name):
+        """
+        :param name: Name of the outermost span
+        """
+        self.root = Span(name)
+        self.__stack = [self.root]
+
+    def begin(self, name):
+        """
+        Starts a new span, nested inside the currently open span.
+
+        :param name: Name of the span
+        """
+        span = Span(name)
+        self.__stack[-1].children.append(span)
+        self.__stack.append(span)
+
+    def end(self):
+        """
+        Ends the most recently started span. Ending the outermost
+        span completes the profile.
+        """
+        if self.__stack:
+            span = self.__stack.pop()
+            span.end = time.time()
+
+    @property
+    def complete(self):
+        """
+        True if all spans, including the outermost one, have ended.
+        """
+        return len(self.__stack) == 0
+
+    def get_trace(self, metadata=None):
+        """
+        Returns the profile in the Chrome trace event format.
+
+        :param metadata: Optional dictionary with extra information to store with the trace
+        :returns: dictionary which can be serialized to json
+        """
+        events = []
+        now = time.time()
+
+        def _add_events_r(span):
+            end = span.end if span.end is not None else now
+            events.append({"name": span.name,
+                           "ph": "X",
+                           "ts": int((span.start - self.root.start) * 1000000),
+                           "dur": int((end - span.start) * 1000000),
+                           "pid": os.getpid(),
+                           "tid": 0})
+            for child in span.children:
+                _add_events_r(child)
+
+        _add_events_r(self.root)
+
+        return {"traceEvents": events,
+                "displayTimeUnit": "ms",
+                "otherData": metadata or {}}
+
+    def get_report(self):
+        """
+        Returns a human readable summary of the profile.
+
+        :returns: list of lines of text
+        """
+        return format_trace(self.get_trace())
+
+    def write_trace(self, path, metadata=None):
+        """
+        Writes the profile to disk in the Chrome trace event format.
+
+        :param path: Path to the json file to write
+        :param metadata: Optional dictionary with extra information to store with the trace
+        """
+        folder = os.path.dirname(path)
+        if not os.path.exists(folder):
+            old_umask = os.umask(0)
+            try:
+                os.makedirs(folder, 0777)
+            finally:
+                os.umask(old_umask)
+
+        fh = open(path, "wt")
+        try:
+            fh.write(json.dumps(self.get_trace(metadata)))
+        finally:
+            fh.close()
+
+
+def format_trace(trace):
+    """
+    Formats a trace as returned by StartupProfile.get_trace() as an indented
+    list of spans and their durations.
+
+    :param trace: Trace dictionary
+    :returns: list of lines of text
+    """
+    events = [ e for e in trace.get("traceEvents", []) if e.get("ph") == "X" ]
+    # parents start before or at the same time as their children and last longer
+    events.sort(key=lambda e: (e["ts"], -e["dur"]))
+
+    lines = []
+    open_ends = []
+    for event in events:
+        while open_ends and event["ts"] >= open_ends[-1]:
+            open_ends.pop()
+        indent = "  " * len(open_ends)
+        lines.append("%8.1f ms  %s%s" % (event["dur"] / 1000.0, indent, event["name"]))
+        open_ends.append(event["ts"] + event["dur"])
+
+    return lines
+
+def get_profile_folder(tk):
+    """
+    Returns the folder where startup profiles are written.
+
+    :param tk: Sgtk API instance
+    """
+    return os.path.join(tk.pipeline_configuration.get_cache_location(), PROFILE_FOLDER)
+
+def get_profile_path(tk, engine_name):
+    """
+    Returns the path where the startup profile for an engine is written.
+
+    :param tk: Sgtk API instance
+    :param engine_name: Instance name of the engine
+    """
+    return os.path.join(get_profile_folder(tk), "%s.json" % engine_name)
+
+def load_trace(path):
+    """
+    Loads a trace previously written by StartupProfile.write_trace().
+    """
+    fh = open(path, "rt")
+    try:
+        return json.loads(fh.read())
+    finally:
+        fh.close()
+
+def is_trace_output_enabled():
+    """
+    Returns True if startup profiles should be written to disk.
+    """
+    return bool(os.environ.get(constants.STARTUP_PROFILE_ENV_VAR))
+
+
+##########################################################################################
+# active profile management
+
+g_active_profile = None
+
+def set_active_profile(profile):
+    """
+    Sets the profile that spans are recorded into. Pass None to stop recording.
+    """
+    global g_active_profile
+    g_active_profile = profile
+
+def get_active_profile():
+    """
+    Returns the profile that spans are currently recorded into, if any.
+    """
+    global g_active_profile
+    return g_active_profile
+
+def begin_span(name):
+    """
+    Starts a span in the active profile, if any.
+    """
+    if g_active_profile:
+        g_active_profile.begin(name)
+
+def end_span():
+    """
+    Ends the most recently started span in the active profile, if any.
+    """
+    if g_active_profile:
+        g_active_profile.end()
@@ -14,11 +14,27 @@ App configuration and schema validation.
 """
 import os
 import sys
+import random
+import hashlib
+
+from tank_vendor import yaml
 
 from . import constants
 from ..errors import TankError
 from ..template import TemplateString
 
+# folder inside the pipeline configuration cache where validation results are stored
+VALIDATION_CACHE_FOLDER = "settings_validation"
+
+# maximum number of validation results to keep. Results are recorded per context, 
+# so the least recently used ones are removed once there are more than this.
+MAX_VALIDATION_CACHE_ENTRIES = 2000
+
+# fraction of the writes to the validation cache after which it is pruned. Listing
+# the cache folder costs more than the validation itself, so this is done occasionally,
+# meaning that the number of results can temporarily exceed the maximum.
+VALIDATION_CACHE_PRUNE_RATE = 0.01
+
 def validate_schema(app_or_engine_display_name, schema):
     """
     Validates the schema definition (info.yml) of an app or engine.
@@ -29,17 +45,54 @@ def validate_schema(app_or_engine_display_name, schema):
     v = _SchemaValidator(app_or_engine_display_name, schema)
     v.validate()
 
-def validate_settings(app_or_engine_display_name, tank_api, context, schema, settings):
+def validate_settings(app_or_engine_display_name, tank_api, context, schema, settings, use_cache=True):
     """
     Validates the settings of an app or engine against its
     schema definition (info.yml).
     
+    Successful validations are recorded in the pipeline configuration's cache
+    location. Subsequent validations of the same settings, schema and context 
+    are skipped, as long as the templates, hooks and config files referred to by
+    the settings remain unchanged. Pass use_cache=False to always validate.
+    
     Will raise a TankError if validation fails, will return None
     if validation succeeds.
     """
+    cache_path = None
+    if use_cache:
+        cache_path = _get_validation_cache_path(app_or_engine_display_name, tank_api, context, schema, settings)
+        if cache_path and os.path.exists(cache_path):
+            # these settings have already been validated. Mark the 
+            # result as recently used so that it is kept when pruning.
+            try:
+                os.utime(cache_path, None)
+            except OSError:
+                pass
+            return
+    
     v = _SettingsValidator(app_or_engine_display_name, tank_api, schema, context)
     v.validate(settings)
     
+    if cache_path:
+        _write_validation_cache_entry(cache_path)
+
+def clear_validation_cache(tank_api):
+    """
+    Removes all cached validation results for a pipeline configuration,
+    meaning that all settings will be fully validated the next time they are used.
+    """
+    cache_folder = os.path.join(tank_api.pipeline_configuration.get_cache_location(), 
+                                VALIDATION_CACHE_FOLDER)
+    if not os.path.exists(cache_folder):
+        return
+    
+    for f in os.listdir(cache_folder):
+        try:
+            os.remove(os.path.join(cache_folder, f))
+        except OSError:
+            # another process may have removed it already
+            pass
+    
     
 def validate_context(descriptor, context):
     """
@@ -211,6 +264,135 @@ def convert_string_to_type(string_value, schema_type):
         
     return evaluated_value
     
+def _get_validation_cache_path(display_name, tank_api, context, schema, settings):
+    """
+    Returns the path to the cache entry recording the successful validation of settings.
+    The name of the entry is a hash of everything that the validation depends on:
+    the settings and schema, the definitions of any templates referred to, the 
+    state of any hook and config files referred to and the context.
+    
+    Returns None if the validation cannot be cached.
+    """
+    dependencies = {"templates": set(), "files": set()}
+    for (settings_key, value_schema) in schema.items():
+        if isinstance(value_schema, dict) and settings_key in settings:
+            _collect_settings_dependencies(tank_api, value_schema, settings[settings_key], dependencies)
+    
+    templates = []
+    for template_name in sorted(dependencies["templates"]):
+        template = tank_api.templates.get(template_name)
+        if template is None:
+            templates.append([template_name, None])
+        else:
+            keys = [ [k.name, type(k).__name__, k.default] for k in template.keys.values() ]
+            templates.append([template_name, type(template).__name__, template.definition, sorted(keys)])
+
+    files = []
+    for path in sorted(dependencies["files"]):
+        try:
+            files.append([path, os.path.getmtime(path)])
+        except OSError:
+            files.append([path, None])
+    
+    if context is None:
+        context_data = None
+    else:
+        context_data = []
+        for entity in [context.project, context.entity, context.step, context.task, context.user] + \
+                      list(context.additional_entities):
+            if entity:
+                context_data.append([entity.get("type"), entity.get("id")])
+            else:
+                context_data.append(None)
+    
+    key_data = {"name": display_name,
+                "settings": settings,
+                "schema": schema,
+                "templates": templates,
+                "files": files,
+                "context": context_data}
+    
+    try:
+        # yaml serializes dictionaries with sorted keys so the output is stable
+        key = hashlib.md5(yaml.dump(key_data)).hexdigest()
+    except Exception:
+        return None
+    
+    return os.path.join(tank_api.pipeline_configuration.get_cache_location(), 
+                        VALIDATION_CACHE_FOLDER,
+                        key)
+
+def _collect_settings_dependencies(tank_api, schema, value, dependencies):
+    """
+    Recursively collects the templates and files that the validation 
+    of a setting value depends on.
+    """
+    data_type = schema.get("type")
+    
+    if data_type == "list" and isinstance(value, list):
+        for v in value:
+            _collect_settings_dependencies(tank_api, schema.get("values", {}), v, dependencies)
+    
+    elif data_type == "dict" and isinstance(value, dict):
+        for (key, value_schema) in schema.get("items", {}).items():
+            if key in value:
+                _collect_settings_dependencies(tank_api, value_schema, value[key], dependencies)
+    
+    elif data_type == "template" and isinstance(value, basestring):
+        dependencies["templates"].add(value)
+    
+    elif data_type == "hook" and isinstance(value, basestring):
+        hooks_folder = tank_api.pipeline_configuration.get_hooks_location()
+        dependencies["files"].add(os.path.join(hooks_folder, "%s.py" % value))
+    
+    elif data_type == "config_path" and isinstance(value, basestring):
+        config_folder = tank_api.pipeline_configuration.get_config_location()
+        dependencies["files"].add(os.path.join(config_folder, value.replace("/", os.path.sep)))
+
+def _write_validation_cache_entry(cache_path):
+    """
+    Records a successful validation. Failures to write are ignored
+    since the settings will simply be validated again next time.
+    """
+    try:
+        cache_folder = os.path.dirname(cache_path)
+        if not os.path.exists(cache_folder):
+            old_umask = os.umask(0)
+            try:
+                os.makedirs(cache_folder, 0777)
+            finally:
+                os.umask(old_umask)
+        open(cache_path, "wt").close()
+        if random.random() < VALIDATION_CACHE_PRUNE_RATE:
+            _prune_validation_cache(cache_folder)
+    except Exception:
+        pass
+
+def _prune_validation_cache(cache_folder):
+    """
+    Removes the least recently used validation results once there 
+    are more than MAX_VALIDATION_CACHE_ENTRIES of them.
+    """
+    file_names = os.listdir(cache_folder)
+    if len(file_names) <= MAX_VALIDATION_CACHE_ENTRIES:
+        return
+    
+    entries = []
+    for f in file_names:
+        path = os.path.join(cache_folder, f)
+        try:
+            entries.append( (os.path.getmtime(path), path) )
+        except OSError:
+            # another process may have removed it already
+            pass
+    entries.sort()
+    
+    for (mtime, path) in entries[:len(entries) - MAX_VALIDATION_CACHE_ENTRIES]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
 # Helper used by both schema and settings validators
 def _validate_expected_data_type(expected_type, value):
     value_type_name = type(value).__name__
@@ -0,0 +1,106 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Reading and writing of data cached on disk.
+
+Cache files live in the pipeline configuration cache, which is shared between
+users and therefore writable by everyone. They are stored as json so that
+reading a cache file can never execute code, and callers are expected to
+validate the data they get back before using it.
+
+"""
+
+import os
+
+try:
+    import json
+except ImportError:
+    from tank_vendor.shotgun_api3.lib import simplejson as json
+
+
+def read_cache_file(path):
+    """
+    Reads a json cache file. Strings are returned as str rather than unicode
+    where possible, the same way yaml and the Shotgun API return them.
+
+    :param path: Path to the cache file
+    :returns: The cached data or None if the file is missing or cannot be read
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        fh = open(path, "rb")
+        try:
+            data = json.load(fh)
+        finally:
+            fh.close()
+    except Exception:
+        # corrupt or partially written cache file
+        return None
+    return _to_str(data)
+
+def write_cache_file(path, data):
+    """
+    Writes data to a json cache file. The file is written to a temp file first
+    and moved into place to not expose partially written files to other processes.
+    Data which does not survive the round trip through json unchanged is not
+    written. Caches are an optimization, so failures are ignored.
+
+    :param path: Path to the cache file
+    :param data: Data to store, made up of standard python types
+    :returns: True if the file was written, False otherwise
+    """
+    try:
+        content = json.dumps(data)
+    except (TypeError, ValueError):
+        return False
+    if _to_str(json.loads(content)) != data:
+        # e.g. dates or non-string dictionary keys
+        return False
+
+    tmp_path = "%s.%d.tmp" % (path, os.getpid())
+    try:
+        cache_folder = os.path.dirname(path)
+        if not os.path.exists(cache_folder):
+            old_umask = os.umask(0)
+            try:
+                os.makedirs(cache_folder, 0777)
+            finally:
+                os.umask(old_umask)
+        fh = open(tmp_path, "wb")
+        try:
+            fh.write(content)
+        finally:
+            fh.close()
+        if os.path.exists(path):
+            # rename does not overwrite on windows
+            os.remove(path)
+        os.rename(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    return True
+
+def _to_str(data):
+    """
+    Recursively converts unicode strings which only contain ascii characters to str.
+    """
+    if isinstance(data, unicode):
+        try:
+            return data.encode("ascii")
+        except UnicodeError:
+            return data
+    elif isinstance(data, list):
+        return [ _to_str(x) for x in data ]
+    elif isinstance(data, dict):
+        return dict( (_to_str(k), _to_str(v)) for (k, v) in data.iteritems() )
+    return data
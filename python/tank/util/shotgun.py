@@ -21,6 +21,7 @@ from tank_vendor import yaml
 from ..errors import TankError
 from ..platform import constants
 from . import login
+from . import shotgun_cache
 
 g_app_store_connection = None
 
@@ -85,6 +86,7 @@ def __create_sg_connection(shotgun_cfg_path, evaluate_script_user, user="default
     api_script: str
     api_key: str
     http_proxy: str
+    connection_pool_size: int
 
     or may now look like:
 
@@ -102,6 +104,10 @@ def __create_sg_connection(shotgun_cfg_path, evaluate_script_user, user="default
 
     The optional user param refers to the <User> in the shotgun.yml.
     If a user is not found the old style is attempted.
+    
+    The optional connection_pool_size setting controls the maximum number of 
+    connections that the API instance keeps open to the server. The API instance 
+    can be shared by several threads, each making requests on its own connection.
 
     """
 
@@ -133,12 +139,18 @@ def __create_sg_connection(shotgun_cfg_path, evaluate_script_user, user="default
         raise TankError("Missing required field 'api_script' in config '%s'" % shotgun_cfg_path)
     if "api_key" not in config_data:
         raise TankError("Missing required field 'api_key' in config '%s'" % shotgun_cfg_path)
+    
+    pool_size = config_data.get("connection_pool_size")
+    if pool_size is not None and (not isinstance(pool_size, int) or pool_size < 1):
+        raise TankError("Invalid value '%s' for field 'connection_pool_size' in config '%s'. "
+                        "It needs to be a positive integer." % (pool_size, shotgun_cfg_path))
 
     # create API
     sg = Shotgun(config_data["host"],
                  config_data["api_script"],
                  config_data["api_key"],
-                 http_proxy=config_data.get("http_proxy", None))
+                 http_proxy=config_data.get("http_proxy", None),
+                 connection_pool_size=pool_size)
 
     # bolt on our custom user agent manager
     sg.tk_user_agent_handler = ToolkitUserAgentHandler(sg)
@@ -172,6 +184,20 @@ def create_sg_connection(user="default"):
     api_handle, _ = __create_sg_connection(__get_sg_config(), evaluate_script_user=False, user=user)
     return api_handle
 
+def create_cached_sg_connection(cache_path=None):
+    """
+    Creates a standard tank shotgun connection which serves lookups of 
+    rarely changing data, such as storages and the schema, from a cache.
+    See the shotgun_cache module for details. If caching is not enabled,
+    a standard connection is returned.
+    
+    :param cache_path: Optional path to a folder where the cache is stored, 
+                       allowing it to be shared between processes.
+    """
+    if not shotgun_cache.is_shotgun_cache_enabled():
+        return create_sg_connection()
+    return shotgun_cache.CachingShotgun(create_sg_connection(), shotgun_cache.get_cache(cache_path))
+
 def create_sg_app_store_connection():
     """
     Creates a shotgun connection to the tank app store.
@@ -0,0 +1,399 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Read-through cache for Shotgun data which rarely changes.
+
+Storages, publish types, pipeline configurations and the schema are looked up
+over and over again by the core API, even though they hardly ever change. The
+CachingShotgun class wraps a Shotgun API instance and serves these lookups from
+a cache, which can optionally be stored on disk so that it is shared between
+processes. Entries expire after a time to live which is defined per entity type.
+
+On disk, every cached call is stored in its own json file in a folder per entity
+type or schema method. Processes therefore never overwrite each other's entries,
+and invalidating an entity type removes its files for all processes.
+
+Caching is disabled by default. It is enabled by setting the TANK_USE_SHOTGUN_CACHE
+environment variable or by calling enable_shotgun_cache(). Note that while caching
+is enabled, tk.shotgun is a CachingShotgun rather than a shotgun_api3.Shotgun instance.
+
+"""
+
+import os
+import copy
+import time
+import hashlib
+import threading
+
+from . import cache_file
+
+# name of the folder in the pipeline configuration cache where cached shotgun data is stored
+CACHE_FOLDER = "shotgun_cache"
+
+# time to live, in seconds, for cached shotgun data. The results of find() and
+# find_one() are cached for the entity types listed. Schema methods are cached
+# by method name. Everything else is passed straight through to Shotgun.
+CACHE_RULES = {
+    "LocalStorage": 3600,
+    "PublishedFileType": 3600,
+    "TankType": 3600,
+    "PipelineConfiguration": 300,
+    "schema_read": 3600,
+    "schema_entity_read": 3600,
+    "schema_field_read": 3600,
+}
+
+# the rules used for schema methods
+_SCHEMA_RULES = ["schema_read", "schema_entity_read", "schema_field_read"]
+
+# name of the file in each rule folder recording when the rule was last invalidated
+_INVALIDATED_FILE = "invalidated.json"
+
+# environment variable which enables the shotgun cache at startup
+ENABLED_ENV_VAR = "TANK_USE_SHOTGUN_CACHE"
+
+# caches, keyed by the path to their cache folder
+_CACHES = {}
+_enabled = os.environ.get(ENABLED_ENV_VAR) not in [None, "", "0"]
+
+def enable_shotgun_cache(enabled=True):
+    """
+    Enables or disables caching of shotgun data for connections created
+    from now on. See shotgun.create_cached_sg_connection().
+
+    :param enabled: True to enable the cache, False to disable it
+    """
+    global _enabled
+    _enabled = enabled
+
+def is_shotgun_cache_enabled():
+    """
+    Returns True if shotgun data is cached.
+    """
+    return _enabled
+
+def get_cache(path=None):
+    """
+    Returns the shotgun cache stored in the given folder. Caches are shared by
+    everything in the current process which uses the same path.
+
+    :param path: Path to the folder where the cache is stored or None for
+                 a cache which is only held in memory
+    :returns: ShotgunCache instance
+    """
+    cache = _CACHES.get(path)
+    if cache is None:
+        cache = ShotgunCache(path)
+        _CACHES[path] = cache
+    return cache
+
+def clear_caches():
+    """
+    Clears the in-memory shotgun caches. Cache files on disk are left untouched.
+    """
+    _CACHES.clear()
+
+def invalidate_caches(rule=None):
+    """
+    Removes cached results from all caches used in the current process. This 
+    should be called after modifying cached data without going through a 
+    CachingShotgun instance.
+
+    :param rule: entity type or schema method name to remove results for. If
+                 None, everything is removed.
+    """
+    for cache in _CACHES.values():
+        cache.invalidate(rule)
+
+
+class ShotgunCache(object):
+    """
+    Storage for cached shotgun results. Entries are grouped by rule, which is the
+    entity type or schema method name that determines their time to live.
+    
+    Caches without a path are held in memory. Caches with a path read and write
+    their entries on disk every time, so that entries added and invalidated by 
+    other processes are picked up straight away.
+    """
+
+    def __init__(self, path=None, rules=None):
+        """
+        :param path: optional path to a folder where the cache is stored
+        :param rules: optional dictionary of times to live, see CACHE_RULES
+        """
+        self._path = path
+        self._rules = CACHE_RULES if rules is None else rules
+        # in-memory entries and invalidation times, used when there is no path
+        self._entries = {}
+        self._invalidated = {}
+        self._lock = threading.Lock()
+
+    def is_cached(self, rule):
+        """
+        Returns true if results for the given entity type or method are cached.
+        """
+        return rule in self._rules
+
+    def get(self, rule, key):
+        """
+        Looks up a cached result.
+
+        :param rule: entity type or schema method name
+        :param key: string identifying the shotgun call
+        :returns: tuple with a boolean indicating if the result was found and the result
+        """
+        if self._path is None:
+            self._lock.acquire()
+            try:
+                entry = self._entries.get(rule, {}).get(key)
+            finally:
+                self._lock.release()
+        else:
+            entry = self._read_entry(rule, key)
+
+        if entry is None or time.time() - entry[0] >= self._rules.get(rule, 0):
+            return (False, None)
+
+        # callers are free to modify the returned data
+        return (True, copy.deepcopy(entry[1]))
+
+    def set(self, rule, key, value, fetch_time):
+        """
+        Stores a result in the cache, unless the rule has been invalidated
+        since the result was fetched.
+
+        :param rule: entity type or schema method name
+        :param key: string identifying the shotgun call
+        :param value: result of the shotgun call
+        :param fetch_time: time at which the shotgun call was made
+        """
+        if fetch_time < self._get_invalidated_time(rule):
+            return
+        
+        if self._path is None:
+            self._lock.acquire()
+            try:
+                self._entries.setdefault(rule, {})[key] = (fetch_time, copy.deepcopy(value))
+            finally:
+                self._lock.release()
+        else:
+            data = {"key": key, "time": fetch_time, "value": value}
+            cache_file.write_cache_file(self._get_entry_path(rule, key), data)
+
+    def invalidate(self, rule=None):
+        """
+        Removes cached results.
+
+        :param rule: entity type or schema method name to remove results for. If
+                     None, everything is removed.
+        """
+        rules = [ r for r in self._rules if rule is None or r == rule ]
+        now = time.time()
+        
+        if self._path is None:
+            self._lock.acquire()
+            try:
+                for r in rules:
+                    self._invalidated[r] = now
+                    self._entries.pop(r, None)
+            finally:
+                self._lock.release()
+            return
+        
+        for r in rules:
+            rule_folder = os.path.join(self._path, r)
+            # record the invalidation first, so that results fetched before it
+            # are not stored while the existing entries are being removed
+            cache_file.write_cache_file(os.path.join(rule_folder, _INVALIDATED_FILE), {"time": now})
+            if not os.path.exists(rule_folder):
+                continue
+            for file_name in os.listdir(rule_folder):
+                if file_name == _INVALIDATED_FILE:
+                    continue
+                try:
+                    os.remove(os.path.join(rule_folder, file_name))
+                except OSError:
+                    # another process may have removed it already
+                    pass
+
+    def _get_entry_path(self, rule, key):
+        """
+        Returns the path to the file storing the entry for a key.
+        """
+        return os.path.join(self._path, rule, "%s.json" % hashlib.md5(key).hexdigest())
+
+    def _get_invalidated_time(self, rule):
+        """
+        Returns the time at which the rule was last invalidated, or 0.
+        """
+        if self._path is None:
+            return self._invalidated.get(rule, 0)
+        
+        data = cache_file.read_cache_file(os.path.join(self._path, rule, _INVALIDATED_FILE))
+        if isinstance(data, dict) and isinstance(data.get("time"), (int, float)):
+            return data["time"]
+        return 0
+
+    def _read_entry(self, rule, key):
+        """
+        Reads the entry for a key from disk. The cache folder is writable by
+        everyone, so the data is checked before it is used.
+        
+        :returns: (time, value) tuple or None if there is no valid entry
+        """
+        data = cache_file.read_cache_file(self._get_entry_path(rule, key))
+        if (not isinstance(data, dict) 
+            or data.get("key") != key 
+            or not isinstance(data.get("time"), (int, float))
+            or not (data.get("value") is None or isinstance(data.get("value"), (list, dict)))):
+            return None
+        return (data["time"], data["value"])
+
+
+class CachingShotgun(object):
+    """
+    Wraps a Shotgun API instance, serving lookups of rarely changing data from a
+    ShotgunCache. Creating, updating or deleting entities of a cached entity type
+    through the wrapper invalidates the cached results for that entity type, both
+    in the wrapper's cache and in any other cache used in the current process.
+    Everything else, including setting attributes such as config settings, is 
+    passed through to the Shotgun API instance.
+    
+    Note that the wrapper is not a shotgun_api3.Shotgun instance itself. Use
+    get_wrapped_api() to access the Shotgun API instance directly.
+    """
+
+    def __init__(self, sg, cache):
+        """
+        :param sg: Shotgun API instance
+        :param cache: ShotgunCache instance
+        """
+        self.__dict__["_CachingShotgun__sg"] = sg
+        self.__dict__["_CachingShotgun__cache"] = cache
+
+    def __getattr__(self, name):
+        return getattr(self.__sg, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.__sg, name, value)
+
+    def get_wrapped_api(self):
+        """
+        Returns the Shotgun API instance which is wrapped.
+        """
+        return self.__sg
+
+    def invalidate_cache(self, entity_type=None):
+        """
+        Removes cached results, forcing them to be read from Shotgun next time.
+
+        :param entity_type: entity type or schema method name to remove results
+                            for. If None, everything is removed.
+        """
+        self.__invalidate(entity_type)
+
+    def find(self, entity_type, *args, **kwargs):
+        return self.__cached_call(entity_type, "find", entity_type, *args, **kwargs)
+
+    def find_one(self, entity_type, *args, **kwargs):
+        return self.__cached_call(entity_type, "find_one", entity_type, *args, **kwargs)
+
+    def schema_read(self, *args, **kwargs):
+        return self.__cached_call("schema_read", "schema_read", *args, **kwargs)
+
+    def schema_entity_read(self, *args, **kwargs):
+        return self.__cached_call("schema_entity_read", "schema_entity_read", *args, **kwargs)
+
+    def schema_field_read(self, *args, **kwargs):
+        return self.__cached_call("schema_field_read", "schema_field_read", *args, **kwargs)
+
+    def create(self, entity_type, *args, **kwargs):
+        self.__invalidate(entity_type)
+        return self.__sg.create(entity_type, *args, **kwargs)
+
+    def update(self, entity_type, *args, **kwargs):
+        self.__invalidate(entity_type)
+        return self.__sg.update(entity_type, *args, **kwargs)
+
+    def delete(self, entity_type, *args, **kwargs):
+        self.__invalidate(entity_type)
+        return self.__sg.delete(entity_type, *args, **kwargs)
+
+    def revive(self, entity_type, *args, **kwargs):
+        self.__invalidate(entity_type)
+        return self.__sg.revive(entity_type, *args, **kwargs)
+
+    def batch(self, requests):
+        for request in requests:
+            if request.get("entity_type"):
+                self.__invalidate(request["entity_type"])
+        return self.__sg.batch(requests)
+
+    def schema_field_create(self, *args, **kwargs):
+        return self.__schema_write("schema_field_create", *args, **kwargs)
+
+    def schema_field_update(self, *args, **kwargs):
+        return self.__schema_write("schema_field_update", *args, **kwargs)
+
+    def schema_field_delete(self, *args, **kwargs):
+        return self.__schema_write("schema_field_delete", *args, **kwargs)
+
+    def __schema_write(self, method, *args, **kwargs):
+        """
+        Calls a schema modification method, invalidating all cached schema data.
+        """
+        for rule in _SCHEMA_RULES:
+            self.__invalidate(rule)
+        return getattr(self.__sg, method)(*args, **kwargs)
+
+    def __invalidate(self, rule):
+        """
+        Invalidates a rule in all caches. Lookups made without a pipeline 
+        configuration use a separate in-memory cache, which would otherwise 
+        keep serving the old data.
+        """
+        self.__cache.invalidate(rule)
+        for cache in _CACHES.values():
+            if cache is not self.__cache:
+                cache.invalidate(rule)
+
+    def __cached_call(self, rule, method, *args, **kwargs):
+        """
+        Calls a shotgun method, using the cache if the rule is cached.
+        """
+        sg_method = getattr(self.__sg, method)
+        if not self.__cache.is_cached(rule):
+            return sg_method(*args, **kwargs)
+
+        key = repr( (self.__get_identity(), method, args, sorted(kwargs.items())) )
+        (found, value) = self.__cache.get(rule, key)
+        if found:
+            return value
+
+        fetch_time = time.time()
+        value = sg_method(*args, **kwargs)
+        # shotgun returns standard python data, don't attempt to cache anything else
+        if value is None or isinstance(value, (list, dict)):
+            self.__cache.set(rule, key, value, fetch_time)
+        return value
+
+    def __get_identity(self):
+        """
+        Returns the site and login that calls are made with. Results depend on the 
+        permissions of the login, so they are only shared between identical logins.
+        """
+        config = getattr(self.__sg, "config", None)
+        identity = [getattr(self.__sg, "base_url", None),
+                    getattr(config, "script_name", None),
+                    getattr(config, "user_login", None),
+                    getattr(config, "sudo_as_login", None)]
+        # only keep actual values, not any attributes made up by mock objects
+        return tuple([ x if isinstance(x, basestring) else None for x in identity ])
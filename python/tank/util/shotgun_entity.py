@@ -15,6 +15,7 @@ Utilities relating to shotgun entities
 import copy
 import re
 
+from .. import hook
 from ..platform import constants
 from ..errors import TankError
 
@@ -44,6 +45,45 @@ def sg_entity_to_string(tk, sg_entity_type, sg_id, sg_field_name, data):
                            field_name=sg_field_name,
                            value=data)
 
+def sg_entity_values_to_strings(tk, sg_entity_type, items):
+    """
+    Batch version of sg_entity_to_string(), converting many values for 
+    a given entity type using a single hook instance.
+    
+    If the process_folder_name hook implements an execute_batch() method,
+    all the values are passed to it in a single call. Hooks which only implement 
+    execute() are called once for each value.
+    
+    :param tk: Sgtk api instance
+    :param sg_entity_type: the shotgun entity type e.g. 'Shot'
+    :param items: list of (entity_id, field_name, value) tuples, see sg_entity_to_string()
+    :returns: list of strings, one for each item
+    """
+    if not items:
+        return []
+    
+    hook_path = tk.pipeline_configuration.get_core_hook_path(constants.PROCESS_FOLDER_NAME_HOOK_NAME)
+    hook_obj = hook.get_hook_class(hook_path)(tk)
+    
+    # the hook is not run through tk.execute_hook(), so report the calls 
+    # explicitly when running as part of a folder creation report
+    count = getattr(tk, "count", None)
+    
+    if hasattr(hook_obj, "execute_batch"):
+        if count:
+            count("hooks", constants.PROCESS_FOLDER_NAME_HOOK_NAME)
+        batch = [ {"entity_id": sg_id, "field_name": field_name, "value": data} 
+                  for (sg_id, field_name, data) in items ]
+        return hook_obj.execute_batch(entity_type=sg_entity_type, items=batch)
+    
+    # backwards compatibility with hooks that convert one value at a time
+    if count:
+        count("hooks", constants.PROCESS_FOLDER_NAME_HOOK_NAME, len(items))
+    return [ hook_obj.execute(entity_type=sg_entity_type, 
+                              entity_id=sg_id, 
+                              field_name=field_name, 
+                              value=data) for (sg_id, field_name, data) in items ]
+
 
 class EntityExpression(object):
     """
@@ -76,6 +116,13 @@ class EntityExpression(object):
         self._entity_type = entity_type
         self._field_name_expr = field_name_expr
         
+        # compile the expression used to validate generated names
+        if self._entity_type == "Project":
+            # allow slashes in project names
+            self._name_regex = re.compile(constants.VALID_SG_PROJECT_NAME_REGEX, re.UNICODE)
+        else:
+            self._name_regex = re.compile(constants.VALID_SG_ENTITY_NAME_REGEX, re.UNICODE)
+        
         # now validate
         if "{" not in field_name_expr:
             # simple form - surround with brackets to turn into a expression
@@ -106,8 +153,13 @@ class EntityExpression(object):
                 if "." in field:
                     entity_links.add( field.split(".")[0] )
                 
+            # change format from {xxx} to %(xxx)s for value substitution.
+            adjusted_expr = v.replace("{", "%(").replace("}", ")s")
+                
             # add this to our variations dict
-            self._variations[v] = {"entity_links": entity_links, "fields": fields}
+            self._variations[v] = {"entity_links": entity_links, 
+                                   "fields": fields, 
+                                   "adjusted_expr": adjusted_expr}
                 
     
     def _get_expression_variations(self, definition):
@@ -178,75 +230,90 @@ class EntityExpression(object):
         :param values: dictionary of values to use 
         :returns: fully resolved name string
         """
-                
+        return self.generate_names([values])[0]
+    
+    def generate_names(self, values_list):
+        """
+        Generates names for a list of entities. This is equivalent to calling
+        generate_name() for each item, but all the shotgun values are converted
+        to strings using a single call to the process_folder_name hook.
+        
+        :param values_list: list of dictionaries of values to use
+        :returns: list of fully resolved name strings
+        """
         # first make sure that each field is valid
         for field_name in self.get_shotgun_fields():
-            if field_name not in values:
-                # required value was not provided!
-                raise TankError("Folder Configuration Error: "
-                                "A Shotgun field '%s' is being requested as part of the expression "
-                                "'%s' when creating folders connected to entities of type %s, "
-                                "however no such field exists in Shotgun. Please review your "
-                                "configuration!" % (field_name, self._field_name_expr, self._entity_type))
-            
-        # ok all fields are there. But some values may be none. Try to resolve our expression against
-        # the values, starting with the longest expression first.
-        for expr in self._sorted_exprs:
-            val = self._generate_name(expr, values)
-            if val is not None:
-                # name generation worked! - do not try alternative (shorter) expressions
-                break
+            for values in values_list:
+                if field_name not in values:
+                    # required value was not provided!
+                    raise TankError("Folder Configuration Error: "
+                                    "A Shotgun field '%s' is being requested as part of the expression "
+                                    "'%s' when creating folders connected to entities of type %s, "
+                                    "however no such field exists in Shotgun. Please review your "
+                                    "configuration!" % (field_name, self._field_name_expr, self._entity_type))
         
-        if val is None:
-            # completely failed to generate a name because of missing fields.
-            
-            # try to make a nice descriptive name if possible
-            if "code" in values:
-                nice_name = "%s %s (id %s)" % (self._entity_type, values["code"], values["id"])
+        # ok all fields are there. But some values may be none. Find the longest
+        # expression for each entity where all values are present.
+        exprs = [ self._get_expression(values) for values in values_list ]
+        
+        # now convert all the shotgun values to strings in one go
+        conversions = []
+        for (expr, values) in zip(exprs, values_list):
+            # get the shotgun id from the shotgun entity dict
+            sg_id = values.get("id")
+            for field_name in self._variations[expr]["fields"]:
+                conversions.append( (sg_id, field_name, values.get(field_name)) )
+        str_values = sg_entity_values_to_strings(self._tk, self._entity_type, conversions)
+        
+        names = []
+        idx = 0
+        for expr in exprs:
+            str_data = {}
+            for field_name in self._variations[expr]["fields"]:
+                str_data[field_name] = str_values[idx]
+                idx += 1
+            names.append(self._generate_name(expr, str_data))
+        
+        return names
+    
+    def _get_expression(self, values):
+        """
+        Returns the longest expression for which all the values are present.
+        """
+        for expr in self._sorted_exprs:
+            for field_name in self._variations[expr]["fields"]:
+                if values.get(field_name) is None:
+                    # cannot resolve this!
+                    break
             else:
-                nice_name = "%s %s" % (self._entity_type, values["id"])
-            
-            raise TankError("Folder Configuration Error. Could not create folders for %s! "
-                            "The expression %s refers to one or more values that are blank "
-                            "in Shotgun and a folder can therefore "
-                            "not be created." % (nice_name, self._field_name_expr))
+                # name generation will work! - do not try alternative (shorter) expressions
+                return expr
         
-        return val 
-
+        # completely failed to generate a name because of missing fields.
+        
+        # try to make a nice descriptive name if possible
+        if "code" in values:
+            nice_name = "%s %s (id %s)" % (self._entity_type, values["code"], values["id"])
+        else:
+            nice_name = "%s %s" % (self._entity_type, values["id"])
+        
+        raise TankError("Folder Configuration Error. Could not create folders for %s! "
+                        "The expression %s refers to one or more values that are blank "
+                        "in Shotgun and a folder can therefore "
+                        "not be created." % (nice_name, self._field_name_expr))
     
-    def _generate_name(self, expression, values):
+    def _generate_name(self, expression, str_data):
         """
         Generates a name given some fields.
         
         Assumes the name will be used as a folder name and validates
         that the evaluated expression is suitable for disk use.
         
-        :param values: dictionary of values to use 
+        :param expression: expression to use
+        :param str_data: dictionary of values to use, converted to strings 
         :returns: fully resolved name string
         """
-
-        fields = self._variations[expression]["fields"]
-        
-        # convert shotgun values to string values
-        str_data = {}
-        
-        # get the shotgun id from the shotgun entity dict
-        sg_id = values.get("id")
-        
-        # first make sure that each field is valid
-        for field_name in fields:
-            # get value from shotgun data dict
-            raw_val = values.get(field_name)
-            if raw_val is None:
-                # cannot resolve this!
-                return None
-                
-            # now cast the value to a string
-            str_data[field_name] = sg_entity_to_string(self._tk, self._entity_type, sg_id, field_name, raw_val)
-            
-        
-        # change format from {xxx} to %(xxx)s for value substitution.
-        adjusted_expr = expression.replace("{", "%(").replace("}", ")s")
+        adjusted_expr = self._variations[expression]["adjusted_expr"]
 
         # just to be sure, make sure to catch any exceptions here
         # and produce a more sensible error message.
@@ -271,17 +338,9 @@ class EntityExpression(object):
         """
         Check that the name meets basic file system naming standards.
         """    
-        
-        if self._entity_type == "Project":
-            # allow slashes in project names
-            exp = re.compile(constants.VALID_SG_PROJECT_NAME_REGEX, re.UNICODE)
-        else:
-            exp = re.compile(constants.VALID_SG_ENTITY_NAME_REGEX, re.UNICODE)    
-        
         if isinstance(name, unicode):
-            return bool(exp.match(name))
+            return bool(self._name_regex.match(name))
         else:
             # try decoding from utf-8:
             u_name = name.decode("utf-8")
-            return bool(exp.match(u_name))
-
+            return bool(self._name_regex.match(u_name))
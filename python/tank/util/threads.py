@@ -0,0 +1,75 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Helper methods for running work concurrently in a bounded number of threads.
+
+"""
+
+import sys
+import Queue
+import threading
+
+
+def map_in_threads(fn, items, max_threads):
+    """
+    Applies fn to each item using a bounded pool of worker threads and returns
+    the results in the same order as the items were passed in.
+
+    If fn raises an exception for one or more items, the exception for the first
+    failing item (in item order) is re-raised in the calling thread once all
+    items have been processed.
+
+    If max_threads is 1 or less, everything is executed in the calling thread.
+
+    :param fn: Function taking a single item as its argument
+    :param items: List of items to process
+    :param max_threads: Maximum number of worker threads to use
+    :returns: List of results, one for each item
+    """
+    items = list(items)
+
+    if max_threads <= 1 or len(items) <= 1:
+        # nothing to gain from threading
+        return [ fn(x) for x in items ]
+
+    results = [None] * len(items)
+    errors = [None] * len(items)
+
+    work_queue = Queue.Queue()
+    for idx in range(len(items)):
+        work_queue.put(idx)
+
+    def worker():
+        while True:
+            try:
+                idx = work_queue.get_nowait()
+            except Queue.Empty:
+                return
+            try:
+                results[idx] = fn(items[idx])
+            except:
+                errors[idx] = sys.exc_info()
+
+    threads = []
+    for x in range(min(max_threads, len(items))):
+        t = threading.Thread(target=worker)
+        t.setDaemon(True)
+        t.start()
+        threads.append(t)
+
+    for t in threads:
+        t.join()
+
+    for exc_info in errors:
+        if exc_info is not None:
+            raise exc_info[0], exc_info[1], exc_info[2]
+
+    return results
@@ -42,6 +42,7 @@ import re
 import copy
 import stat         # used for attachment upload
 import sys
+import threading
 import time
 import types
 import urllib
@@ -193,6 +194,147 @@ class _Config(object):
         self.session_token = None
         self.authorization = None
         self.no_ssl_validation = False
+        # maximum number of keep-alive connections to the server
+        self.connection_pool_size = 4
+        # maximum number of pages that find() reads at the same time
+        self.max_parallel_pages = 4
+
+class _ConnectionPool(object):
+    """Bounded pool of keep-alive connections.
+
+    Connections are created on demand and checked out for the duration of a
+    single request, which allows one client to be used by several threads.
+    When all connections are in use, callers wait for one to be returned.
+    """
+
+    def __init__(self, factory, max_size):
+        """
+        :param factory: Callable which returns a new Http connection.
+
+        :param max_size: Maximum number of connections in the pool.
+        """
+        self._factory = factory
+        self._max_size = max(1, max_size)
+        self._idle = []
+        self._size = 0
+        self._condition = threading.Condition()
+
+    def checkout(self):
+        """Returns an idle connection, creating one if the pool is not full.
+        """
+        self._condition.acquire()
+        try:
+            while not self._idle and self._size >= self._max_size:
+                self._condition.wait()
+            if self._idle:
+                return self._idle.pop()
+            # reserve a slot and create the connection outside the lock
+            self._size += 1
+        finally:
+            self._condition.release()
+
+        try:
+            return self._factory()
+        except:
+            self._release(None)
+            raise
+
+    def checkin(self, conn):
+        """Returns a connection to the pool after use.
+        """
+        self._condition.acquire()
+        try:
+            self._idle.append(conn)
+            self._condition.notify()
+        finally:
+            self._condition.release()
+
+    def discard(self, conn):
+        """Closes a connection which failed rather than returning it to the pool.
+        """
+        self._release(conn)
+
+    def close(self):
+        """Closes all idle connections.
+
+        Connections which are checked out are returned to the pool as normal.
+        """
+        self._condition.acquire()
+        try:
+            idle = self._idle
+            self._idle = []
+            self._size -= len(idle)
+            self._condition.notifyAll()
+        finally:
+            self._condition.release()
+
+        for conn in idle:
+            self._close(conn)
+
+    def _release(self, conn):
+        """Frees the slot held by a connection and closes it.
+        """
+        self._condition.acquire()
+        try:
+            self._size -= 1
+            self._condition.notify()
+        finally:
+            self._condition.release()
+
+        if conn is not None:
+            self._close(conn)
+
+    def _close(self, conn):
+        """Closes the sockets held by a Http connection.
+        """
+        for c in conn.connections.values():
+            try:
+                c.close()
+            except Exception:
+                pass
+        conn.connections.clear()
+
+class _PageRead(object):
+    """A read of a single page of records, optionally made in a background
+    thread so that the next page can be fetched while the current one is
+    being processed.
+    """
+
+    def __init__(self, sg, params, background):
+        """
+        :param sg: Shotgun instance to read from.
+
+        :param params: Read parameters for the page.
+
+        :param background: If True, start reading in a background thread.
+        """
+        self._sg = sg
+        self._params = params
+        self._entities = None
+        self._error = None
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._read)
+            self._thread.setDaemon(True)
+            self._thread.start()
+
+    def _read(self):
+        try:
+            self._entities = self._sg._call_rpc("read", self._params).get("entities", [])
+        except Exception:
+            self._error = sys.exc_info()
+
+    def get_entities(self):
+        """Returns the unparsed records on the page, waiting for the read to
+        complete if needed.
+        """
+        if self._thread is None:
+            self._read()
+        else:
+            self._thread.join()
+        if self._error:
+            raise self._error[0], self._error[1], self._error[2]
+        return self._entities
 
 class Shotgun(object):
     """Shotgun Client Connection"""
@@ -214,7 +356,8 @@ class Shotgun(object):
                  http_proxy=None,
                  ensure_ascii=True,
                  connect=True,
-				 ca_certs=None):
+				 ca_certs=None,
+                 connection_pool_size=None):
         """Initialises a new instance of the Shotgun client.
 
         :param base_url: http or https url to the shotgun server.
@@ -238,6 +381,10 @@ class Shotgun(object):
 		
 		:param ca_certs: The path to the SSL certificate file. Useful for users
 		who would like to package their application into an executable.
+
+        :param connection_pool_size: Optional, maximum number of keep-alive
+        connections to the server. Requests are sent over a pool of
+        connections, so the client can be shared by several threads.
         """
 
         self.config = _Config()
@@ -245,8 +392,11 @@ class Shotgun(object):
         self.config.script_name = script_name
         self.config.convert_datetimes_to_utc = convert_datetimes_to_utc
         self.config.no_ssl_validation = NO_SSL_VALIDATION
-        self._connection = None
+        if connection_pool_size:
+            self.config.connection_pool_size = connection_pool_size
         self.__ca_certs = ca_certs
+        self._connection_pool = _ConnectionPool(self._create_connection,
+            self.config.connection_pool_size)
 
         self.base_url = (base_url or "").lower()
         self.config.scheme, self.config.server, api_base, _, _ = \
@@ -326,12 +476,11 @@ class Shotgun(object):
         NOTE: The client will automatically connect to the server. Only
         call this function if you wish to confirm the client can connect.
         """
-        self._get_connection()
         self.info()
         return
 
     def close(self):
-        """Closes the current connection to the server.
+        """Closes the idle connections to the server.
 
         If the client needs to connect again it will do so automatically.
         """
@@ -459,12 +608,184 @@ class Shotgun(object):
             if len(records) == result["paging_info"]["entity_count"]:
                 break
 
+            if self.config.max_parallel_pages > 1:
+                # now that the total is known, read the remaining pages at the
+                # same time rather than one after the other
+                records.extend(self._read_pages(params,
+                    result["paging_info"]["entity_count"], limit))
+                if limit:
+                    records = records[:limit]
+                break
+
             params['paging']['current_page'] += 1
             result = self._call_rpc("read", params)
 
         return self._parse_records(records)
 
+    def _read_pages(self, params, entity_count, limit):
+        """Reads the pages following the current page concurrently, using up
+        to config.max_parallel_pages threads.
+
+        :param params: Read parameters, as used for the current page.
+
+        :param entity_count: Total number of entities matching the query.
+
+        :param limit: Maximum number of entities to return, or 0 for all.
+
+        :returns: list of the entities on the pages, in page order.
+        """
+        per_page = params["paging"]["entities_per_page"]
+        total = entity_count
+        if limit:
+            total = min(total, limit)
+        last_page = (total + per_page - 1) // per_page
+        pages = range(params["paging"]["current_page"] + 1, last_page + 1)
+
+        results = {}
+        errors = []
+        pending = list(reversed(pages))
+        lock = threading.Lock()
+
+        def _read_worker():
+            while True:
+                lock.acquire()
+                try:
+                    if errors or not pending:
+                        return
+                    page = pending.pop()
+                finally:
+                    lock.release()
+
+                page_params = dict(params)
+                page_params["return_paging_info"] = False
+                page_params["paging"] = dict(params["paging"])
+                page_params["paging"]["current_page"] = page
+                try:
+                    entities = self._call_rpc("read", page_params).get("entities", [])
+                except Exception:
+                    lock.acquire()
+                    try:
+                        errors.append(sys.exc_info())
+                    finally:
+                        lock.release()
+                    return
+                results[page] = entities
+
+        threads = []
+        for i in range(min(self.config.max_parallel_pages, len(pages))):
+            thread = threading.Thread(target=_read_worker)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0][0], errors[0][1], errors[0][2]
+
+        # reassemble in order. Stop at the first empty page, in case
+        # entities were removed while the pages were read
+        records = []
+        for page in pages:
+            if not results[page]:
+                break
+            records.extend(results[page])
+        return records
+
+
+
+    def find_iter(self, entity_type, filters, fields=None, order=None,
+        filter_operator=None, retired_only=False, page_size=None,
+        id_cursor=False, prefetch=True):
+        """Find entities matching the given filters, returning them one page
+        at a time.
+
+        Unlike find(), only a single page of records is held in memory at a
+        time, which makes it suitable for very large queries. While a page
+        is being processed by the caller, the next page is read in the
+        background.
+
+        :param entity_type: Required, entity type (string) to find.
+
+        :param filters: Required, list of filters to apply.
+
+        :param fields: Optional list of fields from the matched entities to
+        return. Defaults to id.
+
+        :param order: Optional list of fields to order the results by, see
+        find(). Cannot be used together with id_cursor.
+
+        :param filter_operator: Optional operator to apply to the filters,
+        supported values are 'all' and 'any'. Defaults to 'all'.
+
+        :param retired_only: Optional flag to return only entities that have
+        been retired. Defaults to False.
+
+        :param page_size: Optional, number of entities per page. Defaults to
+        config.records_per_page.
+
+        :param id_cursor: Optional, if True, entities are returned in id
+        order and each page is read as the entities with an id greater than
+        the last one on the previous page. Unlike page numbers, this is not
+        affected by entities being created or removed during the query.
+
+        :param prefetch: Optional, if False, the next page is only read once
+        the caller asks for it. Defaults to True.
+
+        :returns: generator yielding lists of dicts for each entity with the
+        requested fields, and their id and type.
+        """
+        page_size = page_size or self.config.records_per_page
+        if not isinstance(page_size, int) or page_size < 1:
+            raise ValueError("page_size parameter must be a positive integer")
+
+        if isinstance(filters, (list, tuple)):
+            filters = _translate_filters(filters, filter_operator)
+        elif filter_operator:
+            raise ShotgunError("Deprecated: Use of filter_operator for find()"
+                " is not valid any more. See the documentation on find()")
+
+        if id_cursor:
+            if order:
+                raise ShotgunError("order cannot be used together with "
+                    "id_cursor, entities are returned in id order")
+            order = [{"field_name": "id", "direction": "asc"}]
+
+        params = self._construct_read_parameters(entity_type,
+                                                 fields,
+                                                 filters,
+                                                 retired_only,
+                                                 order)
+        params["return_paging_info"] = False
+        params["paging"]["entities_per_page"] = page_size
+
+        if self.server_caps.version and self.server_caps.version >= (3, 3, 0):
+            params['api_return_image_urls'] = True
+
+        page = 1
+        read = _PageRead(self, params, False)
+        while read:
+            entities = read.get_entities()
+
+            # a full page means that there may be more, so start reading
+            # the next page before handing this one over to the caller
+            read = None
+            if len(entities) == page_size:
+                page += 1
+                page_params = dict(params)
+                if id_cursor:
+                    page_params["filters"] = {
+                        "logical_operator": "and",
+                        "conditions": [filters, {"path": "id",
+                            "relation": "greater_than",
+                            "values": [entities[-1]["id"]]}]
+                    }
+                else:
+                    page_params["paging"] = dict(params["paging"])
+                    page_params["paging"]["current_page"] = page
+                read = _PageRead(self, page_params, prefetch)
 
+            if entities:
+                yield self._parse_records(entities)
 
     def _construct_read_parameters(self,
                                    entity_type,
@@ -1360,9 +1681,16 @@ class Shotgun(object):
         LOG.debug("Request headers are %s" % headers)
         LOG.debug("Request body is %s" % body)
 
-        conn = self._get_connection()
-        resp, content = conn.request(url, method=verb, body=body,
-            headers=headers)
+        # each request uses its own connection from the pool, so that
+        # requests from several threads can be made at the same time
+        conn = self._connection_pool.checkout()
+        try:
+            resp, content = conn.request(url, method=verb, body=body,
+                headers=headers)
+        except:
+            self._connection_pool.discard(conn)
+            raise
+        self._connection_pool.checkin(conn)
         #http response code is handled else where
         http_status = (resp.status, resp.reason)
         resp_headers = dict(
@@ -1558,37 +1886,22 @@ class Shotgun(object):
     # ========================================================================
     # Connection Functions
 
-    def _get_connection(self):
-        """Returns the current connection or creates a new connection to the
-        current server.
+    def _create_connection(self):
+        """Creates a new connection to the current server.
         """
-        if self._connection is not None:
-            return self._connection
-
         if self.config.proxy_server:
             pi = ProxyInfo(socks.PROXY_TYPE_HTTP, self.config.proxy_server,
                  self.config.proxy_port, proxy_user=self.config.proxy_user,
                  proxy_pass=self.config.proxy_pass)
-            self._connection = Http(timeout=self.config.timeout_secs, ca_certs=self.__ca_certs,
+            return Http(timeout=self.config.timeout_secs, ca_certs=self.__ca_certs,
                 proxy_info=pi, disable_ssl_certificate_validation=self.config.no_ssl_validation)
         else:
-            self._connection = Http(timeout=self.config.timeout_secs, ca_certs=self.__ca_certs,
+            return Http(timeout=self.config.timeout_secs, ca_certs=self.__ca_certs,
                 disable_ssl_certificate_validation=self.config.no_ssl_validation)
 
-        return self._connection
-
     def _close_connection(self):
-        """Closes the current connection."""
-        if self._connection is None:
-            return
-
-        for conn in self._connection.connections.values():
-            try:
-                conn.close()
-            except Exception:
-                pass
-        self._connection.connections.clear()
-        self._connection = None
+        """Closes the idle connections in the pool."""
+        self._connection_pool.close()
         return
     # ========================================================================
     # Utility
@@ -233,19 +233,78 @@ def _run_shotgun_command(log, tk, action_name, entity_type, entity_ids):
                     "initializing it.")
 
 
+def _read_shotgun_cache_fingerprint(fingerprint_path):
+    """
+    Returns the fingerprint stored alongside a shotgun cache menu file, 
+    or None if there is no fingerprint.
+    """
+    if not os.path.exists(fingerprint_path):
+        return None
+    try:
+        fh = open(fingerprint_path, "rt")
+        try:
+            return fh.read().strip()
+        finally:
+            fh.close()
+    except Exception:
+        return None
+
+
+def _write_cache_file(path, data):
+    """
+    Writes a file to the cache folder, creating it with open permissions.
+    """
+    # if file does not exist, make sure it is created with open permissions
+    cache_file_created = False
+    if not os.path.exists(path):
+        cache_file_created = True
+
+    # Write to cache file
+    # Note that we are using binary form here to ensure that the line
+    # endings are written out consistently on all different OSes
+    # otherwise with wt mode, \n on windows will be turned into \n\r 
+    # which is not interpreted correctly by the jacascript code.
+    f = open(path, "wb")
+    f.write(data)
+    f.close()
+
+    # make sure cache file has proper permissions
+    if cache_file_created:
+        old_umask = os.umask(0)
+        try:
+            os.chmod(path, 0666)
+        finally:
+            os.umask(old_umask)
+
+
 def _write_shotgun_cache(tk, entity_type, cache_file_name):
     """
     Writes a shotgun cache menu file to disk.
     The cache is per type and per operating system
+    
+    A fingerprint of the configuration is stored next to the cache file and
+    the cache is only regenerated if the fingerprint has changed. 
+    
+    Returns True if the cache file was written, False if it was up to date.
     """
 
     cache_path = os.path.join(tk.pipeline_configuration.get_cache_location(), cache_file_name)
+    fingerprint_path = "%s.fingerprint" % os.path.splitext(cache_path)[0]
+    
+    fingerprint = engine.get_shotgun_cache_fingerprint(tk, entity_type)
+    if (fingerprint is not None 
+        and os.path.exists(cache_path) 
+        and _read_shotgun_cache_fingerprint(fingerprint_path) == fingerprint):
+        # nothing has changed since the cache was generated
+        return False
 
     # start the shotgun engine, load the apps
     e = engine.start_shotgun_engine(tk, entity_type)
-
-    # get list of actions
-    engine_commands = e.commands
+    try:
+        # get list of actions
+        engine_commands = dict(e.commands)
+    finally:
+        e.destroy()
 
     # insert special system commands
     if entity_type == "Project":
@@ -289,30 +348,15 @@ def _write_shotgun_cache(tk, entity_type, cache_file_name):
     data = "\n".join(res)
 
     try:
-        # if file does not exist, make sure it is created with open permissions
-        cache_file_created = False
-        if not os.path.exists(cache_path):
-            cache_file_created = True
-
-        # Write to cache file
-        # Note that we are using binary form here to ensure that the line
-        # endings are written out consistently on all different OSes
-        # otherwise with wt mode, \n on windows will be turned into \n\r 
-        # which is not interpreted correctly by the jacascript code.
-        f = open(cache_path, "wb")
-        f.write(data)
-        f.close()
-
-        # make sure cache file has proper permissions
-        if cache_file_created:
-            old_umask = os.umask(0)
-            try:
-                os.chmod(cache_path, 0666)
-            finally:
-                os.umask(old_umask)
-
+        _write_cache_file(cache_path, data)
+        if fingerprint is not None:
+            _write_cache_file(fingerprint_path, fingerprint)
+        elif os.path.exists(fingerprint_path):
+            os.remove(fingerprint_path)
     except Exception, e:
         raise TankError("Could not write to cache file %s: %s" % (cache_path, e))
+    
+    return True
 
 
 def shotgun_cache_actions(log, install_root, pipeline_config_root, args):
@@ -335,20 +379,23 @@ def shotgun_cache_actions(log, install_root, pipeline_config_root, args):
     except TankError, e:
         raise TankError("Could not instantiate an Sgtk API Object! Details: %s" % e )
 
-    # params: entity_type, cache_file_name
-    if len(args) != 2:
-        raise TankError("Invalid arguments! Pass entity_type, cache_file_name")
-
-    entity_type = args[0]
-    cache_file_name = args[1]
+    # params: entity_type, cache_file_name - optionally repeated in order
+    # to generate the caches for several entity types in one go
+    if len(args) < 2 or len(args) % 2 != 0:
+        raise TankError("Invalid arguments! Pass entity_type, cache_file_name "
+                        "[, entity_type, cache_file_name, ...]")
 
     num_log_messages_before = log.handlers[0].formatter.get_num_items()
-    try:
-        _write_shotgun_cache(tk, entity_type, cache_file_name)
-    except TankError, e:
-        log.error("Error writing shotgun cache file: %s" % e)
-    except Exception, e:
-        log.exception("A general error occurred.")
+    for idx in range(0, len(args), 2):
+        entity_type = args[idx]
+        cache_file_name = args[idx+1]
+        try:
+            if not _write_shotgun_cache(tk, entity_type, cache_file_name):
+                log.debug("Shotgun cache file %s is up to date." % cache_file_name)
+        except TankError, e:
+            log.error("Error writing shotgun cache file: %s" % e)
+        except Exception, e:
+            log.exception("A general error occurred.")
     num_log_messages_after = log.handlers[0].formatter.get_num_items()
 
     # check if there were any log output. This is an indication that something
@@ -18,5 +18,8 @@ import tank
 class TestApp(Application):
     
     def init_app(self):
-        pass
+        self.engine.register_command("test_command", self.run_test_command, {"short_name": "test"})
+        
+    def run_test_command(self):
+        return "test_command_result"
 
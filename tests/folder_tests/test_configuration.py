@@ -11,7 +11,8 @@
 import os
 import unittest
 import shutil
-from mock import Mock
+import json
+from mock import Mock, patch
 import tank
 from tank_vendor import yaml
 from tank import TankError
@@ -78,3 +79,98 @@ class TestFolderConfiguration(TankTestBase):
                           self.schema_location)
 
 
+
+
+class TestSchemaCache(TankTestBase):
+    """
+    Tests caching of the scanned folder schema.
+    """
+    def setUp(self):
+        super(TestSchemaCache, self).setUp()
+        self.setup_fixtures()
+        self.tk = tank.Tank(self.project_root)
+        self.schema_location = os.path.join(self.project_root, "tank", "config", "core", "schema")
+        folder.configuration.clear_schema_cache()
+    
+    def _count_metadata_reads(self):
+        original = folder.configuration.FolderConfiguration._read_metadata
+        calls = []
+        def _read_metadata(config, full_path):
+            calls.append(full_path)
+            return original(config, full_path)
+        with patch.object(folder.configuration.FolderConfiguration, "_read_metadata", _read_metadata):
+            config = folder.configuration.FolderConfiguration(self.tk, self.schema_location)
+        return (config, len(calls))
+    
+    def test_memory_cache(self):
+        (config, num_reads) = self._count_metadata_reads()
+        self.assertTrue(num_reads > 0)
+        (config, num_reads) = self._count_metadata_reads()
+        self.assertEquals(num_reads, 0)
+        self.assertEquals(len(config.get_folder_objs_for_entity_type("Shot")), 1)
+    
+    def test_disk_cache(self):
+        self._count_metadata_reads()
+        cache_file = os.path.join(self.tk.pipeline_configuration.get_cache_location(), 
+                                  folder.configuration.SCHEMA_CACHE_FILE)
+        self.assertTrue(os.path.exists(cache_file))
+        
+        folder.configuration.clear_schema_cache()
+        (config, num_reads) = self._count_metadata_reads()
+        self.assertEquals(num_reads, 0)
+        self.assertEquals(len(config.get_folder_objs_for_entity_type("Shot")), 1)
+    
+    def test_invalidation(self):
+        self._count_metadata_reads()
+        
+        # add a new static folder
+        os.makedirs(os.path.join(self.schema_location, "project", "new_folder"))
+        (config, num_reads) = self._count_metadata_reads()
+        self.assertTrue(num_reads > 0)
+        
+        # and modify a file
+        self._count_metadata_reads()
+        shot_yml = os.path.join(self.schema_location, "project", "sequences", "sequence", "shot.yml")
+        fh = open(shot_yml, "at")
+        fh.write("\n")
+        fh.close()
+        (config, num_reads) = self._count_metadata_reads()
+        self.assertTrue(num_reads > 0)
+        
+        # modifications which keep the modification time, for example when copying
+        # with the original times or within the same second, are picked up too
+        mtime = int(os.path.getmtime(shot_yml)) - 10
+        os.utime(shot_yml, (mtime, mtime))
+        self._count_metadata_reads()
+        fh = open(shot_yml, "at")
+        fh.write("\n")
+        fh.close()
+        os.utime(shot_yml, (mtime, mtime))
+        (config, num_reads) = self._count_metadata_reads()
+        self.assertTrue(num_reads > 0)
+    
+    def test_invalid_cache_file(self):
+        self._count_metadata_reads()
+        cache_file = os.path.join(self.tk.pipeline_configuration.get_cache_location(), 
+                                  folder.configuration.SCHEMA_CACHE_FILE)
+        
+        # not json
+        fh = open(cache_file, "wt")
+        fh.write("cos\nsystem\n(S'echo'\ntR.")
+        fh.close()
+        folder.configuration.clear_schema_cache()
+        (config, num_reads) = self._count_metadata_reads()
+        self.assertTrue(num_reads > 0)
+        
+        # json, but not a scanned schema
+        fh = open(cache_file, "rt")
+        data = json.load(fh)
+        fh.close()
+        data["schema"] = [{"path": 1}]
+        fh = open(cache_file, "wt")
+        json.dump(data, fh)
+        fh.close()
+        folder.configuration.clear_schema_cache()
+        (config, num_reads) = self._count_metadata_reads()
+        self.assertTrue(num_reads > 0)
+        self.assertEquals(len(config.get_folder_objs_for_entity_type("Shot")), 1)
@@ -311,6 +311,32 @@ class TestSchemaCreateFolders(TankTestBase):
         
         assert_paths_to_create(expected_paths)
 
+    def test_list_field_skip_unused(self):
+        """Tests that unused list values are culled using a single shotgun query."""
+        asset_type_yml = os.path.join(self.schema_location, "project", "assets", "asset_type.yml")
+        fh = open(asset_type_yml, "at")
+        fh.write("\ncreate_with_parent: true\nskip_unused: true\n")
+        fh.close()
+        
+        data = {"properties": {"valid_values": {"value": ["assettype", "unused_type"]}},
+                "data_type": {"value": "list"}}
+        self.add_to_sg_schema_db("Asset", "sg_asset_type", data)
+        
+        self.tk.shotgun.summarize = Mock(return_value={"summaries": {"id": 1}, 
+                                                       "groups": [{"group_name": "assettype",
+                                                                   "group_value": "assettype", 
+                                                                   "summaries": {"id": 1}}]})
+        
+        folder.process_filesystem_structure(self.tk, 
+                                            self.project["type"], 
+                                            self.project["id"],  
+                                            preview=False,
+                                            engine=None)
+        
+        self.assertEquals(self.tk.shotgun.summarize.call_count, 1)
+        self.assertIn(os.path.join(self.project_root, "assets", "assettype"), g_paths_created)
+        self.assertNotIn(os.path.join(self.project_root, "assets", "unused_type"), g_paths_created)
+
     def _construct_shot_paths(self, sequence_name=None, shot_name=None, step_name=None):
         """
         Constructs expected paths for a shot based on the sg_standard standard config.
@@ -483,7 +509,7 @@ class TestSchemaCreateFoldersMultiRoot(TankTestBase):
         expected_paths.append(self.alt_root_1)
         expected_paths.append(os.path.join(self.alt_root_1, "assets"))
         expected_paths.append(os.path.join(self.alt_root_1, "alternate_reference"))
-                
+        
         folder.process_filesystem_structure(self.tk, 
                                             self.project["type"], 
                                             self.project["id"], 
@@ -632,6 +658,43 @@ class TestCreateFilesystemStructure(TankTestBase):
                                             engine=None)
         self.assertTrue(os.path.exists(expected))
 
+    def test_create_multiple_shots(self):
+        """
+        Shotgun data for many entities is resolved without per-entity lookups.
+        """
+        shot_2 = {"type": "Shot",
+                  "id": 5,
+                  "code": "other_shot_code",
+                  "sg_sequence": self.seq,
+                  "project": self.project}
+        self.add_to_sg_mock_db(shot_2)
+        
+        folder.process_filesystem_structure(self.tk, 
+                                            "Shot", 
+                                            [self.shot["id"], shot_2["id"]], 
+                                            preview=False,
+                                            engine=None)
+        for shot in [self.shot, shot_2]:
+            expected = os.path.join(self.project_root, "sequences", self.seq["code"], shot["code"])
+            self.assertTrue(os.path.exists(expected))
+        
+        find_one_types = [c[0][0] for c in self.tk.shotgun.find_one.call_args_list]
+        self.assertNotIn("Shot", find_one_types)
+        self.assertNotIn("Sequence", find_one_types)
+
+    def test_create_missing_shot(self):
+        """
+        Missing entities are reported and no folders are created.
+        """
+        self.assertRaises(TankError, 
+                          folder.process_filesystem_structure,
+                          self.tk, 
+                          "Shot", 
+                          [self.shot["id"], 1234], 
+                          preview=False,
+                          engine=None)
+        expected = os.path.join(self.project_root, "sequences", self.seq["code"], self.shot["code"])
+        self.assertFalse(os.path.exists(expected))
               
     def test_wrong_type_entity_ids(self):
         """Test passing in type other than list, int or tuple as value for entity_ids parameter.
@@ -875,6 +938,37 @@ class TestFolderCreationEdgeCases(TankTestBase):
         
         
 
+    def test_delete_shots_then_recreate(self):
+        shot_2 = {"type": "Shot",
+                  "id": 4,
+                  "code": "other_shot_code",
+                  "sg_sequence": self.seq,
+                  "project": self.project}
+        self.add_to_sg_mock_db(shot_2)
+        shots = [self.shot, shot_2]
+        folder.process_filesystem_structure(self.tk, "Shot", [ x["id"] for x in shots ], preview=False, engine=None)
+        
+        # replace both shots with new ones of the same name
+        old_ids = [ x["id"] for x in shots ]
+        self.shot["id"] = 12345
+        shot_2["id"] = 12346
+        
+        # the path cache is read once, regardless of the number of retired entries
+        report = folder.FolderCreationReport()
+        folder.process_filesystem_structure(self.tk, 
+                                            "Shot", 
+                                            [ x["id"] for x in shots ], 
+                                            preview=False, 
+                                            engine=None, 
+                                            report=report)
+        self.assertEquals(report.get_counts()["path_cache"]["get_entities"], 1)
+        self.assertEquals(report.get_counts()["path_cache"]["delete_path_tree"], 2)
+        
+        for (shot, old_id) in zip(shots, old_ids):
+            shot_path = os.path.join(self.project_root, "sequences", "seq_code", shot["code"])
+            self.assertEquals(self.path_cache.get_paths("Shot", shot["id"]), [shot_path])
+            self.assertEquals(self.path_cache.get_paths("Shot", old_id), [])
+    
     def test_rename_shot_but_keep_on_disk(self):
         
         # 1. create fodlers for shot ABC
@@ -915,3 +1009,203 @@ class TestFolderCreationEdgeCases(TankTestBase):
               
      
 
+
+
+class TestFolderCreationLedger(TankTestBase):
+    """
+    Tests that folder creation is skipped for entities which are up to date.
+    """
+    def setUp(self):
+        super(TestFolderCreationLedger, self).setUp()
+        self.setup_fixtures()
+        
+        self.seq = {"type": "Sequence",
+                    "id": 2,
+                    "code": "seq_code",
+                    "project": self.project}
+        self.shot = {"type": "Shot",
+                     "id": 1,
+                     "code": "shot_code",
+                     "sg_sequence": self.seq,
+                     "project": self.project}
+        self.step = {"type": "Step",
+                     "id": 3,
+                     "code": "step_code",
+                     "short_name": "step_short_name"}
+        self.task = {"type":"Task",
+                     "id": 1,
+                     "content": "this task",
+                     "entity": self.shot,
+                     "step": {"type": "Step", "id": 3},
+                     "project": self.project}
+
+        self.add_to_sg_mock_db([self.shot, self.seq, self.step, self.project, self.task])
+        
+        self.tk = tank.Tank(self.project_root)
+        
+        self.shot_path = os.path.join(self.project_root, "sequences", "seq_code", "shot_code")
+    
+    def _create_shot_folders(self, skip_unchanged=True):
+        return folder.process_filesystem_structure(self.tk, 
+                                                   self.shot["type"], 
+                                                   self.shot["id"], 
+                                                   preview=False, 
+                                                   engine=None,
+                                                   skip_unchanged=skip_unchanged)
+
+    def test_skip_unchanged(self):
+        folders = self._create_shot_folders()
+        self.assertIn(self.shot_path, folders)
+        
+        # nothing has changed, so the shot is skipped
+        self.assertEquals(self._create_shot_folders(), [])
+        
+        # unless skipping is not requested
+        self.assertIn(self.shot_path, self._create_shot_folders(skip_unchanged=False))
+    
+    def test_new_child_entity(self):
+        self.assertIn(os.path.join(self.shot_path, "step_short_name"), 
+                      self._create_shot_folders(skip_unchanged=False))
+        
+        # a task for a new step, added after the shot folders were created
+        new_step = {"type": "Step",
+                    "id": 4,
+                    "code": "new_step_code",
+                    "short_name": "new_step_short_name"}
+        new_task = {"type":"Task",
+                    "id": 2,
+                    "content": "new task",
+                    "entity": self.shot,
+                    "step": {"type": "Step", "id": 4},
+                    "project": self.project}
+        self.add_to_sg_mock_db([new_step, new_task])
+        
+        new_step_path = os.path.join(self.shot_path, "new_step_short_name")
+        self.assertIn(new_step_path, self._create_shot_folders(skip_unchanged=False))
+        self.assertTrue(os.path.exists(new_step_path))
+    
+    def test_preview_not_recorded(self):
+        folder.process_filesystem_structure(self.tk, 
+                                            self.shot["type"], 
+                                            self.shot["id"], 
+                                            preview=True, 
+                                            engine=None)
+        self.assertIn(self.shot_path, self._create_shot_folders())
+        
+    def test_deleted_from_disk(self):
+        self._create_shot_folders()
+        shutil.rmtree(self.shot_path)
+        
+        self.assertIn(self.shot_path, self._create_shot_folders())
+        self.assertTrue(os.path.exists(self.shot_path))
+    
+    def test_rename_parent(self):
+        self._create_shot_folders()
+        
+        # renaming the sequence changes the data that the shot folders are 
+        # based on. The folder creation is processed again, and since the 
+        # sequence folder still exists, fails.
+        self.seq["code"] = "seq_renamed"
+        self.assertRaises(TankError, self._create_shot_folders)
+        
+    def test_schema_change(self):
+        self._create_shot_folders()
+        
+        # add a new static folder to the shot level of the schema
+        schema_path = self.tk.pipeline_configuration.get_schema_config_location()
+        os.makedirs(os.path.join(schema_path, "project", "sequences", "sequence", "shot", "new_folder"))
+        
+        folders = self._create_shot_folders()
+        self.assertIn(os.path.join(self.shot_path, "new_folder"), folders)
+
+    def test_report(self):
+        report = folder.FolderCreationReport()
+        folders = folder.process_filesystem_structure(self.tk,
+                                                      self.shot["type"],
+                                                      self.shot["id"],
+                                                      preview=False,
+                                                      engine=None,
+                                                      report=report)
+
+        self.assertEquals(set(report.get_timings().keys()), set(folder.report.PHASES))
+
+        counts = report.get_counts()
+        # the project root folder already exists, so not all folders are created
+        self.assertTrue(0 < counts["filesystem"]["created"] < len(folders))
+        self.assertEquals(counts["hooks"]["process_folder_creation"], 1)
+        self.assertTrue(counts["hooks"]["process_folder_name"] >= 1)
+        self.assertEquals(counts["folder_names"]["Shot"], 1)
+        self.assertEquals(counts["path_cache"]["add_mappings"], 1)
+        self.assertTrue(counts["shotgun"]["find Shot"] >= 1)
+
+        self.assertTrue(len(report.get_report()) > 0)
+
+    def test_report_failure(self):
+        self._create_shot_folders()
+        self.seq["code"] = "seq_renamed"
+        
+        # the preflight checks fail, all phases that were started are still timed
+        report = folder.FolderCreationReport()
+        self.assertRaises(TankError, 
+                          folder.process_filesystem_structure,
+                          self.tk,
+                          self.shot["type"],
+                          self.shot["id"],
+                          preview=False,
+                          engine=None,
+                          report=report)
+        self.assertEquals(set(report.get_timings().keys()), 
+                          set(["schema_load", "shotgun_resolution", "plan_generation", "preflight_checks"]))
+
+
+class TestChunkedFolderCreation(TankTestBase):
+    """
+    Tests that folder creation items are executed in chunks.
+    """
+    def setUp(self):
+        super(TestChunkedFolderCreation, self).setUp()
+        self.setup_fixtures()
+        self.tk = tank.Tank(self.project_root)
+        self.shot = {"type": "Shot", "id": 1, "name": "shot_code"}
+        
+    def test_chunks(self):
+        io_receiver = folder.folder_io.FolderIOReceiver(self.tk, False, chunk_size=2)
+        chunk_root = os.path.join(self.project_root, self._testMethodName)
+        paths = [ os.path.join(chunk_root, x) for x in ["a", "b", "c"] ]
+        
+        io_receiver.make_entity_folder(paths[0], self.shot, {})
+        self.assertFalse(os.path.exists(paths[0]))
+        io_receiver.make_folder(paths[1], {})
+        
+        # the first chunk has been executed and registered in the path cache
+        self.assertTrue(os.path.exists(paths[0]))
+        self.assertTrue(os.path.exists(paths[1]))
+        self.assertEquals(self.tk.paths_from_entity("Shot", 1), [paths[0]])
+        
+        io_receiver.make_folder(paths[2], {})
+        self.assertFalse(os.path.exists(paths[2]))
+        
+        # the remainder is executed at the end, and all paths are returned
+        self.assertEquals(io_receiver.execute_folder_creation(), paths)
+        self.assertTrue(os.path.exists(paths[2]))
+
+    def test_error_in_later_chunk(self):
+        chunk_root = os.path.join(self.project_root, self._testMethodName)
+        shot_path = os.path.join(chunk_root, "shot_code")
+        io_receiver = folder.folder_io.FolderIOReceiver(self.tk, False)
+        io_receiver.make_entity_folder(shot_path, self.shot, {})
+        io_receiver.execute_folder_creation()
+        
+        # the shot is renamed, the new folder conflicts with the existing one
+        renamed_path = os.path.join(chunk_root, "shot_code_renamed")
+        for (chunk_size, expected_msg) in [(None, "No folders have been created"), 
+                                           (1, "have already been created")]:
+            io_receiver = folder.folder_io.FolderIOReceiver(self.tk, False, chunk_size=chunk_size)
+            io_receiver.make_folder(os.path.join(chunk_root, "other_%s" % chunk_size), {})
+            try:
+                io_receiver.make_entity_folder(renamed_path, self.shot, {})
+                io_receiver.execute_folder_creation()
+            except TankError, e:
+                self.assertTrue(expected_msg in str(e), str(e))
+            else:
+                self.fail("TankError not raised")
@@ -0,0 +1,82 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+# 
+# CONFIDENTIAL AND PROPRIETARY
+# 
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit 
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your 
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights 
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+
+from tank import folder
+from tank_test.tank_test_base import *
+
+
+class TestFolderPlan(TankTestBase):
+    """
+    Tests planning and concurrent execution of folder creation items.
+    """
+    def setUp(self):
+        super(TestFolderPlan, self).setUp()
+        self.root = os.path.join(self.tank_temp, "plan_%s" % self._testMethodName)
+        self.source_file = os.path.join(self.tank_temp, "source.txt")
+        self.create_file(self.source_file, "source")
+        
+    def _folder(self, *names):
+        return {"action": "folder", "path": os.path.join(self.root, *names), "metadata": {}}
+    
+    def _copy(self, *names):
+        return {"action": "copy", 
+                "source_path": self.source_file, 
+                "target_path": os.path.join(self.root, *names), 
+                "metadata": {}}
+    
+    def test_plan_order(self):
+        items = [self._folder("a", "b", "c"), 
+                 self._folder("a"), 
+                 self._copy("a", "file.txt"),
+                 self._folder("a", "b"),
+                 self._folder("a"),
+                 self._folder("x")]
+        plan = folder.build_folder_plan(items)
+        self.assertEquals([folder.execution.get_item_path(x) for x in plan], 
+                          [os.path.join(self.root, "a"),
+                           os.path.join(self.root, "a", "b"),
+                           os.path.join(self.root, "a", "b", "c"),
+                           os.path.join(self.root, "a", "file.txt"),
+                           os.path.join(self.root, "x")])
+    
+    def test_execute(self):
+        items = []
+        for x in range(20):
+            items.append(self._folder("shot_%d" % x, "work"))
+            items.append(self._copy("shot_%d" % x, "work", "file.txt"))
+            items.append(self._folder("shot_%d" % x))
+        # one of the folders already exists and is not reported
+        os.makedirs(os.path.join(self.root, "shot_0"))
+        
+        plan = folder.build_folder_plan(items)
+        created = folder.execute_folder_plan(plan, preview_mode=False, max_threads=4)
+        
+        self.assertEquals(len(created), 59)
+        # the paths are returned in plan order, which is the order of the items
+        # except that parents are moved ahead of their children
+        expected = [folder.execution.get_item_path(x) for x in plan]
+        expected.remove(os.path.join(self.root, "shot_0"))
+        self.assertEquals(created, expected)
+        self.assertEquals(expected[:3], [os.path.join(self.root, "shot_0", "work"),
+                                         os.path.join(self.root, "shot_0", "work", "file.txt"),
+                                         os.path.join(self.root, "shot_1")])
+        for x in range(20):
+            self.assertTrue(os.path.exists(os.path.join(self.root, "shot_%d" % x, "work", "file.txt")))
+        
+        # nothing left to create
+        self.assertEquals(folder.execute_folder_plan(plan, preview_mode=False), [])
+    
+    def test_preview(self):
+        plan = folder.build_folder_plan([self._folder("a"), self._copy("a", "file.txt")])
+        created = folder.execute_folder_plan(plan, preview_mode=True)
+        self.assertEquals(len(created), 2)
+        self.assertFalse(os.path.exists(self.root))
@@ -0,0 +1,57 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+# 
+# CONFIDENTIAL AND PROPRIETARY
+# 
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit 
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your 
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights 
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import copy
+
+from tank.folder.layered_data import ShotgunDataLayer
+from tank_test.tank_test_base import *
+
+
+class TestShotgunDataLayer(TankTestBase):
+    """
+    Tests the layered dictionary used to pass shotgun data down the folder tree.
+    """
+    def setUp(self):
+        super(TestShotgunDataLayer, self).setUp()
+        self.base = {"Project": {"type": "Project", "id": 1}, "current_task_data": None}
+        self.layer = ShotgunDataLayer(self.base, {"Shot": {"type": "Shot", "id": 2}})
+
+    def test_lookup(self):
+        self.assertEquals(self.layer["Project"], {"type": "Project", "id": 1})
+        self.assertEquals(self.layer["Shot"], {"type": "Shot", "id": 2})
+        self.assertIn("Project", self.layer)
+        self.assertNotIn("Step", self.layer)
+        self.assertRaises(KeyError, lambda: self.layer["Step"])
+        self.assertEquals(self.layer.get("Step"), None)
+        self.assertEquals(self.layer.get("current_task_data", "x"), None)
+        self.assertEquals(sorted(self.layer.keys()), ["Project", "Shot", "current_task_data"])
+        self.assertEquals(len(self.layer), 3)
+    
+    def test_parent_unchanged(self):
+        child = self.layer.new_layer({"Step": {"type": "Step", "id": 3}})
+        child["Shot"] = {"type": "Shot", "id": 4}
+        del child["Project"]
+        
+        self.assertEquals(child.copy(), {"Shot": {"type": "Shot", "id": 4}, 
+                                         "Step": {"type": "Step", "id": 3},
+                                         "current_task_data": None})
+        self.assertNotIn("Project", child)
+        self.assertRaises(KeyError, lambda: child["Project"])
+        
+        # the lower layers are untouched
+        self.assertEquals(self.layer["Shot"], {"type": "Shot", "id": 2})
+        self.assertNotIn("Step", self.layer)
+        self.assertEquals(self.base["Project"], {"type": "Project", "id": 1})
+
+    def test_deepcopy(self):
+        data = copy.deepcopy(self.layer)
+        self.assertTrue(isinstance(data, dict))
+        self.assertEquals(data, self.layer.copy())
+        self.assertFalse(data["Project"] is self.base["Project"])
@@ -12,6 +12,9 @@ import sys
 import os
 import tempfile
 
+from mock import patch
+
+
 from tank_test.tank_test_base import *
 import tank
 from tank.errors import TankError
@@ -114,6 +117,127 @@ class TestGetSetting(TestApplication):
         self.assertEqual(True, test_item["test_bool"])
         self.assertEqual("extra", test_item["test_extra"])
 
+    def test_schema_not_reloaded(self):
+        """
+        Settings lookups should not need to go back to the descriptor for the schema.
+        """
+        self.app.get_setting("test_icon")
+        with patch.object(self.app.descriptor, "get_configuration_schema") as schema_mock:
+            self.app.get_setting("test_icon")
+            self.app.get_template("test_template")
+            self.app.execute_hook("test_hook", dummy_param=True)
+            self.assertFalse(schema_mock.called)
+
+
+class TestSettingsCache(TestApplication):
+    """
+    Tests memoization of post processed settings.
+    """
+    def setUp(self):
+        super(TestSettingsCache, self).setUp()
+        self.app = self.engine.apps["test_app"]
+        self.tk = self.app.tank
+    
+    def _add_value_hook(self, cacheable):
+        """
+        Adds a core hook computing setting values and makes the test_simple_list setting use it.
+        Returns the hook class.
+        """
+        hook_code = ("from tank import Hook\n"
+                     "class ValueHook(Hook):\n"
+                     "    cache_setting_value = %s\n"
+                     "    calls = 0\n"
+                     "    def execute(self, setting, bundle_obj, extra_params):\n"
+                     "        self.__class__.calls += 1\n"
+                     "        return extra_params[0]\n" % cacheable)
+        hook_path = os.path.join(self.tk.pipeline_configuration.get_core_hooks_location(), "value_hook.py")
+        fh = open(hook_path, "wt")
+        fh.write(hook_code)
+        fh.close()
+        self.app.settings["test_simple_list"] = ["hook:value_hook:foo", "b"]
+        return tank.hook.get_hook_class(hook_path)
+    
+    def test_dynamic_hook(self):
+        hook_class = self._add_value_hook(False)
+        self.assertEqual(self.app.get_setting("test_simple_list"), ["foo", "b"])
+        self.assertEqual(self.app.get_setting("test_simple_list"), ["foo", "b"])
+        self.assertEqual(hook_class.calls, 2)
+    
+    def test_cacheable_hook(self):
+        hook_class = self._add_value_hook(True)
+        self.assertEqual(self.app.get_setting("test_simple_list"), ["foo", "b"])
+        self.assertEqual(self.app.get_setting("test_simple_list"), ["foo", "b"])
+        self.assertEqual(hook_class.calls, 1)
+        
+        self.app.refresh_settings()
+        self.assertEqual(self.app.get_setting("test_simple_list"), ["foo", "b"])
+        self.assertEqual(hook_class.calls, 2)
+    
+    def test_values_copied(self):
+        value = self.app.get_setting("test_complex_list")
+        value[0]["test_str"] = "modified"
+        value.append("modified")
+        value = self.app.get_setting("test_complex_list")
+        self.assertEqual(len(value), 2)
+        self.assertEqual(value[0]["test_str"], "a")
+    
+    def test_default_not_cached(self):
+        self.assertEqual(self.app.get_setting("no_such_setting", "foo"), "foo")
+        self.assertEqual(self.app.get_setting("no_such_setting", "bar"), "bar")
+
+
+class TestManifestCache(TestApplication):
+    """
+    Tests the process wide cache of bundle manifests.
+    """
+    def setUp(self):
+        super(TestManifestCache, self).setUp()
+        self.app_path = os.path.join(self.project_config, "test_app")
+        self.tk = tank.Tank(self.project_root)
+
+    def _get_descriptor(self):
+        return descriptor.get_from_location(descriptor.AppDescriptor.APP, 
+                                            self.tk.pipeline_configuration, 
+                                            {"type": "dev", "path": self.app_path})
+
+    def test_shared(self):
+        md = self._get_descriptor()._get_metadata()
+        with patch("tank_vendor.yaml.load") as yaml_load:
+            self.assertIs(self._get_descriptor()._get_metadata(), md)
+            self.assertFalse(yaml_load.called)
+
+    def test_read_only(self):
+        md = self._get_descriptor()._get_metadata()
+        self.assertRaises(TypeError, md.__setitem__, "display_name", "foo")
+        self.assertRaises(TypeError, md.update, {"display_name": "foo"})
+        
+        # values handed out by the descriptor can be modified
+        schema = self._get_descriptor().get_configuration_schema()
+        schema["test_template"]["type"] = "str"
+        self.assertEqual(self._get_descriptor().get_configuration_schema()["test_template"]["type"], 
+                         "template")
+
+    def test_invalidated_on_change(self):
+        self.assertEqual(self._get_descriptor().get_display_name(), "Test App")
+        
+        info_path = os.path.join(self.app_path, "info.yml")
+        fh = open(info_path, "rt")
+        info = fh.read()
+        fh.close()
+        fh = open(info_path, "wt")
+        fh.write(info.replace("display_name: Test App", "display_name: Test App Modified"))
+        fh.close()
+        
+        self.assertEqual(self._get_descriptor().get_display_name(), "Test App Modified")
+
+    def test_clear_cache(self):
+        self._get_descriptor()._get_metadata()
+        descriptor.clear_manifest_cache()
+        with patch("tank_vendor.yaml.load", return_value={}) as yaml_load:
+            self._get_descriptor()._get_metadata()
+            self.assertTrue(yaml_load.called)
+
+
 class TestExecuteHook(TestApplication):
     def test_call_hook(self):
         app = self.engine.apps["test_app"]
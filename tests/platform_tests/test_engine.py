@@ -9,8 +9,12 @@
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
 import os
+import sys
+import time
 import unittest2 as unittest
 
+from mock import patch
+
 from tank_test.tank_test_base import *
 
 import tank
@@ -19,9 +23,12 @@ from tank.platform import engine
 from tank.errors import TankError
 
 
-class TestStartEngine(TankTestBase):
+class TestEngineBase(TankTestBase):
+    """
+    Sets up a shot context which engines can be started in.
+    """
     def setUp(self):
-        super(TestStartEngine, self).setUp()
+        super(TestEngineBase, self).setUp()
         self.setup_fixtures()
         
         # setup shot
@@ -48,6 +55,15 @@ class TestStartEngine(TankTestBase):
         
         self.tk = tank.Tank(self.project_root)
         self.context = self.tk.context_from_path(self.shot_step_path)
+    
+    def tearDown(self):
+        cur_engine = tank.platform.current_engine()
+        if cur_engine:
+            cur_engine.destroy()
+        os.remove(self.test_resource)
+
+
+class TestStartEngine(TestEngineBase):
 
     def test_get_engine_path(self):
         engine_path = tank.platform.get_engine_path("test_engine", self.tk, self.context)
@@ -69,12 +85,6 @@ class TestStartEngine(TankTestBase):
         engine_name = "test_engine"
         engine = tank.platform.start_engine(engine_name, self.tk, self.context)
         self.assertRaises(TankError, tank.platform.start_engine, engine_name, self.tk, self.context)
-    
-    def tearDown(self):
-        cur_engine = tank.platform.current_engine()
-        if cur_engine:
-            cur_engine.destroy()
-        os.remove(self.test_resource)
 
     def test_properties(self):
         """
@@ -87,6 +97,293 @@ class TestStartEngine(TankTestBase):
         self.assertEqual(engine.documentation_url, None)
         self.assertEqual(engine.instance_name, "test_engine")
         self.assertEqual(engine.context, self.context)
+
+    def test_startup_profile(self):
+        """
+        Test that the engine startup is timed.
+        """
+        engine = tank.platform.start_engine("test_engine", self.tk, self.context)
+        profile = engine.startup_profile
+        self.assertTrue(profile.complete)
+        self.assertEqual(profile.root.name, "start_engine test_engine")
+        
+        span_names = [s.name for s in profile.root.children]
+        self.assertEqual(span_names, ["Pick environment", "Load environment", "Engine descriptor", 
+                                      "Load engine code", "Engine init"])
+        
+        engine_init = profile.root.children[-1]
+        self.assertIn("Load apps", [s.name for s in engine_init.children])
+        load_apps = [s for s in engine_init.children if s.name == "Load apps"][0]
+        self.assertEqual([s.name for s in load_apps.children], ["Validate app configurations", "test_app"])
+        self.assertEqual([s.name for s in load_apps.children[1].children], ["Frameworks", "init_app"])
+        
+        report = profile.get_report()
+        self.assertEqual(len(report), 18)
+        self.assertTrue(report[0].endswith("ms  start_engine test_engine"))
         
+    def test_startup_profile_trace(self):
+        """
+        Test that the startup profile can be written to disk.
+        """
+        profile_path = tank.platform.profiling.get_profile_path(self.tk, "test_engine")
+        self.assertFalse(os.path.exists(profile_path))
+        
+        os.environ["TANK_STARTUP_PROFILE"] = "1"
+        try:
+            engine = tank.platform.start_engine("test_engine", self.tk, self.context)
+        finally:
+            del os.environ["TANK_STARTUP_PROFILE"]
+        
+        trace = tank.platform.profiling.load_trace(profile_path)
+        self.assertEqual(trace["otherData"]["engine"], "test_engine")
+        self.assertEqual(trace["otherData"]["environment"], "test")
+        self.assertEqual(tank.platform.profiling.format_trace(trace), 
+                         engine.startup_profile.get_report())
+
+    def test_failed_init_profile(self):
+        """
+        An engine which fails to initialize does not leave its profile active.
+        """
+        get_env = engine.__dict__["__get_env_and_descriptor_for_engine"]
+        (env, descriptor) = get_env("test_engine", self.tk, self.context)
+        with patch("tank.platform.validation.validate_settings", side_effect=TankError("invalid")):
+            self.assertRaises(TankError, engine.Engine, self.tk, self.context, "test_engine", env)
+        self.assertEqual(tank.platform.profiling.get_active_profile(), None)
+        
+        # spans in a profile set up by the caller are all closed again
+        profile = tank.platform.profiling.StartupProfile("test")
+        tank.platform.profiling.set_active_profile(profile)
+        try:
+            with patch("tank.platform.validation.validate_settings", side_effect=TankError("invalid")):
+                self.assertRaises(TankError, engine.Engine, self.tk, self.context, "test_engine", env)
+        finally:
+            tank.platform.profiling.set_active_profile(None)
+        profile.end()
+        self.assertTrue(profile.complete)
+
+    def test_execute_in_main_thread_no_ui(self):
+        """
+        Without a UI, main thread calls are executed directly.
+        """
+        engine = tank.platform.start_engine("test_engine", self.tk, self.context)
+        self.assertEqual(engine.execute_in_main_thread(max, 1, 2), 2)
+        self.assertEqual(engine.execute_in_main_thread_async(max, 1, 2).result(), 2)
+        self.assertEqual(engine.execute_in_main_thread_batched(max, 3, 2).result(), 3)
+        metrics = engine.main_thread_metrics
+        self.assertEqual(metrics["num_direct_calls"], 2)
+        self.assertEqual(metrics["num_calls"], 0)
+
+    def test_execute_in_main_thread_during_init(self):
+        """
+        Main thread calls can be made while the engine initializes.
+        """
+        class MainThreadEngine(engine.Engine):
+            def init_engine(self):
+                self.init_results = [self.execute_in_main_thread(max, 1, 2),
+                                     self.execute_in_main_thread_async(max, 1, 2).result(),
+                                     self.execute_in_main_thread_batched(max, 3, 2).result()]
         
-         
\ No newline at end of file
+        get_env = engine.__dict__["__get_env_and_descriptor_for_engine"]
+        (env, descriptor) = get_env("test_engine", self.tk, self.context)
+        obj = MainThreadEngine(self.tk, self.context, "test_engine", env)
+        self.assertEqual(obj.init_results, [2, 2, 3])
+
+
+class TestLazyAppInit(TestEngineBase):
+    """
+    Tests deferred app initialization driven by command manifests.
+    """
+    def setUp(self):
+        super(TestLazyAppInit, self).setUp()
+        
+        # the test app is a dev app, which is never deferred by default
+        patcher = patch("tank.platform.lazy_app.supports_deferred_init", return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        patcher = patch.dict(os.environ, {"TANK_LAZY_APP_INIT": "1"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _restart_engine(self):
+        tank.platform.current_engine().destroy()
+        return tank.platform.start_engine("test_engine", self.tk, self.context)
+
+    def test_first_start_initializes(self):
+        """
+        Without a manifest, apps are initialized and their commands recorded.
+        """
+        engine = tank.platform.start_engine("test_engine", self.tk, self.context)
+        app = engine.apps["test_app"]
+        self.assertIsInstance(app, tank.platform.Application)
+        self.assertIs(engine.commands["test_command"]["properties"]["app"], app)
+        manifest_folder = os.path.join(engine.cache_location, "command_manifests")
+        self.assertEquals(os.listdir(manifest_folder), ["test.test_app.yml"])
+
+    def test_deferred_command(self):
+        """
+        With a manifest, apps are initialized the first time a command is run.
+        """
+        tank.platform.start_engine("test_engine", self.tk, self.context)
+        engine = self._restart_engine()
+        
+        app = engine.apps["test_app"]
+        self.assertIsInstance(app, tank.platform.lazy_app.LazyApplication)
+        self.assertEquals(app.instance_name, "test_app")
+        self.assertEquals(app.display_name, "Test App")
+        
+        command = engine.commands["test_command"]
+        self.assertEquals(command["properties"]["short_name"], "test")
+        self.assertEquals(command["properties"]["description"], "Unit testing")
+        
+        self.assertEquals(command["callback"](), "test_command_result")
+        
+        # the app is now loaded and its command is in place
+        loaded_app = engine.apps["test_app"]
+        self.assertIsInstance(loaded_app, tank.platform.Application)
+        self.assertEquals(sorted(engine.commands.keys()), ["Reload and Restart", "test_command"])
+        self.assertIs(engine.commands["test_command"]["properties"]["app"], loaded_app)
+        self.assertEquals(engine.commands["test_command"]["callback"](), "test_command_result")
+
+    def test_deferred_attribute_access(self):
+        """
+        Accessing app functionality through the stand-in initializes the app.
+        """
+        tank.platform.start_engine("test_engine", self.tk, self.context)
+        engine = self._restart_engine()
+        
+        self.assertEquals(engine.apps["test_app"].run_test_command(), "test_command_result")
+        self.assertIsInstance(engine.apps["test_app"], tank.platform.Application)
+
+    def test_settings_change(self):
+        """
+        A change in the app settings invalidates the manifest.
+        """
+        engine = tank.platform.start_engine("test_engine", self.tk, self.context)
+        engine.destroy()
+        with patch("tank.platform.environment.Environment.get_app_settings", 
+                   return_value={"test_str": "changed"}):
+            with patch("tank.platform.validation.validate_settings"):
+                engine = tank.platform.start_engine("test_engine", self.tk, self.context)
+        self.assertIsInstance(engine.apps["test_app"], tank.platform.Application)
+
+
+class TestIncrementalRestart(TestEngineBase):
+    """
+    Tests restarting an engine while only reloading apps which have changed.
+    """
+    def setUp(self):
+        super(TestIncrementalRestart, self).setUp()
+        patcher = patch.object(engine.Engine, "supports_incremental_restart", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+    def _touch_bundle(self, bundle):
+        # push the modification time into the future
+        path = os.path.join(bundle.disk_location, "info.yml")
+        future = time.time() + 10
+        os.utime(path, (future, future))
+        
+    def test_unchanged(self):
+        cur_engine = tank.platform.start_engine("test_engine", self.tk, self.context)
+        app = cur_engine.apps["test_app"]
+        tank.platform.restart(incremental=True)
+        self.assertIs(tank.platform.current_engine(), cur_engine)
+        self.assertIs(cur_engine.apps["test_app"], app)
+        self.assertIs(cur_engine.commands["test_command"]["properties"]["app"], app)
+        
+    def test_app_modified(self):
+        cur_engine = tank.platform.start_engine("test_engine", self.tk, self.context)
+        app = cur_engine.apps["test_app"]
+        self._touch_bundle(app)
+        with patch.object(engine.Engine, "post_app_reload") as post_app_reload:
+            tank.platform.restart(incremental=True)
+            self.assertEquals(post_app_reload.call_count, 1)
+        self.assertIs(tank.platform.current_engine(), cur_engine)
+        new_app = cur_engine.apps["test_app"]
+        self.assertIsNot(new_app, app)
+        self.assertIs(cur_engine.commands["test_command"]["properties"]["app"], new_app)
+        self.assertEquals(sorted(cur_engine.commands.keys()), ["Reload and Restart", "test_command"])
+        
+    def test_imported_python_package(self):
+        # an app with a python package, which is imported after the app has loaded
+        python_folder = os.path.join(self.project_config, "test_app", "python")
+        os.makedirs(python_folder)
+        fh = open(os.path.join(python_folder, "__init__.py"), "wt")
+        fh.write("import util\n")
+        fh.close()
+        fh = open(os.path.join(python_folder, "util.py"), "wt")
+        fh.write("value = 1\n")
+        fh.close()
+        
+        cur_engine = tank.platform.start_engine("test_engine", self.tk, self.context)
+        app = cur_engine.apps["test_app"]
+        with patch.object(sys, "dont_write_bytecode", False):
+            self.assertEquals(app.import_module("util").value, 1)
+        self.assertTrue(os.path.exists(os.path.join(python_folder, "util.pyc")))
+        
+        # writing compiled files does not count as a modification
+        tank.platform.restart(incremental=True)
+        self.assertIs(cur_engine.apps["test_app"], app)
+        
+        # modifying the source does
+        self._touch_bundle(app)
+        tank.platform.restart(incremental=True)
+        self.assertIsNot(cur_engine.apps["test_app"], app)
+        
+    def test_engine_modified(self):
+        cur_engine = tank.platform.start_engine("test_engine", self.tk, self.context)
+        self._touch_bundle(cur_engine)
+        tank.platform.restart(incremental=True)
+        self.assertIsNot(tank.platform.current_engine(), cur_engine)
+        
+    def test_not_supported(self):
+        cur_engine = tank.platform.start_engine("test_engine", self.tk, self.context)
+        with patch.object(engine.Engine, "supports_incremental_restart", False):
+            tank.platform.restart(incremental=True)
+        self.assertIsNot(tank.platform.current_engine(), cur_engine)
+
+
+class TestShotgunCacheFingerprint(TankTestBase):
+    """
+    Tests the fingerprint used to decide when the shotgun menu cache needs regenerating.
+    """
+    def setUp(self):
+        super(TestShotgunCacheFingerprint, self).setUp()
+        env_folder = os.path.join(self.project_config, "env")
+        os.makedirs(env_folder)
+        self.env_file = os.path.join(env_folder, "shotgun_shot.yml")
+        self.include_file = os.path.join(env_folder, "common.yml")
+        self._write(self.env_file, "includes: ['./common.yml']\n"
+                                   "engines:\n"
+                                   "  tk-shotgun:\n"
+                                   "    location: '@engine_location'\n"
+                                   "    apps: {}\n")
+        self._write(self.include_file, "engine_location: {type: app_store, name: tk-shotgun, version: v0.1.0}\n")
+        self.tk = tank.Tank(self.project_root)
+        
+    def _write(self, path, contents):
+        fh = open(path, "wt")
+        fh.write(contents)
+        fh.close()
+    
+    def test_include_files(self):
+        env = self.tk.pipeline_configuration.get_environment("shotgun_shot")
+        self.assertEquals(env.get_include_files(), [os.path.join(os.path.dirname(self.env_file), "./common.yml")])
+    
+    def test_fingerprint(self):
+        fingerprint = engine.get_shotgun_cache_fingerprint(self.tk, "Shot")
+        self.assertEquals(fingerprint, engine.get_shotgun_cache_fingerprint(self.tk, "Shot"))
+        
+        # changing an included file changes the fingerprint
+        self._write(self.include_file, "engine_location: {type: app_store, name: tk-shotgun, version: v0.2.0}\n")
+        self.assertNotEqual(fingerprint, engine.get_shotgun_cache_fingerprint(self.tk, "Shot"))
+        
+    def test_core_version(self):
+        fingerprint = engine.get_shotgun_cache_fingerprint(self.tk, "Shot")
+        with patch("tank.api.Tank.version", "v99.0.0"):
+            self.assertNotEqual(fingerprint, engine.get_shotgun_cache_fingerprint(self.tk, "Shot"))
+    
+    def test_dev_descriptor(self):
+        self._write(self.include_file, "engine_location: {type: dev, path: /tmp}\n")
+        self.assertEquals(engine.get_shotgun_cache_fingerprint(self.tk, "Shot"), None)
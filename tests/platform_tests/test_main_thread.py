@@ -0,0 +1,86 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+# 
+# CONFIDENTIAL AND PROPRIETARY
+# 
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit 
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your 
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights 
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import unittest2 as unittest
+
+from tank.platform.main_thread import MainThreadQueue
+
+
+class TestMainThreadQueue(unittest.TestCase):
+    """
+    Tests the queue used to execute functions asynchronously on the main thread.
+    The main thread event loop is simulated by a list of posted callables.
+    """
+    def setUp(self):
+        self.posted = []
+        self.queue = MainThreadQueue(self.posted.append)
+        self.calls = []
+    
+    def _record(self, value):
+        self.calls.append(value)
+        return value * 2
+    
+    def _run_event_loop(self):
+        while self.posted:
+            self.posted.pop(0)()
+    
+    def test_submit(self):
+        futures = [self.queue.submit(self._record, (x,), {}) for x in range(3)]
+        self.assertEquals(len(self.posted), 3)
+        self.assertFalse(futures[0].done())
+        self.assertEquals(self.queue.get_metrics()["queue_depth"], 3)
+        
+        self._run_event_loop()
+        self.assertEquals(self.calls, [0, 1, 2])
+        self.assertEquals([f.result() for f in futures], [0, 2, 4])
+        
+        metrics = self.queue.get_metrics()
+        self.assertEquals(metrics["queue_depth"], 0)
+        self.assertEquals(metrics["max_queue_depth"], 3)
+        self.assertEquals(metrics["num_calls"], 3)
+        self.assertEquals(metrics["num_ticks"], 3)
+    
+    def test_batched(self):
+        futures = [self.queue.submit_batched(self._record, (x,), {}) for x in range(10)]
+        # only a single tick is scheduled for all pending calls
+        self.assertEquals(len(self.posted), 1)
+        self._run_event_loop()
+        self.assertEquals(self.calls, range(10))
+        self.assertEquals(futures[-1].result(), 18)
+        self.assertEquals(self.queue.get_metrics()["num_ticks"], 1)
+        
+        # once executed, a new batch is started
+        self.queue.submit_batched(self._record, (10,), {})
+        self.assertEquals(len(self.posted), 1)
+    
+    def test_mixed_order(self):
+        self.queue.submit_batched(self._record, (0,), {})
+        self.queue.submit(self._record, (1,), {})
+        self.queue.submit_batched(self._record, (2,), {})
+        self._run_event_loop()
+        self.assertEquals(self.calls, [0, 1, 2])
+        self.assertEquals(self.queue.get_metrics()["num_calls"], 3)
+    
+    def test_exception(self):
+        future = self.queue.submit(lambda: 1/0, (), {})
+        self._run_event_loop()
+        self.assertTrue(future.done())
+        self.assertRaises(ZeroDivisionError, future.result)
+    
+    def test_direct(self):
+        future = self.queue.execute_direct(self._record, (4,), {})
+        self.assertTrue(future.done())
+        self.assertEquals(future.result(), 8)
+        self.assertEquals(self.posted, [])
+        self.assertEquals(self.queue.get_metrics()["num_direct_calls"], 1)
+    
+    def test_timeout(self):
+        future = self.queue.submit(self._record, (1,), {})
+        self.assertRaises(RuntimeError, future.result, 0.01)
@@ -1,3 +1,5 @@
+from mock import patch
+
 import tank
 import tank.platform.constants
 from tank.errors import TankError
@@ -536,3 +538,109 @@ class TestValidateFixtures(TankTestBase):
             schema = env.get_app_descriptor(self.test_engine, app_name).get_configuration_schema()
             settings = env.get_app_settings(self.test_engine, app_name)
             validate_settings(app_name, tk, context, schema, settings)
+
+
+class TestValidationCache(TankTestBase):
+    """Tests caching of successful settings validations."""
+    def setUp(self):
+        super(TestValidationCache, self).setUp()
+        self.setup_fixtures()
+        self.tk = tank.Tank(self.project_root)
+        self.context = self.tk.context_from_path(self.project_root)
+        self.app_name = "test_app"
+        
+        self.hook_path = os.path.join(self.tk.pipeline_configuration.get_hooks_location(), "test_hook.py")
+        fh = open(self.hook_path, "wt")
+        fh.write("# test hook")
+        fh.close()
+        
+        self.schema = {"test_str": {"type": "str"}, 
+                       "test_hook": {"type": "hook"},
+                       "test_list": {"type": "list", "values": {"type": "template"}}}
+        self.settings = {"test_str": "foo", 
+                         "test_hook": "test_hook",
+                         "test_list": ["maya_shot_work"]}
+        
+        self.tk.templates["maya_shot_work"] = tank.template.TemplatePath("shots/{Shot}", 
+                                                                         {"Shot": StringKey("Shot")}, 
+                                                                         self.project_root)
+    
+    def _validate(self, use_cache=True):
+        """
+        Validates the test settings, returns True if the actual validation ran.
+        """
+        with patch("tank.platform.validation._SettingsValidator.validate") as validate_mock:
+            validate_settings(self.app_name, self.tk, None, self.schema, self.settings, use_cache)
+            return validate_mock.called
+    
+    def test_cached(self):
+        self.assertTrue(self._validate())
+        self.assertFalse(self._validate())
+        # new settings are validated
+        self.settings["test_str"] = "bar"
+        self.assertTrue(self._validate())
+        self.assertFalse(self._validate())
+    
+    def test_not_cached(self):
+        self.assertTrue(self._validate(use_cache=False))
+        self.assertTrue(self._validate(use_cache=False))
+        self.assertTrue(self._validate())
+    
+    def test_failures_not_cached(self):
+        self.settings["test_hook"] = "no_such_hook"
+        self.assertRaises(TankError, validate_settings, self.app_name, self.tk, None, self.schema, self.settings)
+        self.assertRaises(TankError, validate_settings, self.app_name, self.tk, None, self.schema, self.settings)
+    
+    def test_hook_removed(self):
+        validate_settings(self.app_name, self.tk, None, self.schema, self.settings)
+        os.remove(self.hook_path)
+        self.assertRaises(TankError, validate_settings, self.app_name, self.tk, None, self.schema, self.settings)
+    
+    def test_template_changed(self):
+        self.assertTrue(self._validate())
+        self.tk.templates["maya_shot_work"] = tank.template.TemplatePath("shots/{Shot}/work", 
+                                                                         {"Shot": StringKey("Shot")}, 
+                                                                         self.project_root)
+        self.assertTrue(self._validate())
+    
+    def test_context_changed(self):
+        self.assertTrue(self._validate())
+        with patch("tank.platform.validation._SettingsValidator.validate") as validate_mock:
+            validate_settings(self.app_name, self.tk, self.context, self.schema, self.settings)
+            self.assertTrue(validate_mock.called)
+    
+    def test_clear_cache(self):
+        self.assertTrue(self._validate())
+        clear_validation_cache(self.tk)
+        self.assertTrue(self._validate())
+    
+    def test_pruned(self):
+        cache_folder = os.path.join(self.tk.pipeline_configuration.get_cache_location(), 
+                                    tank.platform.validation.VALIDATION_CACHE_FOLDER)
+        with patch.multiple("tank.platform.validation", 
+                            MAX_VALIDATION_CACHE_ENTRIES=2, 
+                            VALIDATION_CACHE_PRUNE_RATE=1.0):
+            for value in ["a", "b", "c"]:
+                # make sure that earlier results are older
+                if os.path.exists(cache_folder):
+                    for f in os.listdir(cache_folder):
+                        path = os.path.join(cache_folder, f)
+                        mtime = os.path.getmtime(path) - 10
+                        os.utime(path, (mtime, mtime))
+                self.settings["test_str"] = value
+                self.assertTrue(self._validate())
+            
+            # only the most recently used results are kept
+            self.assertEqual(len(os.listdir(cache_folder)), 2)
+            self.assertFalse(self._validate())
+    
+    def test_pruned_occasionally(self):
+        cache_folder = os.path.join(self.tk.pipeline_configuration.get_cache_location(), 
+                                    tank.platform.validation.VALIDATION_CACHE_FOLDER)
+        with patch.multiple("tank.platform.validation", 
+                            MAX_VALIDATION_CACHE_ENTRIES=2, 
+                            VALIDATION_CACHE_PRUNE_RATE=0.0):
+            for value in ["a", "b", "c"]:
+                self.settings["test_str"] = value
+                self.assertTrue(self._validate())
+            self.assertEqual(len(os.listdir(cache_folder)), 3)
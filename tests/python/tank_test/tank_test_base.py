@@ -188,6 +188,9 @@ class TankTestBase(unittest.TestCase):
             return self.sg_mock
 
         sgtk.util.shotgun.create_sg_connection = return_sg
+        
+        # make sure that no shotgun data is cached between tests
+        sgtk.util.shotgun_cache.clear_caches()
 
 
     def tearDown(self):
@@ -438,6 +441,10 @@ class TankTestBase(unittest.TestCase):
                             # filter only if value exists in mocked data (if field not there don't skip)
                             results = [result for result in results if result.get(field_name, sg_filter["values"][0]) in sg_filter["values"]]
                         #TODO add entity filtering?
+                    
+                    elif sg_filter["relation"] == "in":
+                        field_name = sg_filter["path"]
+                        results = [result for result in results if result.get(field_name) in sg_filter["values"]]
 
             return results
         
@@ -437,3 +437,53 @@ class TestTankFromPath(TankTestBase):
 
 
 
+
+class TestInstanceRegistry(TankTestBase):
+    def setUp(self):
+        super(TestInstanceRegistry, self).setUp()
+        self.setup_fixtures()
+        self.pc_path = self.pipeline_configuration.get_path()
+        tank.api.enable_instance_registry()
+
+    def tearDown(self):
+        tank.api.enable_instance_registry(False)
+        super(TestInstanceRegistry, self).tearDown()
+
+    def test_shared(self):
+        tk_1 = tank.tank_from_path(self.project_root)
+        tk_2 = tank.tank_from_path(self.project_root)
+        self.assertTrue(tk_1 is tk_2)
+        self.assertTrue(tank.api.get_shared_instance(self.pc_path) is tk_1)
+
+    def test_disabled(self):
+        tank.api.enable_instance_registry(False)
+        tk_1 = tank.tank_from_path(self.project_root)
+        tk_2 = tank.tank_from_path(self.project_root)
+        self.assertFalse(tk_1 is tk_2)
+
+    def test_invalidate(self):
+        tk_1 = tank.tank_from_path(self.project_root)
+        tank.api.invalidate_shared_instances(self.pc_path)
+        tk_2 = tank.tank_from_path(self.project_root)
+        self.assertFalse(tk_1 is tk_2)
+        tank.api.invalidate_shared_instances()
+        self.assertFalse(tank.tank_from_path(self.project_root) is tk_2)
+
+    def test_reload(self):
+        tk_1 = tank.tank_from_path(self.project_root)
+        tk_2 = tank.api.reload_shared_instance(self.pc_path)
+        self.assertFalse(tk_1 is tk_2)
+        self.assertTrue(tank.tank_from_path(self.project_root) is tk_2)
+
+    def test_threads(self):
+        import threading
+        results = []
+        def worker():
+            results.append(tank.tank_from_path(self.project_root))
+        threads = [threading.Thread(target=worker) for x in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEquals(len(results), 8)
+        self.assertEquals(len(set([id(x) for x in results])), 1)
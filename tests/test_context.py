@@ -794,3 +794,13 @@ class TestSerailize(TestContext):
         serialized = tank.context.serialize(context_1)
         context_2 = tank.context.deserialize(serialized)
         self.assertTrue(context_1 == context_2)
+
+    def test_shared_instance(self):
+        tank.api.enable_instance_registry()
+        try:
+            context_1 = context.Context(**self.kws)
+            context_2 = tank.context.deserialize(tank.context.serialize(context_1))
+            context_3 = yaml.load(yaml.dump(context_1))
+            self.assertTrue(context_2.tank is context_3.tank)
+        finally:
+            tank.api.enable_instance_registry(False)
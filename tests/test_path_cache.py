@@ -259,6 +259,77 @@ class TestGetPaths(TestPathCache):
         self.assertIn(self.project_root, result)
         self.assertIn(self.alt_root_1, result)
 
+class TestBulkQueries(TestPathCache):
+    """
+    Tests for the bulk versions of get_entity() and get_paths().
+    """
+    def setUp(self):
+        super(TestBulkQueries, self).setUp()
+        self.path_cache.add_mapping("Project", self.project["id"], self.project["name"], self.project_root)
+        self.path_cache.add_mapping("Project", self.project["id"], self.project["name"], self.alt_root_1)
+        self.shot_paths = {}
+        for shot_id in range(1, 4):
+            shot_name = "shot_%d" % shot_id
+            primary_path = os.path.join(self.project_root, "seq", shot_name)
+            alt_path = os.path.join(self.alt_root_1, "seq", shot_name)
+            self.path_cache.add_mapping("Shot", shot_id, shot_name, primary_path)
+            self.path_cache.add_mapping("Shot", shot_id, shot_name, alt_path)
+            self.shot_paths[shot_id] = [primary_path, alt_path]
+
+    def test_get_entities(self):
+        paths = [ self.shot_paths[x][0] for x in self.shot_paths ]
+        paths.append(self.shot_paths[2][1])
+        paths.append(self.alt_root_1)
+        missing_path = os.path.join(self.project_root, "seq", "missing")
+        paths.append(missing_path)
+        paths.append(os.path.join("path", "not", "in", "project"))
+
+        result = self.path_cache.get_entities(paths)
+
+        # same results as when querying one path at a time
+        self.assertEquals(len(result), 5)
+        for path in paths:
+            self.assertEquals(result.get(path), self.path_cache.get_entity(path))
+
+    def test_get_paths_for_entities(self):
+        entities = [("Shot", 1), ("Shot", 3), ("Shot", 4), ("Project", self.project["id"])]
+        result = self.path_cache.get_paths_for_entities(entities)
+
+        # same results as when querying one entity at a time
+        self.assertEquals(len(result), 3)
+        for (entity_type, entity_id) in entities:
+            self.assertEquals(result.get((entity_type, entity_id), []), 
+                              self.path_cache.get_paths(entity_type, entity_id))
+
+    def test_path_tree_matcher(self):
+        self.path_cache.add_mapping("Shot", 5, "shotX1", os.path.join(self.project_root, "seq", "shotX1"))
+        self.path_cache.add_mapping("Shot", 6, "SHOT_10", os.path.join(self.project_root, "seq", "SHOT_10"))
+        all_paths = [ os.path.join(self.project_root, "seq", x) for x in ["shotX1", "SHOT_10"] ]
+        for paths in self.shot_paths.values():
+            all_paths.extend(paths)
+        
+        deleted_path = self.shot_paths[1][0]
+        is_deleted = self.path_cache.get_path_tree_matcher(deleted_path)
+        self.path_cache.delete_path_tree(deleted_path)
+        
+        # the matcher agrees with what was actually deleted, including the 
+        # case insensitive and wildcard matches made by the database
+        remaining = self.path_cache.get_entities(all_paths)
+        for path in all_paths:
+            self.assertEquals(is_deleted(path), path not in remaining)
+        self.assertTrue(is_deleted(all_paths[0]))
+        self.assertTrue(is_deleted(all_paths[1]))
+        self.assertFalse(is_deleted(os.path.join("path", "not", "in", "project")))
+    
+    def test_many_entities(self):
+        """
+        Queries for more values than fit into a single sql statement.
+        """
+        entities = [ ("Shot", x) for x in range(path_cache.MAX_QUERY_VALUES * 2) ]
+        result = self.path_cache.get_paths_for_entities(entities)
+        self.assertEquals(sorted(result.keys()), [("Shot", 1), ("Shot", 2), ("Shot", 3)])
+
+
 class Test_SeperateRoots(TestPathCache):
     def test_different_case(self):
         """
@@ -0,0 +1,85 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+import time
+
+from mock import patch
+
+from tank import pipelineconfig
+from tank_vendor import yaml
+
+from tank_test.tank_test_base import *
+
+
+class TestMetadataSnapshot(TankTestBase):
+    """
+    Tests the memoised pipeline configuration metadata.
+    """
+    def setUp(self):
+        super(TestMetadataSnapshot, self).setUp()
+        self.pc_root = self.pipeline_configuration.get_path()
+        self.pc_yml = os.path.join(self.pc_root, "config", "core", "pipeline_configuration.yml")
+
+    def test_metadata_read_once(self):
+        """
+        Repeated lookups of unchanged metadata should not re-parse any files.
+        """
+        pipelineconfig.get_pc_disk_metadata(self.pc_root)
+        pipelineconfig.get_pc_roots_metadata(self.pc_root)
+        with patch("tank_vendor.yaml.load") as yaml_load:
+            pipelineconfig.get_pc_disk_metadata(self.pc_root)
+            pipelineconfig.get_pc_roots_metadata(self.pc_root)
+            pipelineconfig.get_pc_registered_location(self.pc_root)
+            pipelineconfig.PipelineConfiguration(self.pc_root)
+            self.assertEquals(yaml_load.call_count, 0)
+
+    def test_invalidated_on_change(self):
+        """
+        Modifying a metadata file on disk should be picked up on the next access.
+        """
+        data = pipelineconfig.get_pc_disk_metadata(self.pc_root)
+        self.assertEquals(data["pc_name"], "Primary")
+
+        data["pc_name"] = "Secondary"
+        # make sure the change is reflected in the file modification time
+        time.sleep(0.01)
+        fh = open(self.pc_yml, "wt")
+        fh.write(yaml.dump(data))
+        fh.close()
+
+        new_data = pipelineconfig.get_pc_disk_metadata(self.pc_root)
+        self.assertEquals(new_data["pc_name"], "Secondary")
+
+    def test_returns_copies(self):
+        """
+        Data handed out should not allow modification of the memoised values.
+        """
+        data = pipelineconfig.get_pc_roots_metadata(self.pc_root)
+        data["primary"]["linux_path"] = "/modified"
+        data = pipelineconfig.get_pc_roots_metadata(self.pc_root)
+        self.assertNotEqual(data["primary"]["linux_path"], "/modified")
+
+    def test_missing_file_not_cached(self):
+        """
+        Errors should be raised consistently and never memoised.
+        """
+        os.rename(self.pc_yml, self.pc_yml + ".bak")
+        self.assertRaises(tank.TankError, pipelineconfig.get_pc_disk_metadata, self.pc_root)
+        self.assertRaises(tank.TankError, pipelineconfig.get_pc_disk_metadata, self.pc_root)
+        os.rename(self.pc_yml + ".bak", self.pc_yml)
+        self.assertEquals(pipelineconfig.get_pc_disk_metadata(self.pc_root)["pc_name"], "Primary")
+
+    def test_clear_cache(self):
+        pipelineconfig.get_pc_disk_metadata(self.pc_root)
+        pipelineconfig.clear_metadata_cache()
+        with patch("tank_vendor.yaml.load", return_value={"project_name": "foo"}) as yaml_load:
+            pipelineconfig.get_pc_disk_metadata(self.pc_root)
+            self.assertEquals(yaml_load.call_count, 1)
@@ -10,6 +10,9 @@
 
 import os
 import datetime
+import threading
+import time
+import unittest
 
 from mock import Mock, patch
 
@@ -19,6 +22,7 @@ from tank import TankError
 from tank_test.tank_test_base import *
 from tank.template import TemplatePath
 from tank.templatekey import SequenceKey
+from tank_vendor import shotgun_api3
 
 
 class TestShotgunFindPublish(TankTestBase):
@@ -441,3 +445,136 @@ class TestCalcPathCache(TankTestBase):
         self.assertEqual(expected, path_cache)
 
 
+
+
+class TestConnectionPool(unittest.TestCase):
+    """
+    Tests the connection pool used by the Shotgun API to serve several threads.
+    """
+    def setUp(self):
+        self.created = []
+    
+    def _create_connection(self):
+        conn = Mock()
+        conn.connections = {}
+        self.created.append(conn)
+        return conn
+    
+    def test_reuse(self):
+        pool = shotgun_api3.shotgun._ConnectionPool(self._create_connection, 2)
+        conn = pool.checkout()
+        pool.checkin(conn)
+        self.assertEqual(pool.checkout(), conn)
+        self.assertEqual(len(self.created), 1)
+        
+        # a failed connection is replaced
+        pool.discard(conn)
+        pool.checkout()
+        self.assertEqual(len(self.created), 2)
+    
+    def test_bounded(self):
+        pool = shotgun_api3.shotgun._ConnectionPool(self._create_connection, 2)
+        checked_out = [pool.checkout(), pool.checkout()]
+        
+        # a third thread has to wait for a connection to be returned
+        results = []
+        thread = threading.Thread(target=lambda: results.append(pool.checkout()))
+        thread.start()
+        thread.join(0.1)
+        self.assertEqual(results, [])
+        
+        pool.checkin(checked_out[0])
+        thread.join()
+        self.assertEqual(results, [checked_out[0]])
+        self.assertEqual(len(self.created), 2)
+    
+    def test_pool_size(self):
+        sg = shotgun_api3.Shotgun("https://unit_test_mock_sg", "script", "key", 
+                                  connect=False, connection_pool_size=8)
+        self.assertEqual(sg.config.connection_pool_size, 8)
+
+
+class TestParallelFind(unittest.TestCase):
+    """
+    Tests that the Shotgun API reads the pages of large queries concurrently.
+    """
+    def setUp(self):
+        self.sg = shotgun_api3.Shotgun("https://unit_test_mock_sg", "script", "key", connect=False)
+        self.sg.config.records_per_page = 2
+        self.entities = [ {"type": "Shot", "id": x} for x in range(1, 10) ]
+        self.pages_read = []
+        self.sg._call_rpc = self._call_rpc
+    
+    def _call_rpc(self, method, params, *args, **kwargs):
+        if method == "info":
+            return {"version": [5, 0, 0]}
+        per_page = params["paging"]["entities_per_page"]
+        page = params["paging"]["current_page"]
+        self.pages_read.append(page)
+        result = {"entities": self.entities[(page - 1) * per_page:page * per_page]}
+        if params["return_paging_info"]:
+            result["paging_info"] = {"entity_count": len(self.entities)}
+        return result
+    
+    def test_all_pages(self):
+        self.assertEqual(self.sg.find("Shot", []), self.entities)
+        self.assertEqual(sorted(self.pages_read), [1, 2, 3, 4, 5])
+    
+    def test_limit(self):
+        self.assertEqual(self.sg.find("Shot", [], limit=5), self.entities[:5])
+        self.assertEqual(sorted(self.pages_read), [1, 2, 3])
+    
+    def test_sequential(self):
+        self.sg.config.max_parallel_pages = 1
+        self.assertEqual(self.sg.find("Shot", []), self.entities)
+        self.assertEqual(self.pages_read, [1, 2, 3, 4, 5])
+
+
+class TestFindIter(unittest.TestCase):
+    """
+    Tests that the Shotgun API can stream the results of a query page by page.
+    """
+    def setUp(self):
+        self.sg = shotgun_api3.Shotgun("https://unit_test_mock_sg", "script", "key", connect=False)
+        self.entities = [ {"type": "Shot", "id": x} for x in range(1, 8) ]
+        self.requests = []
+        self.sg._call_rpc = self._call_rpc
+    
+    def _call_rpc(self, method, params, *args, **kwargs):
+        if method == "info":
+            return {"version": [5, 0, 0]}
+        self.requests.append(params)
+        per_page = params["paging"]["entities_per_page"]
+        page = params["paging"]["current_page"]
+        entities = self.entities
+        conditions = params["filters"]["conditions"]
+        if conditions and conditions[-1].get("relation") == "greater_than":
+            entities = [ e for e in entities if e["id"] > conditions[-1]["values"][0] ]
+        return {"entities": entities[(page - 1) * per_page:page * per_page]}
+    
+    def test_pages(self):
+        pages = list(self.sg.find_iter("Shot", [], page_size=3))
+        self.assertEqual(pages, [self.entities[0:3], self.entities[3:6], self.entities[6:]])
+        self.assertEqual([ r["paging"]["current_page"] for r in self.requests ], [1, 2, 3])
+    
+    def test_id_cursor(self):
+        pages = list(self.sg.find_iter("Shot", [], page_size=3, id_cursor=True, prefetch=False))
+        self.assertEqual(pages, [self.entities[0:3], self.entities[3:6], self.entities[6:]])
+        self.assertEqual([ r["paging"]["current_page"] for r in self.requests ], [1, 1, 1])
+        self.assertEqual(self.requests[0]["sorts"], [{"field_name": "id", "direction": "asc"}])
+    
+    def test_prefetch(self):
+        pages = self.sg.find_iter("Shot", [], page_size=3)
+        pages.next()
+        # the second page is requested in the background before it is asked for
+        timeout = time.time() + 5
+        while len(self.requests) < 2 and time.time() < timeout:
+            time.sleep(0.01)
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(pages.next(), self.entities[3:6])
+    
+    def test_exact_pages(self):
+        # a full last page requires an extra request to find out that it is the last one
+        pages = list(self.sg.find_iter("Shot", [], page_size=7))
+        self.assertEqual(pages, [self.entities])
+        self.assertEqual(len(self.requests), 2)
@@ -0,0 +1,163 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+import time
+
+from mock import patch
+
+import tank
+from tank.util import shotgun_cache
+from tank_test.tank_test_base import *
+
+
+class TestCachingShotgun(TankTestBase):
+
+    def setUp(self):
+        super(TestCachingShotgun, self).setUp()
+        self.storage = {"type": "LocalStorage", "id": 1, "code": "primary"}
+        self.shot = {"type": "Shot", "id": 2, "code": "shot_code"}
+        self.add_to_sg_mock_db([self.storage, self.shot])
+        self.cache_path = os.path.join(self.tank_temp, "shotgun_cache_%s" % self._testMethodName)
+        self.sg = shotgun_cache.CachingShotgun(self.sg_mock, shotgun_cache.get_cache(self.cache_path))
+
+    def _find_storage(self, sg):
+        return sg.find_one("LocalStorage", [["code", "is", "primary"]], ["code"])
+
+    def test_read_through(self):
+        self.assertEquals(self._find_storage(self.sg), self.storage)
+        self.assertEquals(self._find_storage(self.sg), self.storage)
+        self.assertEquals(self.sg_mock.find_one.call_count, 1)
+
+        # results are copies
+        self._find_storage(self.sg)["code"] = "modified"
+        self.assertEquals(self._find_storage(self.sg)["code"], "primary")
+
+        # entity types without a rule are not cached
+        self.sg.find_one("Shot", [["id", "is", 2]])
+        self.sg.find_one("Shot", [["id", "is", 2]])
+        self.assertEquals(self.sg_mock.find_one.call_count, 3)
+
+    def test_expiry(self):
+        self._find_storage(self.sg)
+        expired = time.time() + shotgun_cache.CACHE_RULES["LocalStorage"]
+        patcher = patch("time.time", return_value=expired)
+        patcher.start()
+        try:
+            self._find_storage(self.sg)
+        finally:
+            patcher.stop()
+        self.assertEquals(self.sg_mock.find_one.call_count, 2)
+
+    def test_invalidate(self):
+        self._find_storage(self.sg)
+        self.sg.invalidate_cache("LocalStorage")
+        self._find_storage(self.sg)
+        self.assertEquals(self.sg_mock.find_one.call_count, 2)
+
+        # writes invalidate the cache for the entity type
+        self.sg.update("LocalStorage", 1, {"code": "primary"})
+        self._find_storage(self.sg)
+        self.assertEquals(self.sg_mock.find_one.call_count, 3)
+
+    def test_disk_cache(self):
+        self._find_storage(self.sg)
+        self.assertTrue(os.path.exists(self.cache_path))
+
+        # a new process only has the file
+        shotgun_cache.clear_caches()
+        sg = shotgun_cache.CachingShotgun(self.sg_mock, shotgun_cache.get_cache(self.cache_path))
+        self.assertEquals(self._find_storage(sg), self.storage)
+        self.assertEquals(self.sg_mock.find_one.call_count, 1)
+
+    def test_shared_disk_cache(self):
+        # another process, with its own in-memory cache objects
+        other_sg = shotgun_cache.CachingShotgun(self.sg_mock, shotgun_cache.ShotgunCache(self.cache_path))
+        
+        # entries written by both processes are kept
+        self._find_storage(self.sg)
+        other_sg.find("LocalStorage", [])
+        self._find_storage(other_sg)
+        self.sg.find("LocalStorage", [])
+        self.assertEquals(self.sg_mock.find_one.call_count, 1)
+        self.assertEquals(self.sg_mock.find.call_count, 1)
+        
+        # and invalidations apply to both
+        other_sg.invalidate_cache("LocalStorage")
+        self._find_storage(self.sg)
+        self.assertEquals(self.sg_mock.find_one.call_count, 2)
+    
+    def test_fetched_before_invalidation(self):
+        # a result fetched before the cache was invalidated is not stored
+        def find_one(*args, **kwargs):
+            self.sg.invalidate_cache("LocalStorage")
+            return self.storage
+        self.sg_mock.find_one.side_effect = find_one
+        self._find_storage(self.sg)
+        self._find_storage(self.sg)
+        self.assertEquals(self.sg_mock.find_one.call_count, 2)
+    
+    def test_invalid_cache_file(self):
+        self._find_storage(self.sg)
+        rule_folder = os.path.join(self.cache_path, "LocalStorage")
+        for file_name in os.listdir(rule_folder):
+            fh = open(os.path.join(rule_folder, file_name), "wt")
+            fh.write("cos\nsystem\n(S'echo'\ntR.")
+            fh.close()
+        self.assertEquals(self._find_storage(self.sg), self.storage)
+        self.assertEquals(self.sg_mock.find_one.call_count, 2)
+    
+    def test_login(self):
+        self.sg_mock.config.script_name = "script"
+        self._find_storage(self.sg)
+        
+        # results are not shared between logins
+        self.sg.config.script_name = None
+        self.sg.config.user_login = "user"
+        self._find_storage(self.sg)
+        self.assertEquals(self.sg_mock.find_one.call_count, 2)
+        self._find_storage(self.sg)
+        self.assertEquals(self.sg_mock.find_one.call_count, 2)
+    
+    def test_attributes(self):
+        # attributes are read from and written to the wrapped instance
+        self.sg.custom_attribute = "value"
+        self.assertEquals(self.sg_mock.custom_attribute, "value")
+        self.assertEquals(self.sg.custom_attribute, "value")
+        self.assertEquals(self.sg.get_wrapped_api(), self.sg_mock)
+
+    def test_tank_shotgun(self):
+        # caching is disabled by default
+        self.assertEquals(tank.Tank(self.project_root).shotgun, self.sg_mock)
+        
+        shotgun_cache.enable_shotgun_cache()
+        try:
+            tk = tank.Tank(self.project_root)
+            self._find_storage(tk.shotgun)
+            self._find_storage(tank.Tank(self.project_root).shotgun)
+        finally:
+            shotgun_cache.enable_shotgun_cache(False)
+        self.assertEquals(self.sg_mock.find_one.call_count, 1)
+    
+    def test_invalidate_memory_cache(self):
+        # lookups made without a pipeline configuration use an in-memory cache
+        memory_sg = shotgun_cache.CachingShotgun(self.sg_mock, shotgun_cache.get_cache())
+        self._find_storage(memory_sg)
+        
+        # which is invalidated by writes through other connections
+        self.sg.update("LocalStorage", 1, {"code": "primary"})
+        self._find_storage(memory_sg)
+        self.assertEquals(self.sg_mock.find_one.call_count, 2)
+        
+        # and by writes made without any cache
+        shotgun_cache.invalidate_caches("LocalStorage")
+        self._find_storage(memory_sg)
+        self._find_storage(self.sg)
+        self.assertEquals(self.sg_mock.find_one.call_count, 4)
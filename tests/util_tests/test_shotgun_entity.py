@@ -0,0 +1,78 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+# 
+# CONFIDENTIAL AND PROPRIETARY
+# 
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit 
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your 
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights 
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from mock import patch
+
+import tank
+from tank import TankError
+from tank import Hook
+from tank.util import shotgun_entity
+from tank_test.tank_test_base import *
+
+
+class SingleValueHook(Hook):
+    """
+    Folder name hook which only implements execute()
+    """
+    def execute(self, entity_type, entity_id, field_name, value, **kwargs):
+        return str(value).upper().replace(" ", "-")
+
+
+class TestEntityExpression(TankTestBase):
+    
+    def setUp(self):
+        super(TestEntityExpression, self).setUp()
+        self.setup_fixtures()
+        self.tk = tank.Tank(self.project_root)
+        self.shots = [ {"type": "Shot", "id": 1, "code": "shot 1", "sg_extra": "a"},
+                       {"type": "Shot", "id": 2, "code": "shot_2", "sg_extra": None} ]
+    
+    def test_generate_names(self):
+        expr = shotgun_entity.EntityExpression(self.tk, "Shot", "{code}[_{sg_extra}]")
+        
+        self.assertEquals(expr.generate_names(self.shots), ["shot-1_a", "shot_2"])
+        for shot in self.shots:
+            self.assertEquals([expr.generate_name(shot)], expr.generate_names([shot]))
+    
+    def test_single_hook_call(self):
+        expr = shotgun_entity.EntityExpression(self.tk, "Shot", "{code}[_{sg_extra}]")
+        
+        hook_path = self.tk.pipeline_configuration.get_core_hook_path("process_folder_name")
+        hook_class = tank.hook.get_hook_class(hook_path)
+        
+        execute_batch = hook_class.execute_batch
+        calls = []
+        def execute_batch_proxy(hook_obj, entity_type, items, **kwargs):
+            calls.append(items)
+            return execute_batch(hook_obj, entity_type, items, **kwargs)
+        
+        with patch.object(hook_class, "execute_batch", execute_batch_proxy):
+            self.assertEquals(expr.generate_names(self.shots), ["shot-1_a", "shot_2"])
+        
+        self.assertEquals(len(calls), 1)
+        self.assertEquals(len(calls[0]), 3)
+    
+    def test_single_value_hook(self):
+        """
+        Hooks which do not implement execute_batch are called once per value.
+        """
+        expr = shotgun_entity.EntityExpression(self.tk, "Shot", "{code}[_{sg_extra}]")
+        with patch("tank.hook.get_hook_class", return_value=SingleValueHook):
+            self.assertEquals(expr.generate_names(self.shots), ["SHOT-1_A", "SHOT_2"])
+    
+    def test_invalid_name(self):
+        expr = shotgun_entity.EntityExpression(self.tk, "Shot", "{code}")
+        with patch("tank.hook.get_hook_class", return_value=SingleValueHook):
+            self.assertRaises(TankError, expr.generate_names, [{"type": "Shot", "id": 1, "code": "a/b"}])
+    
+    def test_missing_value(self):
+        expr = shotgun_entity.EntityExpression(self.tk, "Shot", "{code}_{sg_extra}")
+        self.assertEquals(expr.generate_names(self.shots[:1]), ["shot-1_a"])
+        self.assertRaises(TankError, expr.generate_names, self.shots)
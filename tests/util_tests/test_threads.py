@@ -0,0 +1,61 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+# 
+# CONFIDENTIAL AND PROPRIETARY
+# 
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit 
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your 
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights 
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import time
+import threading
+
+import unittest2 as unittest
+
+from tank.util.threads import map_in_threads
+
+
+class TestMapInThreads(unittest.TestCase):
+
+    def test_order(self):
+        """
+        Results should be returned in item order regardless of completion order.
+        """
+        def fn(x):
+            time.sleep((10 - x) * 0.001)
+            return x * 2
+        self.assertEquals(map_in_threads(fn, range(10), 4), [ x * 2 for x in range(10) ])
+
+    def test_concurrent(self):
+        """
+        Work should be spread over several threads.
+        """
+        thread_names = set()
+        def fn(x):
+            thread_names.add(threading.current_thread().name)
+            time.sleep(0.01)
+        map_in_threads(fn, range(8), 4)
+        self.assertTrue(len(thread_names) > 1)
+
+    def test_serial(self):
+        thread_names = set()
+        def fn(x):
+            thread_names.add(threading.current_thread().name)
+        map_in_threads(fn, range(8), 1)
+        self.assertEquals(thread_names, set([threading.current_thread().name]))
+
+    def test_exception(self):
+        """
+        The first exception in item order should be re-raised.
+        """
+        def fn(x):
+            if x in [3, 5]:
+                raise ValueError(x)
+            return x
+        try:
+            map_in_threads(fn, range(8), 4)
+        except ValueError, e:
+            self.assertEquals(e.args, (3,))
+        else:
+            self.fail("No exception raised")